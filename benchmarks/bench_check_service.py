@@ -0,0 +1,102 @@
+# bench_check_service.py
+"""
+Time checking one report: a cold one-shot run (fresh interpreter: import, load the
+standards workbook, parse, check) vs a request to the warm check service, with and
+without the extraction cache.
+
+    python benchmarks/bench_check_service.py
+    python benchmarks/bench_check_service.py --rows 20000 --sections 50 --requests 50
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+# 一次性检查：新进程中导入、载入标准库、解析报告并逐条检查
+ONE_SHOT = """
+import sys
+import check_standards_in_reports as checker
+from util import extract_from_docx
+db = checker.DATABASE.load()
+for orig_code, code, name in extract_from_docx(sys.argv[1]):
+    db.check_one(code, name)
+"""
+
+def cold_runs(report, repeat, env):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, "-c", ONE_SHOT, str(report)], cwd=ROOT, env=env, check=True)
+        times.append(time.perf_counter() - t0)
+    return times
+
+def warm_runs(url, report, requests):
+    body = json.dumps({"path": str(report)}).encode()
+    times = []
+    for _ in range(requests):
+        req = urllib.request.Request(url + "check", data=body, headers={"Content-Type": "application/json"})
+        t0 = time.perf_counter()
+        with urllib.request.urlopen(req) as resp:
+            json.loads(resp.read())
+        times.append(time.perf_counter() - t0)
+    return times
+
+def summary(times):
+    return {"median_ms": round(statistics.median(times) * 1000, 1),
+            "p95_ms": round(sorted(times)[min(len(times) - 1, int(len(times) * 0.95))] * 1000, 1)}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="一次性检查 vs 常驻检查服务")
+    parser.add_argument("--rows", type=int, default=20000, help="标准库行数")
+    parser.add_argument("--sections", type=int, default=50, help="报告的重复段落数")
+    parser.add_argument("--repeat", type=int, default=3, help="一次性检查的运行次数")
+    parser.add_argument("--requests", type=int, default=30, help="向服务发送的请求数")
+    args = parser.parse_args(argv)
+
+    tmp = Path(tempfile.mkdtemp(prefix="bench_service_"))
+    os.environ.update(SRC=str(tmp / "standards.xlsx"), DEST=str(tmp / "standards.xlsx"), STORE="",
+                      EXTRACT_CACHE=str(tmp / "extract_cache.sqlite"))
+    from generators import make_report, write_workbook
+    import check_service
+
+    write_workbook(tmp / "standards.xlsx", args.rows)
+    report = tmp / "report.docx"
+    make_report(report, args.sections)
+
+    # 一次性检查不使用提取缓存；先运行一次写入工作簿快照，与日常使用时一致
+    env = dict(os.environ, EXTRACT_CACHE="")
+    cold_runs(report, 1, env)
+    results = {"cold_one_shot": summary(cold_runs(report, args.repeat, env))}
+
+    service = check_service.CheckService(workers=1)
+    server = check_service.CheckServer(("127.0.0.1", 0), service)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        service.database()
+        cache, service.cache = service.cache, None
+        results["warm_parse"] = summary(warm_runs(server.base_url, report, args.requests))
+        service.cache = cache
+        results["warm_cached"] = summary(warm_runs(server.base_url, report, args.requests))
+    finally:
+        server.shutdown()
+        server.server_close()
+        service.close()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    print(f"标准库 {args.rows} 行，报告 {args.sections} 段")
+    for name, res in results.items():
+        print(f"{name:<15} median {res['median_ms']:8.1f} ms   p95 {res['p95_ms']:8.1f} ms")
+
+if __name__ == "__main__":
+    main()
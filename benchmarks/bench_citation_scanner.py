@@ -0,0 +1,100 @@
+# bench_citation_scanner.py
+"""
+Benchmark scan_citations against the old feed_text double pass.
+
+The golden corpus mixes the three citation layouts with prose, decrees,
+overlapping citations and lines split across two paragraphs; every line (and
+every prev + cur look-back pair) must give exactly the same hits.
+
+    python benchmarks/bench_citation_scanner.py [lines]
+"""
+import os
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("SRC", "standards.xlsx")
+os.environ.setdefault("DEST", "standards.xlsx")
+
+import util
+
+# 旧实现：每行跑两个模式，每个匹配再逐个执行未编译的校验正则
+def old_is_valid_standard_code(code_text):
+    clean_code = code_text.replace(" ", "")
+    for pattern in (r'[一-鿿]', r'主席令', r'国务院令', r'号', r'第\d+号', r'〔\d+〕'):
+        if re.search(pattern, code_text):
+            return False
+    if not re.match(r'^[A-Z]+', clean_code):
+        return False
+    if not re.search(r'\d', clean_code):
+        return False
+    return True
+
+def old_scan(text):
+    hits = []
+    for pat in (util.PAT_LINE_1, util.PAT_LINE_2):
+        for m in pat.finditer(text):
+            orig_code = m.group("code")
+            if not old_is_valid_standard_code(orig_code):
+                continue
+            hits.append((orig_code, orig_code.replace(" ", ""), util.zh_punc_to_en(m.group("name").strip())))
+    return hits
+
+PROSE = [
+    "本报告依据委托方提供的资料编制，检测结果仅对本次采样负责。",
+    "采样点位布设于厂界外1m处，共设4个监测点，每天监测2次，连续监测3天。",
+    "根据《中华人民共和国安全生产法》（主席令第88号）的有关规定，",
+    "依据国务院令第591号《危险化学品安全管理条例》，对企业进行评价。",
+    "检测仪器：AWA5688型多功能声级计（编号SN2023-015），检定有效期至2025年。",
+    "表3-2 工作场所空气中化学有害因素检测结果（mg/m³）",
+    "注：ND表示未检出，检出限为0.01 mg/m³。",
+    "见附件《检测方案》和《采样记录》。",
+    "",
+]
+
+def make_corpus(lines, seed=0):
+    """Synthetic report lines with a realistic share of prose"""
+    rng = random.Random(seed)
+    prefix = lambda: rng.choice(["GB", "GB/T", "GBZ", "GBZ/T", "HJ", "AQ/T", "DB11/T", "YY", "JJG"])
+    code = lambda: f"{prefix()}{rng.choice(['', ' ', '  '])}{rng.randint(1, 60000)}{rng.choice(['', '.1', '.2'])}-{rng.randint(1990, 2024)}{rng.choice(['', '', 'E', '/XG1-2022'])}"
+    name = lambda: rng.choice(["生活饮用水标准检验方法", "建筑设计防火规范", "工作场所空气有毒物质测定 第1部分：总则", "声环境质量标准"])
+    layouts = [
+        lambda: f"{code()} 《{name()}》",
+        lambda: f"《{name()}》 {code()}",
+        lambda: f"({code()}) 《{name()}》",
+        lambda: f"《{name()}》（{code()}）",
+        lambda: f"{code()}《{name()}》、{code()}《{name()}》",
+        lambda: f"{rng.randint(1, 30)}. {code()}",
+        lambda: f"《{name()}》",
+        lambda: f"依据《{name()}》执行，详见主席令第{rng.randint(1, 99)}号",
+    ]
+    out = []
+    for _ in range(lines):
+        out.append(rng.choice(layouts)() if rng.random() < 0.3 else rng.choice(PROSE))
+    return out
+
+def main(lines=50000):
+    corpus = make_corpus(lines)
+    # 段落循环会对 prev + cur 再扫描一次，也纳入对比
+    texts = [t.strip() for t in corpus] + [(a + b).strip() for a, b in zip(corpus, corpus[1:])]
+    texts = [t for t in texts if t]
+
+    t0 = time.perf_counter()
+    new = [util.scan_citations(t) for t in texts]
+    new_t = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    old = [old_scan(t) for t in texts]
+    old_t = time.perf_counter() - t0
+
+    assert new == old, "scan_citations differs from the old double pass"
+    print(f"texts: {len(texts)}, hits: {sum(map(len, new))}")
+    print(f"scan_citations: {len(texts) / new_t:12,.0f} lines/s")
+    print(f"old double pass:{len(texts) / old_t:12,.0f} lines/s")
+    print(f"speedup: {old_t / new_t:.1f}x")
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:2]))
@@ -0,0 +1,131 @@
+# bench_detail_parser.py
+"""
+Benchmark parse_detail_fields against the old BeautifulSoup + _text_after lookups.
+
+Runs on detail pages saved in the page cache (--from-cache), on .html files given
+on the command line, or on built-in synthetic csres-style pages. Every page must
+give the same fields with both parsers.
+
+    python benchmarks/bench_detail_parser.py
+    python benchmarks/bench_detail_parser.py --from-cache http_cache.sqlite
+    python benchmarks/bench_detail_parser.py page1.html page2.html
+"""
+import argparse
+import os
+import re
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("SRC", "standards.xlsx")
+os.environ.setdefault("DEST", "standards.xlsx")
+
+from bs4 import BeautifulSoup
+
+import util
+
+# 旧实现：每个字段一次 soup.find，替代情况扫描全部 td
+def old_text_after(label, soup):
+    if label == "替代情况":
+        for td in soup.find_all("td"):
+            if td.get_text(strip=True).startswith("替代情况"):
+                next_td = td.find_next_sibling("td")
+                if next_td:
+                    return next_td.get_text(strip=True)
+        return None
+    td = soup.find("td", string=re.compile(label))
+    if td and td.find_next_sibling("td"):
+        return td.find_next_sibling("td").get_text(strip=True)
+    return None
+
+LABELS = util.DETAIL_LABELS + (util.REPLACEMENT_LABEL,)
+
+def old_fields(html):
+    # crawl_one_code 的调用方式：重试条件 3 次 + 组装记录 4 次
+    soup = BeautifulSoup(html, "lxml")
+    any(old_text_after(label, soup) for label in util.DETAIL_LABELS)
+    return {label: old_text_after(label, soup) for label in LABELS}
+
+def new_fields(html):
+    fields = util.parse_detail_fields(html)
+    any(util._text_after(label, fields) for label in util.DETAIL_LABELS)
+    return {label: util._text_after(label, fields) for label in LABELS}
+
+NAV = "".join(f'<td><a href="/list/{i}.html">分类{i}</a></td>' for i in range(40))
+
+def synthetic_page(i):
+    """A csres-style detail page: scripts, navigation, the detail table and a footer"""
+    obsolete = i % 3 == 0
+    rows = [
+        ("标准编号：", f"GB/T {5750 + i}-2006"),
+        ("标准名称：", f"生活饮用水标准检验方法 第{i}部分"),
+        ("英文名称：", "Standard examination methods for drinking water"),
+        ("<b>发布日期：</b>", "2006-12-29"),
+        ("实施日期：" if i % 5 else "实施日期：<!-- 无 -->", "2007-07-01" if i % 7 else ""),
+        ("作废日期：", "2023-10-01" if obsolete else ""),
+        ('<img src="/images/tdqk.gif" width="9"> 替代情况：', f"被 GB/T {5750 + i}-2023 代替" if obsolete else "&nbsp;"),
+        ("中标分类：", "C51"),
+        ("ICS分类：", "13.060.01"),
+        ("发布部门：", "国家市场监督管理总局<br>国家标准化管理委员会"),
+    ]
+    body = "\n".join(f'  <tr>\n    <td class="label">{k}</td>\n    <td>{v}</td>\n  </tr>' for k, v in rows)
+    return f"""<html><head><meta http-equiv="Content-Type" content="text/html; charset=GBK">
+<title>GB/T {5750 + i}-2006</title>
+<style>td {{ font-size: 12px }}</style>
+<script>var 发布日期 = "script text is not a cell"; function go() {{ return 1; }}</script>
+</head><body>
+<table class="nav"><tr>{NAV}</tr></table>
+<!-- 标准信息 -->
+<table class="detail" width="100%">
+{body}
+</table>
+<table><tr><td>相关标准</td><td>{"".join(f'<a href="/detail/{j}.html">GB {j}</a> ' for j in range(30))}</td></tr></table>
+<table class="footer"><tr><td>版权所有 中国标准服务网</td></tr></table>
+</body></html>"""
+
+def load_pages(args):
+    if args.from_cache:
+        conn = sqlite3.connect(args.from_cache)
+        rows = conn.execute("SELECT body, encoding FROM responses WHERE kind = 'detail'").fetchall()
+        conn.close()
+        return [body.decode(encoding or "gbk", errors="replace") for body, encoding in rows]
+    if args.pages:
+        return [Path(p).read_text(encoding=args.encoding, errors="replace") for p in args.pages]
+    return [synthetic_page(i) for i in range(200)]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="详情页解析基准测试")
+    parser.add_argument("pages", nargs="*", help="保存的详情页 HTML 文件")
+    parser.add_argument("--from-cache", help="从页面缓存（http_cache.sqlite）读取详情页")
+    parser.add_argument("--encoding", default="gbk", help="HTML 文件的编码")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+    pages = load_pages(args)
+    if not pages:
+        print("没有可用的详情页")
+        return
+
+    for page in pages:
+        assert new_fields(page) == old_fields(page), "parse_detail_fields differs from BeautifulSoup"
+
+    t0 = time.perf_counter()
+    for _ in range(args.repeat):
+        for page in pages:
+            new_fields(page)
+    new_t = (time.perf_counter() - t0) / (args.repeat * len(pages))
+
+    t0 = time.perf_counter()
+    for _ in range(args.repeat):
+        for page in pages:
+            old_fields(page)
+    old_t = (time.perf_counter() - t0) / (args.repeat * len(pages))
+
+    print(f"pages: {len(pages)}")
+    print(f"parse_detail_fields: {new_t * 1000:8.3f} ms/page")
+    print(f"BeautifulSoup:       {old_t * 1000:8.3f} ms/page")
+    print(f"speedup: {old_t / new_t:.1f}x")
+
+if __name__ == "__main__":
+    main()
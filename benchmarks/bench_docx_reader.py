@@ -0,0 +1,50 @@
+# bench_docx_reader.py
+"""
+Benchmark extract_from_docx: streaming document.xml reader vs python-docx.
+
+Builds a synthetic report with the three citation layouts, soft line breaks,
+hyperlinks, tabs and tables with horizontally and vertically merged cells,
+checks both readers return the same hits and reports time and peak memory.
+
+    python benchmarks/bench_docx_reader.py [sections ...]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("SRC", "standards.xlsx")
+os.environ.setdefault("DEST", "standards.xlsx")
+
+import util
+from generators import make_report
+
+def measure(path, reader):
+    """Return (hits, seconds, peak bytes)"""
+    t0 = time.perf_counter()
+    util.extract_from_docx(path, reader)
+    elapsed = time.perf_counter() - t0
+
+    tracemalloc.start()
+    hits = util.extract_from_docx(path, reader)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return hits, elapsed, peak
+
+def main(*sections):
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sections or (50, 200, 800):
+            path = Path(tmp) / f"report_{n}.docx"
+            make_report(path, n)
+            new, new_t, new_mem = measure(path, "stream")
+            old, old_t, old_mem = measure(path, "python-docx")
+            assert new == old, f"streaming reader differs from python-docx on {n} sections"
+            print(f"sections: {n:5d}  hits: {len(new):6d}  size: {path.stat().st_size / 2**10:8.0f} KiB")
+            print(f"  stream:      {new_t:8.3f} s  peak {new_mem / 2**20:8.1f} MiB")
+            print(f"  python-docx: {old_t:8.3f} s  peak {old_mem / 2**20:8.1f} MiB")
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:]))
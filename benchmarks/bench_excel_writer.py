@@ -0,0 +1,88 @@
+# bench_excel_writer.py
+"""
+Benchmark saving the database: streaming writer + file copy vs the old
+ExcelWriter / load_workbook / save round trip done once per copy.
+
+Both outputs must read back to the same sheets, cells and column widths.
+
+    python benchmarks/bench_excel_writer.py [rows]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("SRC", "standards.xlsx")
+os.environ.setdefault("DEST", "standards.xlsx")
+
+import pandas as pd
+from openpyxl import load_workbook
+from openpyxl.utils import get_column_letter
+
+import util
+from generators import make_workbook_frames
+
+# 旧实现：pandas 写入后重新打开整个文件计算列宽，再保存一次
+def old_save(file_path, df_has_output, df_no_output_or_too_much_outputs, df_date_empty, df_err):
+    with pd.ExcelWriter(file_path, engine="openpyxl") as writer:
+        df_has_output.to_excel(writer, sheet_name="有搜索结果的标准", index=False)
+        df_no_output_or_too_much_outputs.to_excel(writer, sheet_name="无搜索结果或搜索结果过多的标准", index=False)
+        df_err.to_excel(writer, sheet_name="报错(debug用)", index=False)
+        df_date_empty.to_excel(writer, sheet_name="标准无详细日期(debug用)", index=False)
+    wb = load_workbook(file_path)
+    for sheet_name in util.EXCEL_SHEETS:
+        ws = wb[sheet_name]
+        for col_idx, col in enumerate(ws.iter_cols(values_only=True), 1):
+            max_len = max((len(str(v)) for v in col if v is not None), default=0)
+            ws.column_dimensions[get_column_letter(col_idx)].width = max(max_len + 2, 10)
+    wb.save(file_path)
+
+def old_run(dest, log_copy, frames):
+    old_save(dest, *frames)
+    old_save(log_copy, *frames)
+
+def new_run(dest, log_copy, frames):
+    util.save_excel_with_formatting(dest, *frames)
+    shutil.copyfile(dest, log_copy)
+
+def measure(run, tmp, frames):
+    dest, log_copy = tmp / "dest.xlsx", tmp / "log.xlsx"
+    t0 = time.perf_counter()
+    run(dest, log_copy, frames)
+    elapsed = time.perf_counter() - t0
+    tracemalloc.start()
+    run(dest, log_copy, frames)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return dest, elapsed, peak
+
+def read_back(path):
+    wb = load_workbook(path, read_only=False)
+    widths = {ws.title: [ws.column_dimensions[get_column_letter(i)].width for i in range(1, ws.max_column + 1)]
+              for ws in wb.worksheets}
+    sheets = pd.read_excel(path, sheet_name=None, dtype=str, keep_default_na=False)
+    return wb.sheetnames, widths, sheets
+
+def main(rows=50000):
+    frames = make_workbook_frames(rows)
+    with tempfile.TemporaryDirectory() as tmp_new, tempfile.TemporaryDirectory() as tmp_old:
+        new_path, new_t, new_mem = measure(new_run, Path(tmp_new), frames)
+        old_path, old_t, old_mem = measure(old_run, Path(tmp_old), frames)
+
+        new_names, new_widths, new_sheets = read_back(new_path)
+        old_names, old_widths, old_sheets = read_back(old_path)
+        assert new_names == old_names and new_widths == old_widths, "sheet order or column widths differ"
+        for name in new_names:
+            pd.testing.assert_frame_equal(new_sheets[name], old_sheets[name])
+
+    print(f"rows: {sum(map(len, frames))} (两份文件)")
+    print(f"streaming + copy:     {new_t:8.2f} s  peak {new_mem / 2**20:8.1f} MiB")
+    print(f"ExcelWriter x2:       {old_t:8.2f} s  peak {old_mem / 2**20:8.1f} MiB")
+    print(f"speedup: {old_t / new_t:.1f}x, memory: {old_mem / max(new_mem, 1):.1f}x smaller")
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:2]))
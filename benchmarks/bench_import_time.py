@@ -0,0 +1,74 @@
+# bench_import_time.py
+"""
+Measure how long the entry-point modules take to import, using python -X importtime
+in a fresh interpreter per run, and list the heaviest imports.
+
+    python benchmarks/bench_import_time.py
+    python benchmarks/bench_import_time.py --repeat 5 --top 15 --json imports.json
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+MODULES = ["util", "check_standards_in_reports", "update_database_excel"]
+
+# import time: self [us] | cumulative | imported package
+_LINE = re.compile(r"^import time:\s+(\d+)\s*\|\s*(\d+)\s*\|(\s*)(\S+)")
+
+def import_times(module):
+    """
+    Import `module` in a fresh interpreter. Returns (total us, number of modules
+    imported, {direct import of `module`: cumulative us}).
+    """
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=ROOT, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} 失败:\n{proc.stderr[-2000:]}")
+    # 输出按导入完成的顺序排列，子模块在父模块之前；缩进每深一层多两个空格
+    rows = [(len(m.group(3)) // 2, m.group(4), int(m.group(2)))
+            for m in map(_LINE.match, proc.stderr.splitlines()) if m]
+    end = max(i for i, (depth, name, _) in enumerate(rows) if depth == 0 and name == module)
+    start = end
+    while start > 0 and rows[start - 1][0] > 0:
+        start -= 1
+    children = {name: us for depth, name, us in rows[start:end] if depth == 1}
+    return rows[end][2], end - start + 1, children
+
+def measure(module, repeat):
+    runs = [import_times(module) for _ in range(repeat)]
+    heaviest = sorted(((statistics.median(run[2].get(name, 0) for run in runs), name)
+                       for name in runs[0][2]), reverse=True)
+    return {
+        "module": module,
+        "cumulative_ms": round(statistics.median(run[0] for run in runs) / 1000, 1),
+        "modules_imported": runs[0][1],
+        "heaviest": [{"name": name, "cumulative_ms": round(us / 1000, 1)} for us, name in heaviest],
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="入口模块导入耗时")
+    parser.add_argument("modules", nargs="*", default=MODULES, help=f"要测量的模块（默认 {' '.join(MODULES)}）")
+    parser.add_argument("--repeat", type=int, default=3, help="每个模块导入的次数，取中位数")
+    parser.add_argument("--top", type=int, default=10, help="列出最耗时的顶层导入数")
+    parser.add_argument("--json", help="把结果写入 JSON 文件")
+    args = parser.parse_args(argv)
+
+    results = [measure(module, args.repeat) for module in args.modules]
+    for res in results:
+        res["heaviest"] = res["heaviest"][:args.top]
+        print(f"{res['module']:<30} {res['cumulative_ms']:8.1f} ms  ({res['modules_imported']} modules)")
+        for item in res["heaviest"]:
+            print(f"    {item['name']:<26} {item['cumulative_ms']:8.1f} ms")
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# bench_related_warnings.py
+"""
+Benchmark related_warnings: precomputed amendment/English index vs the old full scan.
+
+    python benchmarks/bench_related_warnings.py [rows] [lookups]
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import check_standards_in_reports as checker
+
+def make_std_index(rows, seed=0):
+    """Synthetic STD_INDEX with amendments (/XGn-yyyy) and English (E) editions"""
+    rng = random.Random(seed)
+    index = {}
+    while len(index) < rows:
+        base = f"{rng.choice(['GB', 'GB/T', 'HJ', 'AQ/T', 'GBZ'])}{rng.randint(1, 60000)}-{rng.randint(1990, 2024)}"
+        index[base] = ("现行", "名称", "")
+        if rng.random() < 0.1:
+            index[f"{base}E"] = ("现行", "名称", "")
+        for n in range(1, rng.choice([1, 1, 1, 2, 3, 4])):
+            index[f"{base}/XG{n}-{rng.randint(2000, 2024)}"] = ("现行", "名称", "")
+    return index
+
+# 旧实现：每次调用都扫描整个 STD_INDEX
+def scan_related_warnings(code, std_index):
+    if not code.endswith("E"):
+        eng_code = f"{code}E"
+        if eng_code in std_index:
+            return f"(发现英文版 {eng_code})"
+    base, _, tail = code.partition("/XG")
+    if _ == "":
+        mods = sorted(k for k in std_index if k.startswith(f"{base}/XG"))
+        if mods:
+            return f"(存在 {len(mods)} 个修改单：{', '.join(mods)})"
+    else:
+        try:
+            cur_idx = int(tail.split("-")[0])
+        except Exception:
+            cur_idx = -1
+        higher = sorted(
+            k for k in std_index
+            if k.startswith(f"{base}/XG")
+            and int(k.split("/XG")[1].split("-")[0]) > cur_idx
+        )
+        if higher:
+            return f"(存在更新的序号修改单：{', '.join(higher)})"
+        else:
+            return "（已是最新修改单）"
+    return None
+
+def main(rows=20000, lookups=500):
+    std_index = make_std_index(rows)
+    codes = random.Random(1).sample(sorted(std_index), min(lookups, len(std_index)))
+
+    t0 = time.perf_counter()
+    checker.DATABASE.set_index(std_index)
+    build = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    new = [checker.related_warnings(c) for c in codes]
+    indexed = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    old = [scan_related_warnings(c, std_index) for c in codes]
+    scanned = time.perf_counter() - t0
+
+    assert new == old, "indexed related_warnings differs from the full scan"
+    print(f"index rows: {len(std_index)}, lookups: {len(codes)}")
+    print(f"build index:   {build * 1000:9.2f} ms")
+    print(f"indexed:       {indexed * 1e6 / len(codes):9.2f} us/lookup")
+    print(f"full scan:     {scanned * 1e6 / len(codes):9.2f} us/lookup")
+    print(f"speedup:       {scanned / indexed:9.1f}x")
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
@@ -0,0 +1,56 @@
+# bench_std_index.py
+"""
+Benchmark update_std_index: vectorised StdIndex vs the old iterrows dict of tuples.
+
+    python benchmarks/bench_std_index.py [rows]
+"""
+import os
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("SRC", "standards.xlsx")
+os.environ.setdefault("DEST", "standards.xlsx")
+
+import util
+from generators import make_has_output
+
+# 旧实现
+def iterrows_std_index(df_has_output):
+    df_std = (
+        df_has_output[["标准编号", "标准名称", "状态", "替代情况"]]
+        .astype(str)
+        .apply(lambda s: s.str.strip())
+    )
+    df_std["标准编号"] = df_std["标准编号"].str.replace(r"\s+", "", regex=True)
+    df_std["标准名称"] = df_std["标准名称"].apply(util.zh_punc_to_en)
+    return {row["标准编号"]: (row["状态"], row["标准名称"], row["替代情况"]) for _, row in df_std.iterrows()}
+
+def measure(build, df):
+    """Return (index, seconds, bytes retained by the index)"""
+    t0 = time.perf_counter()
+    build(df)
+    elapsed = time.perf_counter() - t0
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    index = build(df)
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return index, elapsed, retained
+
+def main(rows=100000):
+    df = make_has_output(rows)
+    new, new_t, new_mem = measure(util.update_std_index, df)
+    old, old_t, old_mem = measure(iterrows_std_index, df)
+
+    assert dict(new.items()) == old, "StdIndex differs from the iterrows index"
+    print(f"rows: {rows}")
+    print(f"vectorised StdIndex: {new_t:8.3f} s  {new_mem / 2**20:8.1f} MiB")
+    print(f"iterrows dict:       {old_t:8.3f} s  {old_mem / 2**20:8.1f} MiB")
+    print(f"speedup: {old_t / new_t:.1f}x, memory: {old_mem / max(new_mem, 1):.1f}x smaller")
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:2]))
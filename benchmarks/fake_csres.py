@@ -0,0 +1,265 @@
+# fake_csres.py
+"""
+Local stand-in for www.csres.com, for load-testing the crawler offline.
+
+Serves s.jsp search pages (table.heng rows with bgcolor="#FFFFFF"), detail pages
+with 发布日期/实施日期/作废日期/替代情况 cells and redirects to error/noright.html,
+with configurable latency, error rates and anti-crawl triggering. Results are
+deterministic per keyword. With catalog > 0 the site holds a fixed catalogue of
+standard families (parts .1-.n, /XG amendments, E editions) and a search returns
+every code containing the keyword, like the real site. Request counters are
+served as JSON at /__stats.
+
+    python benchmarks/fake_csres.py --port 8765 --latency 0.05 --anti-crawl-rate 0.01
+    CSRES_BASE_URL=http://127.0.0.1:8765/ python update_database_excel.py
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter, deque
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+STATUSES = ["现行", "现行", "现行", "即将实施", "作废", "废止", "被代替"]
+
+def _display_code(keyword):
+    # 网站返回的编号在前缀后带空格：GB/T5750-2006 -> GB/T 5750-2006
+    return re.sub(r"^([A-Z]+(?:/[A-Z0-9]+)?)\s*", r"\1 ", keyword, count=1)
+
+# 模拟站点的行为配置
+class FakeCsresConfig:
+    """Behaviour knobs; rates are probabilities per request (or per keyword for result counts)"""
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, drop_rate=0.0, anti_crawl_rate=0.0,
+                 max_rps=0.0, missing_rate=0.05, too_many_rate=0.01, date_empty_rate=0.0, catalog=0, seed=0):
+        self.latency = latency                  # 每个请求的基础延迟（秒）
+        self.jitter = jitter                    # 额外的随机延迟上限（秒）
+        self.error_rate = error_rate            # 返回 HTTP 500 的概率
+        self.drop_rate = drop_rate              # 不返回任何内容直接断开连接的概率
+        self.anti_crawl_rate = anti_crawl_rate  # 随机跳转到 error/noright.html 的概率
+        self.max_rps = max_rps                  # 最近一秒内请求数超过此值时跳转到 noright（<=0 表示不限制）
+        self.missing_rate = missing_rate        # 搜索无结果的关键字比例
+        self.too_many_rate = too_many_rate      # 搜索结果超过20个的关键字比例
+        self.date_empty_rate = date_empty_rate  # 详情页没有日期的比例
+        self.catalog = catalog                  # 标准目录中的标准族数（0 表示按关键字随机生成结果）
+        self.seed = seed
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body="", headers=()):
+        data = body.encode("gbk")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=GBK")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in headers:
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        server = self.server
+        parts = urlsplit(self.path)
+        if parts.path == "/__stats":
+            body = json.dumps(server.snapshot()).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        kind = {"/s.jsp": "search", "/error/noright.html": "noright"}.get(
+            parts.path, "detail" if parts.path.startswith("/detail/") else "other")
+        cfg = server.config
+        rng = random.Random()
+        server.count("requests", kind)
+        if cfg.latency or cfg.jitter:
+            time.sleep(cfg.latency + rng.random() * cfg.jitter)
+
+        if kind == "noright":
+            self._send(200, "<html><body>对不起，您没有访问权限</body></html>")
+            return
+        if rng.random() < cfg.drop_rate:
+            server.count("dropped")
+            self.close_connection = True
+            self.connection.shutdown(2)
+            return
+        if rng.random() < cfg.error_rate:
+            server.count("errors")
+            self._send(500, "<html><body>Internal Server Error</body></html>")
+            return
+        if rng.random() < cfg.anti_crawl_rate or server.over_limit():
+            server.count("anti_crawl")
+            self._send(302, headers=[("Location", "/error/noright.html")])
+            return
+
+        if kind == "search":
+            query = parse_qs(parts.query, encoding="gbk")
+            self._send(200, server.search_page(query.get("keyword", [""])[0]))
+        elif kind == "detail":
+            self._send(200, server.detail_page(unquote(parts.path[len("/detail/"):-len(".html")])))
+        else:
+            self._send(200, "<html><body>首页</body></html>")
+
+# 多线程的模拟站点
+class FakeCsresServer(ThreadingHTTPServer):
+    """ThreadingHTTPServer serving the fake csres pages"""
+    daemon_threads = True
+
+    def __init__(self, address=("127.0.0.1", 0), config=None):
+        super().__init__(address, _Handler)
+        self.config = config or FakeCsresConfig()
+        self.stats = Counter()
+        self._recent = deque()
+        self._lock = threading.Lock()
+        self.catalog = build_catalog(self.config.catalog, self.config.seed) if self.config.catalog else []
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def count(self, *keys):
+        with self._lock:
+            for key in keys:
+                self.stats[key] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.stats)
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats.clear()
+
+    def over_limit(self):
+        """True when more than max_rps requests arrived in the last second"""
+        if self.config.max_rps <= 0:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            self._recent.append(now)
+            while self._recent and now - self._recent[0] > 1.0:
+                self._recent.popleft()
+            return len(self._recent) > self.config.max_rps
+
+    def _catalog_rows(self, keyword):
+        keyword = keyword.replace(" ", "")
+        if not keyword:
+            return []
+        return [(code, status) for code, status in self.catalog if keyword in code.replace(" ", "")]
+
+    def search_page(self, keyword):
+        cfg = self.config
+        rng = random.Random(f"{cfg.seed}:{keyword}")
+        if self.catalog:
+            entries = self._catalog_rows(keyword)
+        else:
+            roll = rng.random()
+            if not keyword or roll < cfg.missing_rate:
+                count = 0
+            elif roll < cfg.missing_rate + cfg.too_many_rate:
+                count = 25
+            else:
+                count = rng.choice([1, 1, 1, 2])
+            entries = [(_display_code(keyword) + ("" if i == 0 else f"/XG{i}-2022"), None) for i in range(count)]
+        rows = []
+        for code, status in entries:
+            status = status or rng.choice(STATUSES)
+            rows.append(
+                f'<tr bgcolor="#FFFFFF"><td><a href="/detail/{quote(code)}.html">{escape(code)}</a></td>'
+                f"<td>模拟标准 {escape(code)}</td><td>{rng.randint(1990, 2024)}</td><td>{status}</td></tr>"
+            )
+        return (
+            '<html><body><table class="heng">'
+            '<tr bgcolor="#E0E0E0"><td>标准编号</td><td>标准名称</td><td>发布年</td><td>状态</td></tr>'
+            f"{''.join(rows)}</table></body></html>"
+        )
+
+    def detail_page(self, code):
+        cfg = self.config
+        rng = random.Random(f"{cfg.seed}:detail:{code}")
+        if rng.random() < cfg.date_empty_rate:
+            return f"<html><body><table><tr><td>标准编号：</td><td>{escape(code)}</td></tr></table></body></html>"
+        year = rng.randint(1990, 2020)
+        return (
+            "<html><body><table>"
+            f"<tr><td>标准编号：</td><td>{escape(code)}</td></tr>"
+            f"<tr><td>发布日期：</td><td>{year}-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}</td></tr>"
+            f"<tr><td>实施日期：</td><td>{year + 1}-0{rng.randint(1, 9)}-0{rng.randint(1, 9)}</td></tr>"
+            f"<tr><td>作废日期：</td><td>{year + 4}-01-01</td></tr>"
+            f'<tr><td><img src="/images/tdqk.gif">替代情况：</td><td>被{escape(code)}（新版）代替</td></tr>'
+            "</table></body></html>"
+        )
+
+# 模拟站点的标准目录：每个标准族有若干分部分、修改单和英文版
+def build_catalog(families, seed=0):
+    """Deterministic [(display code, status), ...] for `families` standard families"""
+    rng = random.Random(f"{seed}:catalog")
+    prefixes = ["GB", "GB/T", "GBZ", "HJ", "AQ/T", "YY"]
+    catalog, seen = [], set()
+    while len(seen) < families:
+        base = f"{rng.choice(prefixes)} {rng.randint(1, 60000)}"
+        if base in seen:
+            continue
+        seen.add(base)
+        year = rng.randint(1990, 2024)
+        parts = [""] + [f".{i}" for i in range(1, rng.choice([0, 0, 0, 2, 4, 8]) + 1)]
+        for part in parts:
+            code = f"{base}{part}-{year}"
+            catalog.append((code, rng.choice(STATUSES)))
+            if rng.random() < 0.15:
+                catalog.append((f"{code}E", rng.choice(STATUSES)))
+            for n in range(1, rng.choice([1, 1, 1, 2, 3])):
+                catalog.append((f"{code}/XG{n}-{rng.randint(year + 1, 2025)}", rng.choice(STATUSES)))
+    return catalog
+
+def start_in_thread(config=None, port=0):
+    """Start a FakeCsresServer on a background thread and return it"""
+    server = FakeCsresServer(("127.0.0.1", port), config)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def add_server_args(parser):
+    """Add the FakeCsresConfig options to an argparse parser"""
+    parser.add_argument("--latency", type=float, default=0.0, help="每个请求的基础延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="额外随机延迟上限（秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="返回 HTTP 500 的概率")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="直接断开连接的概率")
+    parser.add_argument("--anti-crawl-rate", type=float, default=0.0, help="随机跳转到 noright 的概率")
+    parser.add_argument("--max-rps", type=float, default=0.0, help="每秒请求数超过此值时跳转到 noright")
+    parser.add_argument("--missing-rate", type=float, default=0.05, help="搜索无结果的比例")
+    parser.add_argument("--too-many-rate", type=float, default=0.01, help="搜索结果过多的比例")
+    parser.add_argument("--date-empty-rate", type=float, default=0.0, help="详情页没有日期的比例")
+    parser.add_argument("--catalog", type=int, default=0, help="标准目录中的标准族数（0 表示按关键字随机生成结果）")
+    parser.add_argument("--seed", type=int, default=0)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="本地模拟 csres 站点")
+    parser.add_argument("--port", type=int, default=8765)
+    add_server_args(parser)
+    return parser.parse_args(argv)
+
+def config_from_args(args):
+    return FakeCsresConfig(
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, drop_rate=args.drop_rate,
+        anti_crawl_rate=args.anti_crawl_rate, max_rps=args.max_rps, missing_rate=args.missing_rate,
+        too_many_rate=args.too_many_rate, date_empty_rate=args.date_empty_rate, catalog=args.catalog, seed=args.seed,
+    )
+
+if __name__ == "__main__":
+    args = parse_args()
+    server = FakeCsresServer(("127.0.0.1", args.port), config_from_args(args))
+    print(f"模拟站点已启动：{server.base_url}（CSRES_BASE_URL={server.base_url}）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
@@ -0,0 +1,112 @@
+# generators.py
+"""
+Synthetic data for the benchmarks: .docx reports and four-sheet standards workbooks.
+
+Import after `util` can be imported (SRC/DEST set), e.g. from another benchmark.
+"""
+import random
+
+import pandas as pd
+from docx import Document
+from docx.enum.text import WD_BREAK
+from docx.oxml import OxmlElement
+
+import util
+
+PREFIXES = ["GB", "GB/T", "GBZ", "GBZ/T", "HJ", "AQ/T", "DB11/T", "YY", "JJG"]
+STATUSES = ["现行", "现行", "现行", "即将实施", "作废", "废止", "被代替"]
+NAMES = [
+    "生活饮用水标准检验方法", "建筑设计防火规范", "工作场所空气有毒物质测定 第1部分：总则",
+    "声环境质量标准", "工作场所（第{i}部分）：有害因素、测定方法",
+]
+
+def add_hyperlink(paragraph, text):
+    """Append a w:hyperlink run (python-docx has no public API for this)"""
+    link = OxmlElement("w:hyperlink")
+    r = OxmlElement("w:r")
+    t = OxmlElement("w:t")
+    t.text = text
+    r.append(t)
+    link.append(r)
+    paragraph._p.append(link)
+
+def make_report(path, sections, seed=0):
+    """
+    Write a synthetic report with `sections` repeated blocks: the three README
+    citation layouts, a code and name split over two paragraphs, soft line
+    breaks, hyperlinks, prose and a table with merged cells.
+    """
+    doc = Document()
+    for i in range(sections):
+        doc.add_paragraph(f"{i + 1}. 检测依据")
+        doc.add_paragraph(f"GB/T {5750 + i}-2006 《生活饮用水标准检验方法（第{i}部分）》")
+        doc.add_paragraph(f"《建筑设计防火规范》 GB {50016 + i}-2014")
+        doc.add_paragraph(f"(GB {12801 + i}-2008) 《生产过程安全卫生要求总则》")
+        # 编号和名称分两行（上一行 + 当前行）
+        doc.add_paragraph(f"HJ {i}-2017")
+        doc.add_paragraph(f"《环境空气 颗粒物的测定\t第{i}部分》")
+        # 软回车与超链接
+        p = doc.add_paragraph(f"AQ/T {1000 + i}-2020 ")
+        p.add_run("《安全评价通则》").add_break(WD_BREAK.LINE)
+        p.add_run(f"GBZ {i + 2}.1-2019 ")
+        add_hyperlink(p, "《工作场所有害因素职业接触限值》")
+        doc.add_paragraph("正文" * 200)
+
+        table = doc.add_table(rows=4, cols=4)
+        table.rows[0].cells[0].text = "序号"
+        table.rows[0].cells[1].text = "标准编号"
+        table.rows[0].cells[2].text = "标准名称"
+        for r in range(1, 4):
+            table.rows[r].cells[0].text = str(r)
+            table.rows[r].cells[1].text = f"GB {3000 + i * 3 + r}-2010"
+            table.rows[r].cells[2].text = f"《测定方法 第{r}部分》"
+        table.cell(1, 3).merge(table.cell(3, 3)).text = "纵向合并\nGB/T 1.1-2020《标准化工作导则》"
+        table.cell(0, 2).merge(table.cell(0, 3))
+    doc.save(path)
+
+def make_codes(rows, seed=0):
+    """`rows` distinct codes with spaces as on csres.com, including /XG amendments and E editions"""
+    rng = random.Random(seed)
+    codes = {}
+    while len(codes) < rows:
+        base = f"{rng.choice(PREFIXES)} {rng.randint(1, 60000)}-{rng.randint(1990, 2024)}"
+        codes[base] = None
+        if rng.random() < 0.1:
+            codes[f"{base}E"] = None
+        for n in range(1, rng.choice([1, 1, 1, 2, 3])):
+            codes[f"{base}/XG{n}-{rng.randint(2000, 2024)}"] = None
+    return list(codes)[:rows]
+
+def make_has_output(rows, seed=0):
+    """Synthetic 有搜索结果的标准 sheet"""
+    rng = random.Random(seed)
+    data = []
+    for i, code in enumerate(make_codes(rows, seed)):
+        status = rng.choice(STATUSES)
+        terminal = status in ("作废", "废止")
+        data.append((
+            code,
+            rng.choice(NAMES).format(i=i),
+            status, "2020-01-01", "2020-07-01",
+            "2024-01-01" if terminal else "",
+            f"被GB {i + 1}-2024代替" if terminal else "",
+            "10_01",
+        ))
+    return pd.DataFrame(data, columns=util.HAS_OUTPUT_COLUMNS)
+
+def make_workbook_frames(rows, seed=0):
+    """(df_has_output, df_no_output_or_too_much_outputs, df_date_empty, df_err) for a `rows`-row database"""
+    rng = random.Random(seed + 1)
+    df_has_output = make_has_output(rows, seed)
+    extra = [f"{rng.choice(PREFIXES)}{rng.randint(60001, 99999)}-{rng.randint(1990, 2024)}"
+             for _ in range(max(rows // 10, 1))]
+    df_no = pd.DataFrame([(c, "无搜索结果", "10_01") for c in extra], columns=util.NO_OUTPUT_COLUMNS)
+    df_date_empty = df_has_output.head(max(rows // 50, 1)).reindex(columns=util.DATE_EMPTY_COLUMNS, fill_value="")
+    # 与 ResultCollector.add_err 相同：请求头和响应头是 dict
+    df_err = pd.DataFrame([(c, "ReadTimeout", dict(util.HEADERS), {}, "10_01") for c in extra[: max(rows // 100, 1)]],
+                          columns=util.ERR_COLUMNS)
+    return df_has_output, df_no, df_date_empty, df_err
+
+def write_workbook(path, rows, seed=0):
+    """Write a four-sheet standards workbook with `rows` 有搜索结果 rows"""
+    util.save_excel_with_formatting(path, *make_workbook_frames(rows, seed))
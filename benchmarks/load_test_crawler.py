@@ -0,0 +1,124 @@
+# load_test_crawler.py
+"""
+Load-test crawl_codes against the local fake csres server and report requests/s and codes/s.
+
+    python benchmarks/load_test_crawler.py --codes 500 --workers 8 --rate 0 --latency 0.05
+    python benchmarks/load_test_crawler.py --codes 200 --error-rate 0.05 --anti-crawl-rate 0.02 --json out.json
+    python benchmarks/load_test_crawler.py --codes 300 --catalog 400 [--no-coalesce]
+    python benchmarks/load_test_crawler.py --codes 300 --known       # second run against the first run's database
+    python benchmarks/load_test_crawler.py --codes 300 --prom crawl.prom   # also write the crawler metrics
+
+Retries follow the production RetryPolicy (exponential backoff with jitter, a
+per-run retry budget and the anti-crawl circuit breaker), so error and
+anti-crawl rates show up directly in codes/s; the breaker cool-down and retry
+delays can be shortened for quick runs. With --catalog the codes are drawn from
+the fake site's catalogue, so related codes (parts, amendments, E editions) can
+share one search.
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fake_csres import add_server_args, config_from_args, start_in_thread
+
+def catalog_codes(catalog, n, seed=0):
+    """Sample n codes (without spaces) from the fake site's catalogue"""
+    rng = random.Random(seed)
+    codes = [code.replace(" ", "") for code, _ in catalog]
+    return rng.sample(codes, min(n, len(codes)))
+
+def make_codes(n, seed=0):
+    rng = random.Random(seed)
+    prefixes = ["GB", "GB/T", "GBZ", "HJ", "AQ/T", "YY"]
+    return list(dict.fromkeys(
+        f"{rng.choice(prefixes)}{rng.randint(1, 60000)}-{rng.randint(1990, 2024)}" for _ in range(n)
+    ))
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="对模拟站点压测爬虫")
+    parser.add_argument("--codes", type=int, default=200, help="爬取的标准代码数")
+    parser.add_argument("--workers", type=int, default=4, help="工作线程数（CRAWL_WORKERS）")
+    parser.add_argument("--rate", type=float, default=0.0, help="每秒请求数（CRAWL_RATE，<=0 不限速）")
+    parser.add_argument("--max-concurrent", type=int, default=4, help="同时进行的请求数（CRAWL_MAX_CONCURRENT）")
+    parser.add_argument("--retry-base-delay", type=float, help="第一次重试前的等待秒数（CRAWL_RETRY_BASE_DELAY）")
+    parser.add_argument("--breaker-cooldown", type=float, help="熔断后暂停的秒数（CRAWL_BREAKER_COOLDOWN）")
+    parser.add_argument("--no-coalesce", action="store_true", help="不合并同一基础编号的搜索（CRAWL_COALESCE=0）")
+    parser.add_argument("--known", action="store_true",
+                        help="先爬取一遍作为已有标准库，再测量第二遍（未变化的标准不再获取详情页）")
+    parser.add_argument("--json", help="把结果写入 JSON 文件")
+    parser.add_argument("--prom", help="把爬虫指标写入 Prometheus 文本文件")
+    parser.add_argument("--verbose", action="store_true", help="显示爬虫日志")
+    add_server_args(parser)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    server = start_in_thread(config_from_args(args))
+
+    # util 在导入时读取配置，必须先设置环境变量
+    os.environ["CSRES_BASE_URL"] = server.base_url
+    os.environ["HTTP_CACHE"] = ""
+    os.environ.setdefault("SRC", "standards.xlsx")
+    os.environ.setdefault("DEST", "standards.xlsx")
+    from crawler import CircuitBreaker, HostRateLimiter, RetryPolicy, crawl_codes, make_session
+    from util import ResultCollector, get_jar, known_records
+    import metrics
+
+    if not args.verbose:
+        logging.disable(logging.CRITICAL)
+    codes = catalog_codes(server.catalog, args.codes, args.seed) if server.catalog else make_codes(args.codes, args.seed)
+    breaker = CircuitBreaker() if args.breaker_cooldown is None else CircuitBreaker(cooldown=args.breaker_cooldown)
+    retry = RetryPolicy(breaker=breaker) if args.retry_base_delay is None else \
+        RetryPolicy(base_delay=args.retry_base_delay, breaker=breaker)
+    session = make_session(get_jar(), HostRateLimiter(args.rate, args.max_concurrent), retry)
+    known = None
+    if args.known:
+        warm = ResultCollector()
+        with contextlib.redirect_stdout(io.StringIO()):
+            crawl_codes(codes, session, warm, workers=args.workers, coalesce=not args.no_coalesce)
+        known = known_records(warm.to_frame("has_output"))
+        server.reset_stats()
+    results = ResultCollector()
+    metrics.METRICS.reset()
+
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        crawl_codes(codes, session, results, workers=args.workers, coalesce=not args.no_coalesce, known=known)
+    elapsed = time.perf_counter() - t0
+    session.close()
+    server.shutdown()
+    server.server_close()
+
+    stats = server.snapshot()
+    report = {
+        "codes": len(codes),
+        "seconds": round(elapsed, 3),
+        "codes_per_s": round(len(codes) / elapsed, 2),
+        "requests": stats.get("requests", 0),
+        "requests_per_s": round(stats.get("requests", 0) / elapsed, 2),
+        "server": stats,
+        "results": {name: results.count(name) for name in ResultCollector.TABLES},
+        "retry": retry.stats(),
+        "client": metrics.run_summary(elapsed),
+        "latency": {h["labels"]["kind"]: {k: h[k] for k in ("count", "mean", "p50", "p90", "p99", "max")}
+                    for h in metrics.REQUEST_SECONDS.summary()},
+        "settings": {"workers": args.workers, "rate": args.rate, "max_concurrent": args.max_concurrent,
+                     "catalog": args.catalog, "coalesce": not args.no_coalesce, "known": args.known},
+    }
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.prom:
+        metrics.METRICS.write_textfile(args.prom)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+
+if __name__ == "__main__":
+    main()
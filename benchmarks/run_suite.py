@@ -0,0 +1,173 @@
+# run_suite.py
+"""
+Offline benchmark suite for the hot paths, with JSON results that can be compared between commits.
+
+Stages: extract_from_docx, update_std_index, check_one (incl. related_warnings),
+save_excel_with_formatting and load_existing_data (cold, and from the workbook
+snapshot), each timed on synthetic
+reports and four-sheet workbooks. Every stage reports throughput (items/s)
+from a plain run and the tracemalloc peak from a second run.
+
+    python benchmarks/run_suite.py --out before.json
+    python benchmarks/run_suite.py --rows 1000 20000 200000 --sections 50 400 --out after.json
+    python benchmarks/run_suite.py --compare before.json after.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault("SRC", "standards.xlsx")
+os.environ.setdefault("DEST", "standards.xlsx")
+os.environ["STORE"] = ""
+
+import util
+import snapshot
+import check_standards_in_reports as checker
+from generators import make_report, make_workbook_frames
+
+STAGES = ["extract_from_docx", "update_std_index", "check_one", "save_excel_with_formatting",
+          "load_existing_data", "load_existing_data_snapshot"]
+
+def measure(fn, memory=True):
+    """Run fn() once for time and once under tracemalloc; returns (result, seconds, peak bytes)"""
+    t0 = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - t0
+    peak = None
+    if memory:
+        tracemalloc.start()
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result, elapsed, peak
+
+def record(stage, size, unit, items, elapsed, peak):
+    return {
+        "stage": stage, "size": size, "unit": unit, "items": items,
+        "seconds": round(elapsed, 6),
+        "items_per_s": round(items / elapsed, 2) if elapsed > 0 else None,
+        "peak_mib": round(peak / 2**20, 3) if peak is not None else None,
+    }
+
+def bench_reports(tmp, sections, memory):
+    for n in sections:
+        path = tmp / f"report_{n}.docx"
+        make_report(path, n)
+        hits, elapsed, peak = measure(lambda: util.extract_from_docx(path), memory)
+        yield record("extract_from_docx", n, "hits", len(hits), elapsed, peak)
+
+def bench_database(tmp, rows, memory, lookups):
+    for n in rows:
+        frames = make_workbook_frames(n)
+        path = tmp / f"standards_{n}.xlsx"
+
+        _, elapsed, peak = measure(lambda: util.save_excel_with_formatting(path, *frames), memory)
+        yield record("save_excel_with_formatting", n, "rows", sum(map(len, frames)), elapsed, peak)
+
+        # 冷启动：没有快照，需要解析 xlsx；之后的运行从快照读取
+        util.SRC_FILE = path
+        def cold_load():
+            snapshot._loaded.clear()
+            snapshot.snapshot_path(path).unlink(missing_ok=True)
+            return util.load_existing_data()
+        (code_ok, code_err, _), elapsed, peak = measure(cold_load, memory)
+        yield record("load_existing_data", n, "rows", len(code_ok) + len(code_err), elapsed, peak)
+
+        def snapshot_load():
+            snapshot._loaded.clear()
+            return util.load_existing_data()
+        (code_ok, code_err, _), elapsed, peak = measure(snapshot_load, memory)
+        yield record("load_existing_data_snapshot", n, "rows", len(code_ok) + len(code_err), elapsed, peak)
+
+        index, elapsed, peak = measure(lambda: util.update_std_index(frames[0]), memory)
+        yield record("update_std_index", n, "rows", len(index), elapsed, peak)
+
+        # 一半命中标准库，一半不存在
+        checker.DATABASE.set_index(index)
+        rng = random.Random(n)
+        known = rng.sample(list(index), min(lookups // 2, len(index)))
+        queries = [(code, index[code][1]) for code in known]
+        queries += [(f"GB{60000 + i}-2024", "不存在") for i in range(lookups - len(queries))]
+        _, elapsed, peak = measure(lambda: [checker.check_one(code, name) for code, name in queries], memory)
+        yield record("check_one", n, "lookups", len(queries), elapsed, peak)
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(args):
+    stages = set(args.stages)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        if "extract_from_docx" in stages:
+            results += bench_reports(tmp, args.sections, not args.no_memory)
+        if stages - {"extract_from_docx"}:
+            results += (r for r in bench_database(tmp, args.rows, not args.no_memory, args.lookups)
+                        if r["stage"] in stages)
+    for r in results:
+        peak = f"{r['peak_mib']:10.1f} MiB" if r["peak_mib"] is not None else ""
+        print(f"{r['stage']:<28}{r['size']:>8}  {r['items_per_s']:>14,.0f} {r['unit']}/s{peak}")
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "time": datetime.now().isoformat(timespec="seconds"),
+        },
+        "results": results,
+    }
+
+def compare(old_path, new_path):
+    """Print new vs old throughput and peak memory for every (stage, size) in both files"""
+    old = json.loads(Path(old_path).read_text(encoding="utf-8"))
+    new = json.loads(Path(new_path).read_text(encoding="utf-8"))
+    old_by_key = {(r["stage"], r["size"]): r for r in old["results"]}
+    print(f"{old['meta'].get('commit')} -> {new['meta'].get('commit')}")
+    print(f"{'stage':<28}{'size':>8}{'speed':>10}{'memory':>10}")
+    for r in new["results"]:
+        base = old_by_key.get((r["stage"], r["size"]))
+        if base is None:
+            continue
+        speed = r["items_per_s"] / base["items_per_s"] if base["items_per_s"] else float("nan")
+        memory = (r["peak_mib"] / base["peak_mib"]
+                  if r["peak_mib"] is not None and base["peak_mib"] else float("nan"))
+        print(f"{r['stage']:<28}{r['size']:>8}{speed:>9.2f}x{memory:>9.2f}x")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="离线基准测试")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 20000], help="标准库行数")
+    parser.add_argument("--sections", type=int, nargs="+", default=[50, 400], help="报告的章节数")
+    parser.add_argument("--lookups", type=int, default=20000, help="check_one 的查询次数")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("--no-memory", action="store_true", help="不测量内存峰值（tracemalloc 会拖慢运行）")
+    parser.add_argument("--out", help="把结果写入 JSON 文件")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="对比两次运行的 JSON 结果")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.compare:
+        compare(*args.compare)
+        return
+    results = run(args)
+    if args.out:
+        Path(args.out).write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"结果已写入 {args.out}")
+
+if __name__ == "__main__":
+    main()
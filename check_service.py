@@ -0,0 +1,253 @@
+# check_service.py
+# 常驻的检查服务：标准库只读取一次，按请求检查报告（接口说明见 README）
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+from util import setup_logging, extract_reports, get_env_int, get_env_float, EXTRACT_WORKERS
+from extract_cache import open_extract_cache
+from check_standards_in_reports import StandardsDatabase
+
+# 检查服务配置（可在 .env 中覆盖）
+CHECK_SERVICE_HOST = os.getenv("CHECK_SERVICE_HOST", "127.0.0.1")
+CHECK_SERVICE_PORT = get_env_int("CHECK_SERVICE_PORT", 8780)
+CHECK_SERVICE_RELOAD_SECONDS = get_env_float("CHECK_SERVICE_RELOAD_SECONDS", 2.0)  # 检查标准库是否变化的最短间隔
+CHECK_SERVICE_MAX_UPLOAD_MB = get_env_float("CHECK_SERVICE_MAX_UPLOAD_MB", 50.0)   # 上传报告的大小上限
+
+# 请求错误：返回给客户端的 HTTP 状态码和说明
+class ServiceError(Exception):
+    """An error reported to the client as {"error": message} with an HTTP status"""
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+# 常驻的检查服务：标准库只读取一次，变化后由下一个请求重新载入
+class CheckService:
+    """Holds the loaded StandardsDatabase, the extraction cache and the parsing processes"""
+    def __init__(self, workers=EXTRACT_WORKERS, reload_interval=CHECK_SERVICE_RELOAD_SECONDS):
+        self.workers = max(1, workers)
+        self.reload_interval = reload_interval
+        self.reloads = 0
+        self._db = None
+        self._signature = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.cache = open_extract_cache()
+        # 用 spawn 启动解析进程，避免在多线程的服务进程中 fork
+        self.pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn")) \
+            if self.workers > 1 else None
+
+    def _load(self):
+        signature = StandardsDatabase.source_signature()
+        db = StandardsDatabase().load()
+        old, self._db, self._signature = self._db, db, signature
+        self.reloads += old is not None
+        if old is not None and old.store is not None:
+            old.store.close()
+        logging.info(f"已载入标准库：{len(db.std_index)}条标准")
+
+    def database(self, force=False):
+        """
+        The current StandardsDatabase. When its source files have changed, the
+        calling request reloads it and waits; requests arriving meanwhile get the
+        old one.
+        """
+        now = time.monotonic()
+        if not force and self._db is not None and now - self._checked_at < self.reload_interval:
+            return self._db
+        # 由发现变化的请求重新载入；正在重新载入时，其他请求继续使用旧的标准库
+        if not self._lock.acquire(blocking=force or self._db is None):
+            return self._db
+        try:
+            if force or self._db is None or StandardsDatabase.source_signature() != self._signature:
+                if self._db is not None:
+                    logging.info("标准库已变化，重新载入")
+                self._load()
+            self._checked_at = time.monotonic()
+        finally:
+            self._lock.release()
+        return self._db
+
+    def check(self, paths, names=None):
+        """Extract and check `paths`; returns one JSON-ready report per path"""
+        db = self.database()
+        reports = extract_reports(paths, self.workers, self.cache, self.pool)
+        results = []
+        for path, name in zip(paths, names or [Path(p).name for p in paths]):
+            hits = []
+            summary = {}
+            for idx, (orig_code, code, std_name) in enumerate(reports[path], 1):
+                status, msg = db.check_one(code, std_name)
+                hit = {"index": idx, "code": orig_code, "name": std_name, "status": status,
+                       "ok": status == "ok", "message": msg}
+                if status == "name_wrong":
+                    try:
+                        hit["correct_name"] = db.correct_name(orig_code)
+                    except KeyError:
+                        pass
+                hits.append(hit)
+                summary[status] = summary.get(status, 0) + 1
+            results.append({"report": name, "path": str(path), "hits": hits, "summary": summary})
+        return results
+
+    def health(self):
+        db = self.database()
+        return {"status": "ok", "standards": len(db.std_index), "reloads": self.reloads}
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+        if self.cache is not None:
+            self.cache.close()
+        if self._db is not None and self._db.store is not None:
+            self._db.store.close()
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        logging.debug(f"{self.address_string()} {format % args}")
+
+    def _send_json(self, status, data):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self):
+        # 不读取请求内容时必须关闭连接，否则剩下的内容会被当作下一个请求解析
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.close_connection = True
+            raise ServiceError(400, "Content-Length 无效")
+        if length > CHECK_SERVICE_MAX_UPLOAD_MB * 2**20:
+            self.close_connection = True
+            raise ServiceError(413, f"上传内容超过 {CHECK_SERVICE_MAX_UPLOAD_MB:g} MB")
+        return self.rfile.read(length)
+
+    def _handle(self, handler):
+        t0 = time.perf_counter()
+        try:
+            status, data = handler()
+        except ServiceError as e:
+            status, data = e.status, {"error": str(e)}
+        except Exception as e:
+            logging.exception("处理请求时出错")
+            status, data = 500, {"error": str(e)}
+        data["elapsed_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+        self._send_json(status, data)
+
+    def do_GET(self):
+        if urlsplit(self.path).path == "/health":
+            self._handle(lambda: (200, self.server.service.health()))
+        else:
+            self._handle(lambda: (404, {"error": "未知的地址"}))
+
+    def do_POST(self):
+        route = urlsplit(self.path).path
+        if route == "/check":
+            self._handle(self._check)
+        elif route == "/reload":
+            self._handle(self._reload)
+        else:
+            self._handle(self._unknown_route)
+
+    def _unknown_route(self):
+        self._read_body()
+        return 404, {"error": "未知的地址"}
+
+    def _reload(self):
+        self._read_body()
+        self.server.service.database(force=True)
+        return 200, self.server.service.health()
+
+    def _check(self):
+        service = self.server.service
+        body = self._read_body()
+        if self.headers.get_content_type() == "application/json":
+            try:
+                request = json.loads(body or b"{}")
+            except ValueError:
+                raise ServiceError(400, "请求内容不是有效的 JSON")
+            paths = request.get("paths") or ([request["path"]] if request.get("path") else [])
+            if not paths:
+                raise ServiceError(400, "请提供 path 或 paths")
+            paths = [Path(p) for p in paths]
+            for path in paths:
+                if path.suffix.lower() != ".docx":
+                    raise ServiceError(400, f"只支持 .docx 文件：{path}")
+                if not path.is_file():
+                    raise ServiceError(404, f"找不到文件：{path}")
+            return 200, {"reports": service.check(paths)}
+
+        # 上传的报告先写入临时文件再解析
+        if not body:
+            raise ServiceError(400, "请求内容为空")
+        name = parse_qs(urlsplit(self.path).query).get("name", ["upload.docx"])[0]
+        fd, tmp = tempfile.mkstemp(suffix=".docx")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(body)
+            return 200, {"reports": service.check([Path(tmp)], [name])}
+        finally:
+            os.unlink(tmp)
+
+# 多线程的 HTTP 服务，可以同时检查多个报告
+class CheckServer(ThreadingHTTPServer):
+    """ThreadingHTTPServer exposing a CheckService as a JSON API"""
+    daemon_threads = True
+
+    def __init__(self, address, service):
+        super().__init__(address, _Handler)
+        self.service = service
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/"
+
+# 命令行参数
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="常驻的报告标准检查服务")
+    parser.add_argument("--host", default=CHECK_SERVICE_HOST, help=f"监听地址（默认 {CHECK_SERVICE_HOST}）")
+    parser.add_argument("--port", type=int, default=CHECK_SERVICE_PORT, help=f"监听端口（默认 {CHECK_SERVICE_PORT}）")
+    parser.add_argument("--jobs", type=int, default=EXTRACT_WORKERS,
+                        help=f"并行解析报告的进程数（默认 {EXTRACT_WORKERS}）")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    setup_logging("check_service_log.txt")
+    service = CheckService(args.jobs)
+    service.database()
+    server = CheckServer((args.host, args.port), service)
+    logging.info(f"检查服务已启动：{server.base_url}")
+    print(f"检查服务已启动：{server.base_url}（Ctrl-C 停止）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+    print("检查服务已停止")
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    main()
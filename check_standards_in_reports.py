@@ -1,197 +1,381 @@
 #更新报告中的标准.py
 import logging
-import pandas as pd
+import os
+import shutil
+import argparse
+import multiprocessing
 from pathlib import Path
-import requests
-import time
 
 from util import (
     setup_logging, MONTH_DAY, load_existing_data,
-    SRC_FILE, update_std_index, extract_from_docx, get_jar, BASE_URL, HEADERS,
-    process_code, remove_duplicates, get_path_for_report_folder,
-    normalize_name, save_excel_with_formatting, get_path_for_log_file,
-    DEST_FILE, generate_new_standards_report_in_exist_folder
+    get_src_file, update_std_index, build_related_index, extract_reports, get_jar, BASE_URL, HEADERS,
+    remove_duplicates, get_path_for_report_folder,
+    normalize_name, known_records, save_excel_with_formatting, get_path_for_log_file, ResultCollector,
+    get_dest_file, generate_new_standards_report_in_exist_folder, EXTRACT_WORKERS, BASE_DIR
 
 )
+from extract_cache import open_extract_cache
+from store import open_store, STORE as STORE_FILE
+from snapshot import load_sheets
+from profiler import PROFILER
 
 CURRENT = {"现行", "即将实施"}
 
-sheet_map = [
-    "有搜索结果的标准",
-    "无搜索结果或搜索结果过多的标准",
-    "标准无详细日期(debug用)",
-    "报错(debug用)",
-]
+# 标准库及其索引：第一次检查时才读取（导入本模块、解析报告的子进程都不会读取标准库）
+class StandardsDatabase:
+    """The standards tables plus the lookup indexes built from them, loaded on first use"""
+    def __init__(self):
+        self.store = None
+        self.frames = None
+        self.std_index = None
+        self.amendments, self.has_english = {}, set()
+        self._names = None
 
-dfs = pd.read_excel(SRC_FILE, sheet_name=sheet_map)
-df_has_output                    = dfs["有搜索结果的标准"]
-df_no_output_or_too_much_outputs = dfs["无搜索结果或搜索结果过多的标准"]
-df_date_empty                    = dfs["标准无详细日期(debug用)"]
-df_err                           = dfs["报错(debug用)"]
+    def load(self):
+        """Read the database (SQLite store if configured, else SRC) and build the indexes"""
+        self.store = open_store()
+        if self.store is not None:
+            frames = self.store.load_frames()
+        else:
+            dfs = load_sheets(get_src_file())
+            frames = (dfs["有搜索结果的标准"], dfs["无搜索结果或搜索结果过多的标准"],
+                      dfs["标准无详细日期(debug用)"], dfs["报错(debug用)"])
+        self.set_frames(frames)
+        return self
 
-STD_INDEX = update_std_index(df_has_output)
+    def set_frames(self, frames):
+        """Use (has_output, no_output, date_empty, err) and rebuild the indexes"""
+        self.frames = tuple(frames)
+        self._names = None
+        self.set_index(update_std_index(self.frames[0]))
 
-def related_warnings(code: str) -> str | None:
-    """
-    针对  /XG… 修改单 以及 “E” 英文版 的补充提醒  
-    - 返回 None 表示没有额外提醒；否则返回一段告警文字
-    """
-    # 1️⃣  英文版 (…E)
-    if not code.endswith("E"):
-        eng_code = f"{code}E"
-        if eng_code in STD_INDEX:                 # 英文版存在
-            return f"(发现英文版 {eng_code})"
-
-    # 2️⃣  修改单  (/XGn-yyyy)
-    base, _, tail = code.partition("/XG")
-    if _ == "":                                   # 传入的不是“修改单”本身
-        # 查找所有同基准的 /XG
-        mods = sorted(k for k in STD_INDEX if k.startswith(f"{base}/XG"))
-        if mods:
-            return f"(存在 {len(mods)} 个修改单：{', '.join(mods)})"
-    else:                                         # 传入的是某个修改单
-        try:
-            cur_idx = int(tail.split("-")[0])     # /XG1-2022 → 1
-        except Exception:
-            cur_idx = -1
-        higher = sorted(
-            k for k in STD_INDEX
-            if k.startswith(f"{base}/XG")
-            and int(k.split("/XG")[1].split("-")[0]) > cur_idx
-        )
-        if higher:
-            return f"(存在更新的序号修改单：{', '.join(higher)})"
+    def set_index(self, std_index):
+        """Use an already built StdIndex (benchmarks, callers that hold their own frames)"""
+        self.std_index = std_index
+        self.amendments, self.has_english = build_related_index(std_index)
+
+    @staticmethod
+    def source_signature():
+        """(mtime, size) of the files the database is read from; changes whenever the store or SRC is written"""
+        if STORE_FILE:
+            store = BASE_DIR / STORE_FILE
+            paths = [store, store.with_name(store.name + "-wal")]
         else:
-            return "（已是最新修改单）"
+            paths = [get_src_file()]
+        signature = []
+        for path in paths:
+            try:
+                st = os.stat(path)
+                signature.append((st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
 
-    return None
+    def correct_name(self, orig_code):
+        """标准名称 of the first “有搜索结果的标准” row whose 标准编号 is exactly `orig_code`"""
+        if self._names is None:
+            df = self.frames[0]
+            self._names = dict(zip(reversed(df["标准编号"].tolist()), reversed(df["标准名称"].tolist())))
+        return self._names[orig_code]
+
+    @property
+    def index(self):
+        if self.std_index is None:
+            self.load()
+        return self.std_index
+
+    def related_warnings(self, code: str) -> str | None:
+        """
+        针对  /XG… 修改单 以及 “E” 英文版 的补充提醒  
+        - 返回 None 表示没有额外提醒；否则返回一段告警文字
+        """
+        if self.std_index is None:
+            self.load()
+
+        # 1️⃣  英文版 (…E)
+        if not code.endswith("E"):
+            if code in self.has_english:              # 英文版存在
+                return f"(发现英文版 {code}E)"
+
+        # 2️⃣  修改单  (/XGn-yyyy)
+        base, _, tail = code.partition("/XG")
+        mods = self.amendments.get(base, ())
+        if _ == "":                                   # 传入的不是“修改单”本身
+            if mods:
+                return f"(存在 {len(mods)} 个修改单：{', '.join(k for n, k in mods)})"
+        else:                                         # 传入的是某个修改单
+            try:
+                cur_idx = int(tail.split("-")[0])     # /XG1-2022 → 1
+            except Exception:
+                cur_idx = -1
+            higher = [k for n, k in mods if n is not None and n > cur_idx]
+            if higher:
+                return f"(存在更新的序号修改单：{', '.join(higher)})"
+            else:
+                return "（已是最新修改单）"
+
+        return None
+
+    def check_one(self, code: str, name: str):
+        """返回 (ok?, message)"""
+        warn = self.related_warnings(code)
+        if code not in self.std_index:
+            return "no_exist", "标准库未收录（标准编号有误或不存在）"
+
+        # Get status, std_name, and replacement info from the index
+        status, std_name, replacement_info = self.std_index[code]
+
+        if status not in CURRENT:
+            # Add replacement info to status_wrong message if available
+            status_msg = f"状态异常（{status}）"
+            if replacement_info and replacement_info.strip():
+                status_msg += f" | 替代情况：{replacement_info}"
+            return "status_wrong", status_msg
+
+        if warn:
+            if normalize_name(name) != normalize_name(std_name):
+                return "name_wrong", f"{warn} | 名称不符 "
+            return "ok", f"OK；{warn}"
 
-def check_one(code: str, name: str):
-    """返回 (ok?, message)"""
-    warn = related_warnings(code)
-    if code not in STD_INDEX:
-        return "no_exist", "标准库未收录（标准编号有误或不存在）"
-    
-    # Get status, std_name, and replacement info from STD_INDEX
-    status, std_name, replacement_info = STD_INDEX[code]
-    
-    if status not in CURRENT:
-        # Add replacement info to status_wrong message if available
-        status_msg = f"状态异常（{status}）"
-        if replacement_info and replacement_info.strip():
-            status_msg += f" | 替代情况：{replacement_info}"
-        return "status_wrong", status_msg
-    
-    if warn:
         if normalize_name(name) != normalize_name(std_name):
-            return "name_wrong", f"{warn} | 名称不符 "
-        return "ok", f"OK；{warn}"
-    
-    if normalize_name(name) != normalize_name(std_name):
-            return "name_wrong", "名称不符"
-    return "ok", "OK"
-
-def main():
-    global STD_INDEX, df_has_output, df_no_output_or_too_much_outputs, df_date_empty, df_err
-    setup_logging("check_report_log.txt")
-    logging.debug("--" * 30)
-    logging.info(f"更新数据库.py - 程序开始运行 - {MONTH_DAY}")
-    logging.debug("--" * 30)
+                return "name_wrong", "名称不符"
+        return "ok", "OK"
 
-    code_ok, code_err, known_codes = load_existing_data()
-    codes = []
-    code_to_process = []
-    for docx in sorted(Path("reports").glob("*.docx")):
-        hits = extract_from_docx(docx)
-        if not hits:
-            continue
+DATABASE = StandardsDatabase()
 
-        for _, (_, code, _) in enumerate(hits, 1):
-            if code not in codes:
-                codes.append(code)
-                if code not in STD_INDEX:
-                    code_to_process.append(code)
+def related_warnings(code: str) -> str | None:
+    """Module-level shortcut for DATABASE.related_warnings"""
+    return DATABASE.related_warnings(code)
 
-    logging.debug(f"待处理标准代码长度：{len(code_to_process)}")
+def check_one(code: str, name: str):
+    """Module-level shortcut for DATABASE.check_one"""
+    return DATABASE.check_one(code, name)
+
+# 命令行参数
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="检查报告中的标准")
+    parser.add_argument("--jobs", type=int, default=EXTRACT_WORKERS,
+                        help=f"并行解析报告的进程数（默认 {EXTRACT_WORKERS}）")
+    parser.add_argument("--watch", action="store_true",
+                        help="检查完成后继续监视 reports 文件夹，只重新检查新增或修改的报告")
+    parser.add_argument("--profile", action="store_true",
+                        help="记录各阶段和每个报告的耗时，运行结束时打印")
+    parser.add_argument("--profile-dump", metavar="FILE",
+                        help="同时用 cProfile 记录主线程并保存到 FILE（隐含 --profile）")
+    return parser.parse_args(argv)
+
+# 登录 csres.com 的会话；网站无法访问时返回 None
+def open_session():
+    import requests
+    from crawler import make_session
+    from http_cache import CACHE_ONLY
 
     jar = get_jar()
 
-    session = requests.Session()
-    session.cookies.update(jar)
+    session = make_session(jar)
     logging.info("已更新cookie jar")
 
-    try:
-        session.get(BASE_URL, headers=HEADERS, timeout=(5, 15))
-        logging.info("成功访问基础URL")
-    except requests.ReadTimeout:
-        logging.error("请求超时, 程序结束，请检查网络连接或目标网站状态")
-        print("请求超时, 程序结束，请检查网络连接或目标网站状态")
-        return
+    if CACHE_ONLY:
+        logging.info("仅缓存模式，跳过访问基础URL")
+    else:
+        try:
+            session.get(BASE_URL, headers=HEADERS, timeout=(5, 15))
+            logging.info("成功访问基础URL")
+        except requests.ReadTimeout:
+            logging.error("请求超时, 程序结束，请检查网络连接或目标网站状态")
+            print("请求超时, 程序结束，请检查网络连接或目标网站状态")
+            session.close()
+            return None
+    return session
 
-    for i, code in enumerate(code_to_process, 1):
-        logging.info(f"更新“有搜索结果的标准”表[{i}/{len(code_to_process)}]")
-        print(f"正在尝试更新标准 {i}/{len(code_to_process)}: {code}")
-        process_code(code, session, df_has_output, df_no_output_or_too_much_outputs, df_date_empty, df_err, False)
-        time.sleep(1.0)
-    
-
-    session.close()
-    df_has_output, df_no_output_or_too_much_outputs, df_date_empty, df_err = remove_duplicates(
-        df_has_output, df_no_output_or_too_much_outputs, df_date_empty, df_err
-    )
-
-    save_excel_with_formatting(DEST_FILE, df_has_output, df_no_output_or_too_much_outputs, df_date_empty, df_err)
-    logging.info(f"⚙️  已经保存标准库至{DEST_FILE}")
-    excel_log_path = get_path_for_log_file("log_excel", "standard_details.xlsx")
-    save_excel_with_formatting(excel_log_path, df_has_output, df_no_output_or_too_much_outputs, df_date_empty, df_err)
-    logging.info(f"⚙️  额外保存日志文件: {excel_log_path}")
-    print("标准库更新完成")
-    print("已保存标准库，并保存了日志标准库")
-    print("开始检查报告")
+# 爬取标准库中没有的标准代码，保存标准库并更新 db
+def crawl_and_save(db, code_to_process, session):
+    """Crawl `code_to_process`, save DEST (and the store) and reload `db` from the result"""
+    from crawler import crawl_codes
+    from metrics import export_metrics
 
-    STD_INDEX = update_std_index(df_has_output)
+    # 使用 SQLite 标准库时只写入本次新爬取的结果，避免覆盖其他程序同时写入的记录
+    results = ResultCollector(None if db.store is not None else db.frames)
+    with PROFILER.span("crawl"), export_metrics("check_report"):
+        crawl_codes(code_to_process, session, results, False, "正在尝试更新标准", known=known_records(db.frames[0]))
 
-    out_txt = get_path_for_report_folder("检查报告中的标准.py的运行结果", "标准检查报告.txt")
+    with PROFILER.span("save_database"):
+        df_has_output, df_no_output_or_too_much_outputs, df_date_empty, df_err = remove_duplicates(results)
+        if db.store is not None:
+            db.store.upsert(df_has_output, df_no_output_or_too_much_outputs, df_date_empty, df_err)
+            df_has_output, df_no_output_or_too_much_outputs, df_date_empty, df_err = db.store.load_frames()
+
+        dest_file = get_dest_file()
+        save_excel_with_formatting(dest_file, df_has_output, df_no_output_or_too_much_outputs, df_date_empty, df_err)
+        logging.info(f"⚙️  已经保存标准库至{dest_file}")
+        excel_log_path = get_path_for_log_file("log_excel", "standard_details.xlsx")
+        shutil.copyfile(dest_file, excel_log_path)
+        logging.info(f"⚙️  额外保存日志文件: {excel_log_path}")
+
+        db.set_frames((df_has_output, df_no_output_or_too_much_outputs, df_date_empty, df_err))
+
+# 报告中尚未收录的标准代码（按首次出现的顺序，不重复）
+def missing_codes(db, reports):
+    codes = dict.fromkeys(code for hits in reports.values() for _, code, _ in hits)
+    return [code for code in codes if code not in db.std_index]
+
+# 一个报告在“标准检查报告.txt”中的内容
+def report_section(db, docx, hits):
+    """The lines written to 标准检查报告.txt for one report"""
+    # 不开启 --profile 时 wrap 原样返回，逐条检查没有额外开销
+    check_one = PROFILER.wrap("check_one", db.check_one)
+    correct_name = PROFILER.wrap("correct_name", db.correct_name)
+    with PROFILER.span("check", doc=docx.name):
+        logging.info("-" * 50)
+        print(f"正在检查报告：{docx.name}")
+        lines = ["-" * 50]
+
+        header = f"\n📄 {docx.name} —— 共发现 {len(hits)} 条标准引用"
+        logging.info(header)
+        lines.append(header)
+
+        for idx, (orig_code, code, name) in enumerate(hits, 1):
+            status, msg = check_one(code, name)
+            flag = "✅" if status == "ok" else "❌"
+            if status == "no_exist":
+                line = f"{idx:>2}. {flag} {orig_code:<25} | {msg:<10} \n"
+            elif status == "status_wrong":
+                line = f"{idx:>2}. {flag} {orig_code:<25} | {msg:<10} \n"
+            elif status == "name_wrong":
+                try:
+                    line = f"{idx:>2}. {flag} {orig_code:<25} | {msg:<10} \t (正确名称应为：{correct_name(orig_code)}) \n"
+                except:
+                    line = f"{idx:>2}. {flag} {orig_code:<25} | (本条标准问题需手动排查）\n"
+            else:
+                line = f"{idx:>2}. {flag} {orig_code:<25} | {msg:<10} \n"
+            logging.debug(line)
+            lines.append(line)
+    return lines
+
+# 按报告文件名顺序写出“标准检查报告.txt”
+def write_check_report(out_txt, sections):
     with out_txt.open("w", encoding="utf-8") as log_f:
-        for docx in sorted(Path("reports").glob("*.docx")):
-            logging.info("-" * 50)
-            print(f"正在检查报告：{docx.name}")
-            print("-" * 50, file=log_f)
-
-            hits = extract_from_docx(docx)
-            header = f"\n📄 {docx.name} —— 共发现 {len(hits)} 条标准引用"
-            logging.info(header)
-            print(header, file=log_f)
-
-            if not hits:
-                continue
-
-            for idx, (orig_code, code, name) in enumerate(hits, 1):
-                status, msg = check_one(code, name)
-                flag = "✅" if status == "ok" else "❌"
-                if status == "no_exist":
-                    line = f"{idx:>2}. {flag} {orig_code:<25} | {msg:<10} \n"
-                elif status == "status_wrong":
-                    line = f"{idx:>2}. {flag} {orig_code:<25} | {msg:<10} \n"
-                elif status == "name_wrong":
-                    try:
-                        correct_name = df_has_output.loc[df_has_output["标准编号"] == orig_code, "标准名称"].iat[0]
-                        line = f"{idx:>2}. {flag} {orig_code:<25} | {msg:<10} \t (正确名称应为：{correct_name}) \n"
-                    except:
-                        line = f"{idx:>2}. {flag} {orig_code:<25} | (本条标准问题需手动排查）\n"
-                else:
-                    line = f"{idx:>2}. {flag} {orig_code:<25} | {msg:<10} \n"
-                logging.debug(line)
+        for docx in sorted(sections):
+            for line in sections[docx]:
                 print(line, file=log_f)
 
         logging.info("-" * 50)
         print("-" * 50, file=log_f)
 
-    generate_new_standards_report_in_exist_folder(out_txt.parent, df_has_output, known_codes)
+# 监视 reports 文件夹：只重新解析、检查新增或修改的报告，并更新它在检查报告中的内容
+def watch_reports(db, reports, sections, out_txt, known_codes, jobs):
+    from watcher import ReportWatcher
+
+    watcher = ReportWatcher(Path("reports"))
+    extract_cache = open_extract_cache()
+    logging.info(f"开始监视 reports 文件夹（{watcher.backend}）")
+    print("正在监视 reports 文件夹，新增或修改的报告会自动重新检查（Ctrl-C 退出）")
+    try:
+        for changed, removed in watcher:
+            for docx in removed:
+                reports.pop(docx, None)
+                sections.pop(docx, None)
+                logging.info(f"报告已删除：{docx.name}")
+                print(f"报告已删除：{docx.name}")
+
+            parsed = {}
+            for docx in changed:
+                try:
+                    parsed.update(extract_reports([docx], jobs, extract_cache))
+                except Exception as e:
+                    # 文件可能还没有写完或不是有效的 docx，下次保存时会再次检查
+                    logging.warning(f"无法读取报告 {docx.name}：{e}")
+                    print(f"无法读取报告 {docx.name}：{e}")
+            reports.update(parsed)
+
+            # 新出现的标准先爬取；标准库变化后所有报告都要重新检查（报告无需重新解析）
+            code_to_process = missing_codes(db, parsed)
+            to_check = parsed
+            if code_to_process:
+                session = open_session()
+                if session is not None:
+                    try:
+                        crawl_and_save(db, code_to_process, session)
+                    finally:
+                        session.close()
+                    generate_new_standards_report_in_exist_folder(out_txt.parent, db.frames[0], known_codes)
+                    to_check = reports
+
+            for docx, hits in to_check.items():
+                sections[docx] = report_section(db, docx, hits)
+            if parsed or removed:
+                write_check_report(out_txt, sections)
+                logging.info(f"已更新 {out_txt}")
+                print(f"已更新 {out_txt}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+        if extract_cache is not None:
+            extract_cache.close()
+    print("已停止监视")
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.profile or args.profile_dump:
+        PROFILER.enable(args.profile_dump)
+    try:
+        run(args)
+    finally:
+        PROFILER.finish()
+
+def run(args):
+    setup_logging("check_report_log.txt")
+    logging.debug("--" * 30)
+    logging.info(f"更新数据库.py - 程序开始运行 - {MONTH_DAY}")
+    logging.debug("--" * 30)
+
+    with PROFILER.span("load_database"):
+        db = DATABASE.load()
+        code_ok, code_err, known_codes = load_existing_data(db.store)
+    if PROFILER.enabled:
+        # check_one 通过 self.related_warnings 调用，替换为计时版本后单独统计
+        db.related_warnings = PROFILER.wrap("related_warnings", db.related_warnings)
+
+    # 每个报告只解析一次，结果同时用于收集待爬取的标准和检查报告
+    extract_cache = open_extract_cache()
+    try:
+        with PROFILER.span("extract_reports"):
+            reports = extract_reports(sorted(Path("reports").glob("*.docx")), args.jobs, extract_cache)
+    finally:
+        if extract_cache is not None:
+            extract_cache.close()
+
+    code_to_process = missing_codes(db, reports)
+    logging.debug(f"待处理标准代码长度：{len(code_to_process)}")
+
+    with PROFILER.span("login"):
+        session = open_session()
+    if session is None:
+        return
+    try:
+        crawl_and_save(db, code_to_process, session)
+    finally:
+        session.close()
+    print("标准库更新完成")
+    print("已保存标准库，并保存了日志标准库")
+    print("开始检查报告")
+
+    out_txt = get_path_for_report_folder("检查报告中的标准.py的运行结果", "标准检查报告.txt")
+    with PROFILER.span("check_reports"):
+        sections = {docx: report_section(db, docx, hits) for docx, hits in reports.items()}
+    with PROFILER.span("write_report"):
+        write_check_report(out_txt, sections)
+        generate_new_standards_report_in_exist_folder(out_txt.parent, db.frames[0], known_codes)
     logging.info(f"结果已同时写入 {out_txt}")
+
+    if args.watch:
+        watch_reports(db, reports, sections, out_txt, known_codes, args.jobs)
+
     logging.info("程序运行完成")
     print("程序运行完成")
     logging.info("--" * 30)
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     main()
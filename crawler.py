@@ -0,0 +1,399 @@
+# crawler.py
+import logging
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import requests
+
+from util import (
+    get_env_int, get_env_float, process_code, record_hits, search_rows, fetch_details,
+    ResultCollector, CrawlError, AntiCrawlError, ANTI_CRAWL_URL,
+)
+from http_cache import open_cache
+from planner import CRAWL_COALESCE, plan_searches, match_rows
+import metrics
+
+# 并发爬取配置（可在 .env 中覆盖）
+CRAWL_WORKERS = get_env_int("CRAWL_WORKERS", 4)                  # 工作线程数
+CRAWL_RATE = get_env_float("CRAWL_RATE", 2.0)                    # 每秒请求数（<=0 表示不限速）
+CRAWL_MAX_CONCURRENT = get_env_int("CRAWL_MAX_CONCURRENT", 4)    # 同一主机同时进行的最大请求数
+CRAWL_REUSE_DETAILS = get_env_int("CRAWL_REUSE_DETAILS", 1) != 0  # 名称和状态未变化的标准沿用已有的详情页字段
+
+# 重试与熔断配置（可在 .env 中覆盖）
+CRAWL_RETRY_PAGE_ATTEMPTS = get_env_int("CRAWL_RETRY_PAGE_ATTEMPTS", 5)    # 每个页面最多请求次数
+CRAWL_RETRY_CODE_ATTEMPTS = get_env_int("CRAWL_RETRY_CODE_ATTEMPTS", 3)    # 每个标准代码每一轮最多尝试次数
+CRAWL_RETRY_BASE_DELAY = get_env_float("CRAWL_RETRY_BASE_DELAY", 0.5)      # 第一次重试前的等待秒数，之后每次翻倍
+CRAWL_RETRY_MAX_DELAY = get_env_float("CRAWL_RETRY_MAX_DELAY", 30.0)       # 单次重试等待的上限
+CRAWL_RETRY_BUDGET_RATIO = get_env_float("CRAWL_RETRY_BUDGET_RATIO", 0.2)  # 重试次数不超过请求数的比例
+CRAWL_RETRY_BUDGET_MIN = get_env_int("CRAWL_RETRY_BUDGET_MIN", 20)         # 此外额外允许的重试次数
+CRAWL_BREAKER_THRESHOLD = get_env_float("CRAWL_BREAKER_THRESHOLD", 0.5)    # 最近请求中被反爬的比例达到该值时熔断
+CRAWL_BREAKER_WINDOW = get_env_int("CRAWL_BREAKER_WINDOW", 20)             # 统计反爬比例的最近请求数
+CRAWL_BREAKER_COOLDOWN = get_env_float("CRAWL_BREAKER_COOLDOWN", 60.0)     # 熔断后暂停爬取的秒数，连续熔断时翻倍
+
+# 令牌桶限速器
+class TokenBucket:
+    """Token bucket allowing `rate` acquisitions per second with bursts up to `capacity`"""
+    def __init__(self, rate, capacity=1.0):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available"""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+# 按主机共享的限速器：令牌桶限制请求速率，信号量限制并发请求数
+class HostRateLimiter:
+    """Per-host request rate and concurrency limits shared by all workers"""
+    def __init__(self, rate=CRAWL_RATE, max_concurrent=CRAWL_MAX_CONCURRENT):
+        self.rate = rate
+        self.max_concurrent = max(1, max_concurrent)
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _for_host(self, host):
+        with self._lock:
+            if host not in self._hosts:
+                self._hosts[host] = (TokenBucket(self.rate), threading.BoundedSemaphore(self.max_concurrent))
+            return self._hosts[host]
+
+    @contextmanager
+    def slot(self, url):
+        """Hold one request slot for the host of `url`"""
+        bucket, sem = self._for_host(urlsplit(url).netloc)
+        with sem:
+            bucket.acquire()
+            yield
+
+# 反爬熔断器：最近的请求中被重定向到反爬页面的比例过高时，暂停所有爬取
+class CircuitBreaker:
+    """
+    Opens when at least `threshold` of the last `window` responses were anti-crawl
+    redirects; while open, wait() blocks every worker for the cool-down. The
+    cool-down doubles each time the breaker trips again, up to `max_cooldown`,
+    and resets once a full window of responses is back under the threshold.
+    """
+    def __init__(self, threshold=CRAWL_BREAKER_THRESHOLD, window=CRAWL_BREAKER_WINDOW,
+                 cooldown=CRAWL_BREAKER_COOLDOWN, max_cooldown=None):
+        self.threshold = threshold
+        self.window = max(1, window)
+        self.cooldown = cooldown
+        self.max_cooldown = cooldown * 10 if max_cooldown is None else max_cooldown
+        self.trips = 0
+        self._next_cooldown = cooldown
+        self._events = deque(maxlen=self.window)
+        self._open_until = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, blocked):
+        """Record one response; `blocked` is True for an anti-crawl redirect"""
+        if self.threshold <= 0:
+            return
+        with self._lock:
+            self._events.append(bool(blocked))
+            if len(self._events) < max(1, self.window // 2):
+                return
+            rate = sum(self._events) / len(self._events)
+            now = time.monotonic()
+            if rate >= self.threshold and now >= self._open_until:
+                cooldown = self._next_cooldown
+                self._open_until = now + cooldown
+                self._next_cooldown = min(cooldown * 2, self.max_cooldown)
+                self._events.clear()
+                self.trips += 1
+                metrics.BREAKER_TRIPS.inc()
+                logging.warning(f"最近请求中 {rate:.0%} 被网站拒绝，暂停爬取 {cooldown:.0f} 秒")
+                print(f"最近请求中 {rate:.0%} 被网站拒绝，暂停爬取 {cooldown:.0f} 秒")
+            elif len(self._events) == self.window and rate < self.threshold:
+                self._next_cooldown = self.cooldown
+
+    def wait(self):
+        """Block while the breaker is open"""
+        while True:
+            with self._lock:
+                remaining = self._open_until - time.monotonic()
+            if remaining <= 0:
+                return
+            time.sleep(remaining)
+
+# 重试策略：指数退避加随机抖动，整次运行共享一个重试预算和熔断器
+class RetryPolicy:
+    """
+    How the crawler retries, shared by every worker of one run.
+
+    A retry waits base_delay * 2**n seconds (capped at max_delay), half of it
+    random jitter. Retries are paid from a budget of budget_min plus budget_ratio
+    times the requests sent so far; when it runs out, failing codes are left to
+    the deferred pass of crawl_codes instead of being retried on the spot.
+    Re-checking a page that loaded fine but came back empty waits the same
+    backoff (pause) without being paid from the budget.
+    """
+    def __init__(self, page_attempts=CRAWL_RETRY_PAGE_ATTEMPTS, code_attempts=CRAWL_RETRY_CODE_ATTEMPTS,
+                 base_delay=CRAWL_RETRY_BASE_DELAY, max_delay=CRAWL_RETRY_MAX_DELAY,
+                 budget_ratio=CRAWL_RETRY_BUDGET_RATIO, budget_min=CRAWL_RETRY_BUDGET_MIN, breaker=None):
+        self.page_attempts = max(1, page_attempts)
+        self.code_attempts = max(1, code_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget_ratio = budget_ratio
+        self.budget_min = budget_min
+        self.breaker = breaker or CircuitBreaker()
+        self.requests = 0
+        self.retries = 0
+        self.denied = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def backoff(self, retry):
+        """Seconds to wait before retry number `retry` (0 for the first retry)"""
+        delay = min(self.max_delay, self.base_delay * 2 ** retry)
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def retry(self, retry, what=""):
+        """Take one retry from the budget and sleep the backoff; False when the budget is spent"""
+        with self._lock:
+            if self.retries >= self.budget_min + self.budget_ratio * self.requests:
+                self.denied += 1
+                if self.denied == 1:
+                    logging.warning("本次运行的重试预算已用完，失败的标准代码将在最后统一重试")
+                metrics.RETRIES_DENIED.inc()
+                return False
+            self.retries += 1
+        self._local.retries = self.thread_retries() + 1
+        metrics.RETRIES.inc()
+        delay = self.backoff(retry)
+        logging.debug(f"{what} {delay:.1f} 秒后重试")
+        time.sleep(delay)
+        return True
+
+    def pause(self, retry, what=""):
+        """Sleep the backoff before re-checking a page that loaded but had no results; free of the budget"""
+        delay = self.backoff(retry)
+        logging.debug(f"{what} 没有结果，{delay:.1f} 秒后再确认一次")
+        time.sleep(delay)
+
+    def thread_retries(self):
+        """Retries taken so far by the calling thread (process_code uses it to count retries per code)"""
+        return getattr(self._local, "retries", 0)
+
+    def record(self, resp):
+        """Count one response from the network and feed the circuit breaker"""
+        with self._lock:
+            self.requests += 1
+        self.breaker.record(resp.url == ANTI_CRAWL_URL)
+
+    def stats(self):
+        return {"requests": self.requests, "retries": self.retries,
+                "retries_denied": self.denied, "breaker_trips": self.breaker.trips}
+
+# 所有请求都经过限速器的 Session
+class RateLimitedSession(requests.Session):
+    """requests.Session whose requests go through a shared HostRateLimiter and RetryPolicy"""
+    def __init__(self, limiter, cache=None, retry=None):
+        super().__init__()
+        self.limiter = limiter
+        self.cache = cache
+        self.retry = retry or RetryPolicy()
+
+    def request(self, method, url, *args, **kwargs):
+        t0 = time.perf_counter()
+        self.retry.breaker.wait()
+        with self.limiter.slot(url):
+            queued = time.perf_counter() - t0
+            resp = super().request(method, url, *args, **kwargs)
+        metrics.LIMITER_WAIT_SECONDS.observe(queued)
+        resp.queued_seconds = queued
+        self.retry.record(resp)
+        return resp
+
+# 创建带限速器、页面缓存和重试策略的 Session
+def make_session(jar, limiter=None, retry=None):
+    """Create a rate-limited, cache-backed session carrying the csres cookies"""
+    session = RateLimitedSession(limiter or HostRateLimiter(), open_cache(), retry)
+    session.cookies.update(jar)
+    return session
+
+# 为工作线程创建共享 cookie、限速器、缓存与重试策略的 Session
+def _worker_session(session):
+    worker = RateLimitedSession(session.limiter, session.cache, session.retry)
+    worker.cookies = session.cookies
+    return worker
+
+# 用一次搜索解决同组的多个标准代码：每个详情页只获取一次，按编号分给各个标准代码
+def _resolve_group(keyword, group, session, known=None):
+    """
+    Search `keyword` once and build a ResultCollector for every code in `group`
+    whose rows are in the results; None for codes left to the per-code search.
+    Only a search without usable results (无搜索结果, too many results, not in
+    the cache-only cache) falls back to per-code searches; anti-crawl, retry
+    budget and network errors are raised for the caller to defer the group.
+    """
+    try:
+        rows = search_rows(keyword, session)
+    except AntiCrawlError:
+        raise
+    except CrawlError as e:
+        logging.info(f"合并搜索 {keyword} 未能使用（{e}），改为逐个搜索")
+        return [None] * len(group)
+
+    matched = [match_rows(code, rows) for code in group]
+    wanted = list(dict.fromkeys(row for rows_ in matched for row in rows_))
+    try:
+        details = {info["标准编号"]: (info, r2text) for info, r2text in fetch_details(keyword, wanted, session, known)}
+    except AntiCrawlError:
+        raise
+    except CrawlError as e:
+        logging.info(f"合并搜索 {keyword} 的详情页获取失败（{e}），改为逐个搜索")
+        return [None] * len(group)
+
+    parts = []
+    for code, rows_ in zip(group, matched):
+        if not rows_:
+            parts.append(None)
+            continue
+        part = ResultCollector()
+        record_hits(code, [details[row[0]] for row in rows_ if row[0] in details], part)
+        parts.append(part)
+    return parts
+
+# 并发处理多个标准代码
+def crawl_codes(codes, session, results, is_wrong_before=False, label="", workers=CRAWL_WORKERS, on_done=None,
+                coalesce=CRAWL_COALESCE, known=None):
+    """
+    Run process_code for every code on a pool of worker threads.
+
+    Each code is collected separately and merged into `results` (a ResultCollector,
+    or None to skip merging) in the order of `codes`, exactly as the serial loop would
+    have produced them. `on_done(code, part)` is called on the calling thread as each
+    code finishes.
+
+    Codes sharing a base code are first resolved together from one search (see
+    planner.py); codes the shared search does not cover are searched one by one.
+    Codes that still fail after their retries, or are refused by the site, are put
+    aside and crawled once more, one at a time, after all other codes (a deferred
+    pass), so one bad code does not hold up the rest of the run.
+
+    `known` maps codes to stored records (util.known_records); search rows whose
+    name and status are unchanged reuse the stored dates instead of fetching the
+    detail page, unless CRAWL_REUSE_DETAILS=0.
+    """
+    if not codes:
+        return
+    if not CRAWL_REUSE_DETAILS:
+        known = None
+
+    local = threading.local()
+    sessions = []
+
+    def run(code, defer):
+        if not hasattr(local, "session"):
+            local.session = _worker_session(session)
+            sessions.append(local.session)
+        part = ResultCollector()
+        if not process_code(code, local.session, part, is_wrong_before, defer=defer, known=known):
+            return None
+        return part
+
+    def run_group(keyword, idxs):
+        if not hasattr(local, "session"):
+            local.session = _worker_session(session)
+            sessions.append(local.session)
+        try:
+            return _resolve_group(keyword, [codes[i] for i in idxs], local.session, known)
+        except Exception as e:
+            # 被网站拒绝访问、重试预算用完或请求失败时不再逐个搜索，整组推迟到最后
+            logging.warning(f"⏳  合并搜索 {keyword}: {e}，{len(idxs)}个标准代码推迟到最后重试")
+            return None
+
+    parts = [None] * len(codes)
+    done = 0
+    pending = list(range(len(codes)))
+    blocked = []        # 合并搜索失败的标准代码，直接进入第二轮
+
+    # 合并搜索：同一基础编号的标准代码共用一次搜索，没有匹配到的再逐个搜索
+    if coalesce and len(codes) > 1:
+        plan = plan_searches(codes)
+        if plan:
+            pool = ThreadPoolExecutor(max_workers=max(1, workers))
+            try:
+                futures = {pool.submit(run_group, keyword, idxs): idxs for keyword, idxs in plan}
+                for fut in as_completed(futures):
+                    group_parts = fut.result()
+                    if group_parts is None:
+                        blocked.extend(futures[fut])
+                        continue
+                    for idx, part in zip(futures[fut], group_parts):
+                        if part is None:
+                            continue
+                        parts[idx] = part
+                        metrics.CODES.inc(outcome="coalesced")
+                        if on_done is not None:
+                            on_done(codes[idx], part)
+                        done += 1
+                        logging.info(f"{label}[{done}/{len(codes)}]")
+                        print(f"{label}[{done}/{len(codes)}]")
+            except BaseException:
+                pool.shutdown(wait=False, cancel_futures=True)
+                raise
+            pool.shutdown()
+            skipped = set(blocked)
+            pending = [i for i in pending if parts[i] is None and i not in skipped]
+            logging.info(f"合并搜索解决了{len(codes) - len(pending) - len(blocked)}个标准代码，"
+                         f"其余{len(pending)}个逐个搜索，{len(blocked)}个推迟到最后")
+    # 第一轮并发爬取；推迟的标准代码在第二轮由单个线程逐个重试
+    for defer, pool_size in ((True, workers), (False, 1)):
+        if not defer:
+            pending = sorted(pending + blocked)
+        if not pending:
+            continue
+        if not defer:
+            logging.info(f"{label}：{len(pending)}个标准代码推迟到最后重试")
+            print(f"{label}：{len(pending)}个标准代码推迟到最后重试")
+        pool = ThreadPoolExecutor(max_workers=max(1, pool_size))
+        try:
+            futures = {pool.submit(run, codes[i], defer): i for i in pending}
+            deferred = []
+            for fut in as_completed(futures):
+                idx = futures[fut]
+                part = fut.result()
+                if part is None:
+                    deferred.append(idx)
+                    continue
+                parts[idx] = part
+                if on_done is not None:
+                    on_done(codes[idx], part)
+                done += 1
+                logging.info(f"{label}[{done}/{len(codes)}]")
+                print(f"{label}[{done}/{len(codes)}]")
+        except BaseException:
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+        pool.shutdown()
+        pending = sorted(deferred)
+    for worker in sessions:
+        worker.close()
+    retry = getattr(session, "retry", None)
+    if retry is not None:
+        logging.info(f"{label}：重试统计 {retry.stats()}")
+
+    if results is not None:
+        for part in parts:
+            results.extend(part)
@@ -0,0 +1,125 @@
+# docx_reader.py
+import os
+import posixpath
+import zipfile
+
+from lxml import etree
+
+# 读取报告的方式：stream 流式解析 word/document.xml，python-docx 使用完整对象模型
+DOCX_READER = os.getenv("DOCX_READER", "stream")
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+W_BODY, W_P, W_R, W_HYPERLINK = f"{_W}body", f"{_W}p", f"{_W}r", f"{_W}hyperlink"
+W_TBL, W_TR, W_TC, W_TRPR, W_TCPR = f"{_W}tbl", f"{_W}tr", f"{_W}tc", f"{_W}trPr", f"{_W}tcPr"
+W_GRIDBEFORE, W_GRIDSPAN, W_VMERGE, W_VAL = f"{_W}gridBefore", f"{_W}gridSpan", f"{_W}vMerge", f"{_W}val"
+W_T, W_TAB, W_PTAB, W_BR, W_CR, W_NOBREAKHYPHEN, W_TYPE = (
+    f"{_W}t", f"{_W}tab", f"{_W}ptab", f"{_W}br", f"{_W}cr", f"{_W}noBreakHyphen", f"{_W}type",
+)
+PKG_RELATIONSHIP = "{http://schemas.openxmlformats.org/package/2006/relationships}Relationship"
+
+# 与 python-docx 相同：正文部件的位置由 _rels/.rels 中的 officeDocument 关系给出
+def _main_part(zf):
+    try:
+        rels = etree.fromstring(zf.read("_rels/.rels"))
+    except KeyError:
+        return "word/document.xml"
+    for rel in rels.iter(PKG_RELATIONSHIP):
+        if rel.get("Type", "").endswith("/officeDocument") and rel.get("TargetMode") != "External":
+            return posixpath.normpath(rel.get("Target", "").lstrip("/"))
+    return "word/document.xml"
+
+# 与 python-docx 的 Run.text 相同：制表符为 \t，换行为 \n，不间断连字符为 -
+def _run_text(r):
+    parts = []
+    for child in r:
+        tag = child.tag
+        if tag == W_T:
+            parts.append(child.text or "")
+        elif tag == W_TAB or tag == W_PTAB:
+            parts.append("\t")
+        elif tag == W_BR:
+            if child.get(W_TYPE, "textWrapping") == "textWrapping":
+                parts.append("\n")
+        elif tag == W_CR:
+            parts.append("\n")
+        elif tag == W_NOBREAKHYPHEN:
+            parts.append("-")
+    return "".join(parts)
+
+# 与 python-docx 的 Paragraph.text 相同：直接子级的 run 以及超链接中的 run
+def _paragraph_text(p):
+    parts = []
+    for child in p:
+        if child.tag == W_R:
+            parts.append(_run_text(child))
+        elif child.tag == W_HYPERLINK:
+            parts.extend(_run_text(r) for r in child if r.tag == W_R)
+    return "".join(parts)
+
+def _int_val(el, default):
+    if el is None:
+        return default
+    try:
+        return int(el.get(W_VAL))
+    except (TypeError, ValueError):
+        return default
+
+# 与 python-docx 的 _Row.cells 相同：合并的单元格按网格列重复，纵向合并取上方单元格的文字
+def _table_rows(tbl):
+    above = {}                                  # 上一行：网格列 -> (文字, 跨列数)
+    for tr in tbl.iterchildren(W_TR):
+        trpr = tr.find(W_TRPR)
+        offset = _int_val(trpr.find(W_GRIDBEFORE) if trpr is not None else None, 0)
+        current, cells = {}, []
+        for tc in tr.iterchildren(W_TC):
+            tcpr = tc.find(W_TCPR)
+            span = _int_val(tcpr.find(W_GRIDSPAN) if tcpr is not None else None, 1)
+            vmerge = tcpr.find(W_VMERGE) if tcpr is not None else None
+            if vmerge is not None and vmerge.get(W_VAL, "continue") == "continue" and offset in above:
+                text, span = above[offset]
+            else:
+                text = "\n".join(_paragraph_text(p) for p in tc.iterchildren(W_P))
+            current[offset] = (text, span)
+            cells.extend([text] * span)
+            offset += span
+        above = current
+        yield cells
+
+def iter_blocks(path):
+    """
+    Stream the main document part (word/document.xml unless _rels/.rels names
+    another) and yield ("p", text) for body paragraphs and
+    ("row", [cell texts]) for body table rows, in document order.
+
+    Each body-level element is dropped once read, so memory stays flat as the
+    document grows; text matches python-docx's Paragraph.text and _Row.cells.
+    """
+    with zipfile.ZipFile(path) as zf, zf.open(_main_part(zf)) as f:
+        for _, el in etree.iterparse(f, events=("end",), tag=(W_P, W_TBL), huge_tree=True):
+            parent = el.getparent()
+            if parent is None or parent.tag != W_BODY:
+                continue                        # 表格内的段落在整张表读完后处理
+            if el.tag == W_P:
+                yield "p", _paragraph_text(el)
+            else:
+                yield from (("row", cells) for cells in _table_rows(el))
+            el.clear()
+            while el.getprevious() is not None:
+                del parent[0]
+
+def iter_blocks_python_docx(path):
+    """Same blocks through python-docx: all paragraphs first, then all table rows"""
+    from docx import Document
+    doc = Document(path)
+    for p in doc.paragraphs:
+        yield "p", p.text
+    for tbl in doc.tables:
+        for row in tbl.rows:
+            yield "row", [c.text for c in row.cells]
+
+# 按 .env 中的 DOCX_READER 选择读取方式
+def read_blocks(path, reader=None):
+    """Yield the paragraph and table-row blocks of a .docx with the configured reader"""
+    if (reader or DOCX_READER) == "python-docx":
+        return iter_blocks_python_docx(path)
+    return iter_blocks(path)
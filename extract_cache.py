@@ -0,0 +1,91 @@
+# extract_cache.py
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from util import BASE_DIR, extractor_version
+
+# 报告提取结果缓存文件，留空表示每次都重新解析
+EXTRACT_CACHE = os.getenv("EXTRACT_CACHE", "extract_cache.sqlite")
+
+# 计算文件内容的 SHA-256
+def file_digest(path, chunk_size=1 << 20):
+    """SHA-256 of the file content, read in chunks"""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            h.update(chunk)
+    return h.hexdigest()
+
+# 按“文件内容哈希 + 提取器版本”缓存每个报告的 (orig_code, code, name) 结果
+class ExtractCache:
+    """Persistent cache of extract_from_docx hits keyed by file content hash and extractor version"""
+    def __init__(self, path, version=None):
+        self.path = path
+        self.version = version or extractor_version()
+        self._digests = {}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS extractions (
+                digest TEXT NOT NULL,
+                version TEXT NOT NULL,
+                hits TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (digest, version)
+            )""")
+        # 正则或处理逻辑变化后，旧版本的结果不会再被使用
+        removed = self._conn.execute("DELETE FROM extractions WHERE version != ?", (self.version,)).rowcount
+        self._conn.commit()
+        if removed:
+            logging.info(f"提取器版本已变化，清除了{removed}条旧的提取缓存")
+
+    def _digest(self, path):
+        # 文件被修改后（修改时间或大小变化）重新计算哈希，长时间运行的服务也不会读到旧结果
+        st = os.stat(path)
+        key = (str(path), st.st_mtime_ns, st.st_size)
+        if key not in self._digests:
+            if len(self._digests) >= 4096:
+                self._digests.clear()
+            self._digests[key] = file_digest(path)
+        return self._digests[key]
+
+    def get(self, path):
+        """Return the cached hits for `path`, or None if this content was never extracted"""
+        digest = self._digest(path)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT hits FROM extractions WHERE digest = ? AND version = ?",
+                (digest, self.version),
+            ).fetchone()
+        if row is None:
+            return None
+        return [tuple(hit) for hit in json.loads(row[0])]
+
+    def put(self, path, hits):
+        """Store the hits extracted from `path`"""
+        digest = self._digest(path)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO extractions VALUES (?, ?, ?, ?)",
+                (digest, self.version, json.dumps(hits, ensure_ascii=False), time.time()),
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+# 按 .env 配置打开提取缓存
+def open_extract_cache():
+    """Open the configured extraction cache, or return None when it is disabled"""
+    if not EXTRACT_CACHE:
+        return None
+    path = BASE_DIR / EXTRACT_CACHE
+    logging.info(f"使用提取缓存: {path}")
+    return ExtractCache(path)
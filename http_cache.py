@@ -0,0 +1,120 @@
+# http_cache.py
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from lazy import lazy_import
+from util import BASE_DIR, HEADERS, get_env_float
+
+requests = lazy_import("requests")
+
+# 本地页面缓存配置（可在 .env 中覆盖）
+HTTP_CACHE = os.getenv("HTTP_CACHE", "http_cache.sqlite")                 # 缓存文件，留空表示不使用缓存
+SEARCH_TTL = get_env_float("HTTP_CACHE_SEARCH_TTL_HOURS", 12) * 3600       # 搜索页有效期
+DETAIL_TTL = get_env_float("HTTP_CACHE_DETAIL_TTL_HOURS", 72) * 3600       # 详情页有效期
+MAX_BYTES = int(get_env_float("HTTP_CACHE_MAX_MB", 512) * 1024 * 1024)     # 缓存大小上限
+CACHE_ONLY = os.getenv("HTTP_CACHE_ONLY", "").lower() in ("1", "true", "yes")  # 只读缓存，不访问网络
+
+# 每写入多少个页面检查一次缓存大小
+_EVICT_EVERY = 50
+
+# 持久化的页面缓存（SQLite），按 URL 存储，超出大小上限时按最近最少使用淘汰
+class ResponseCache:
+    """Persistent URL-keyed response cache with per-kind TTL and LRU size cap"""
+    def __init__(self, path, search_ttl=SEARCH_TTL, detail_ttl=DETAIL_TTL,
+                 max_bytes=MAX_BYTES, cache_only=CACHE_ONLY):
+        self.path = path
+        self.ttl = {"search": search_ttl, "detail": detail_ttl}
+        self.max_bytes = max_bytes
+        self.cache_only = cache_only
+        self._lock = threading.Lock()
+        self._puts = 0
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                final_url TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                encoding TEXT,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )""")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at)")
+        self._conn.commit()
+
+    def get(self, url, kind):
+        """Return a cached requests.Response for `url`, or None if missing or expired"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT final_url, status, headers, encoding, body, fetched_at FROM responses WHERE url = ?",
+                (url,),
+            ).fetchone()
+            if row is None or now - row[5] > self.ttl[kind]:
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE url = ?", (now, url))
+            self._conn.commit()
+
+        final_url, status, headers, encoding, body, _ = row
+        resp = requests.Response()
+        resp.status_code = status
+        resp._content = body
+        resp.url = final_url
+        resp.headers = requests.structures.CaseInsensitiveDict(json.loads(headers))
+        resp.encoding = encoding
+        resp.request = requests.Request("GET", url, headers=HEADERS).prepare()
+        resp.from_cache = True
+        return resp
+
+    def put(self, url, resp, kind):
+        """Store an accepted response"""
+        if getattr(resp, "from_cache", False):
+            return
+        now = time.time()
+        body = resp.content
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, kind, resp.url, resp.status_code, json.dumps(dict(resp.headers)),
+                 resp.encoding, body, len(body), now, now),
+            )
+            self._conn.commit()
+            self._puts += 1
+            if self._puts % _EVICT_EVERY == 0:
+                self._evict()
+
+    def _evict(self):
+        # 超出大小上限时删除最久未使用的页面
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        removed = 0
+        for url, size in self._conn.execute("SELECT url, size FROM responses ORDER BY accessed_at").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+            total -= size
+            removed += 1
+        self._conn.commit()
+        logging.info(f"页面缓存超出上限，已淘汰{removed}个页面")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+# 按 .env 配置打开页面缓存
+def open_cache():
+    """Open the configured response cache, or return None when caching is disabled"""
+    if not HTTP_CACHE:
+        return None
+    path = BASE_DIR / HTTP_CACHE
+    logging.info(f"使用页面缓存: {path}{'（仅缓存模式）' if CACHE_ONLY else ''}")
+    return ResponseCache(path)
@@ -0,0 +1,97 @@
+# journal.py
+import json
+import logging
+import os
+import shutil
+import time
+
+from util import BASE_DIR, ResultCollector, get_env_int, get_env_float, get_path_for_log_file
+
+# 更新过程中的运行记录：每处理完一个标准代码追加一行
+JOURNAL_FILE = BASE_DIR / "update_journal.jsonl"
+FLUSH_EVERY = get_env_int("JOURNAL_FLUSH_EVERY", 20)          # 每写入多少条记录落盘一次
+FLUSH_INTERVAL = get_env_float("JOURNAL_FLUSH_SECONDS", 30)   # 或者距离上次落盘超过多少秒
+
+# 只追加的 JSONL 运行记录，用于崩溃或中断后继续运行
+class Journal:
+    """Append-only JSONL checkpoint journal with one record per processed code"""
+    def __init__(self, path=JOURNAL_FILE, resume=False):
+        self.path = path
+        self.parts = {}
+        if resume:
+            self.parts = self.replay(path)
+            logging.info(f"从运行记录恢复了{len(self.parts)}个已完成的标准代码")
+            print(f"从运行记录恢复了{len(self.parts)}个已完成的标准代码")
+        elif path.exists():
+            # 上次未完成的运行记录不直接覆盖，先移到 log 文件夹
+            old = get_path_for_log_file("log", "update_journal.jsonl")
+            shutil.move(str(path), str(old))
+            logging.warning(f"发现上次未完成的运行记录，本次重新开始，旧记录已移动至 {old}")
+        self._f = open(path, "a", encoding="utf-8")
+        if resume and not self._ends_with_newline(path):
+            self._f.write("\n")         # 上次中断时最后一行没有写完
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    @staticmethod
+    def _ends_with_newline(path):
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() == 0:
+                return True
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    @staticmethod
+    def replay(path):
+        """Read a journal into {(code, is_wrong_before): ResultCollector}, ignoring a torn last line"""
+        parts = {}
+        if not path.exists():
+            return parts
+        with open(path, encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                try:
+                    rec = json.loads(line)
+                except json.JSONDecodeError:
+                    logging.warning(f"运行记录第{line_no}行不完整，已跳过")
+                    continue
+                parts[(rec["code"], rec["is_wrong_before"])] = ResultCollector.from_records(rec["rows"])
+        return parts
+
+    def is_done(self, code, is_wrong_before):
+        return (code, is_wrong_before) in self.parts
+
+    def append(self, code, is_wrong_before, part):
+        """Record one finished code"""
+        self.parts[(code, is_wrong_before)] = part
+        rec = {"code": code, "is_wrong_before": is_wrong_before, "rows": part.to_records()}
+        self._f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        self._pending += 1
+        if self._pending >= FLUSH_EVERY or time.monotonic() - self._last_flush >= FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        self._f.flush()
+        os.fsync(self._f.fileno())
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    def collect(self, keys):
+        """Build one ResultCollector from the journal, in the order of `keys`"""
+        results = ResultCollector()
+        for key in keys:
+            if key in self.parts:
+                results.extend(self.parts[key])
+        return results
+
+    def close(self):
+        if not self._f.closed:
+            self.flush()
+            self._f.close()
+
+    def archive(self):
+        """Move the finished journal into the log folder"""
+        self.close()
+        dest = get_path_for_log_file("log", "update_journal.jsonl")
+        shutil.move(str(self.path), str(dest))
+        logging.info(f"运行记录已移动至 {dest}")
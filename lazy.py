@@ -0,0 +1,28 @@
+# lazy.py
+import importlib
+import threading
+
+# 延迟导入的模块：第一次访问属性时才真正导入，导入本项目的模块时不再加载 pandas 等大型依赖
+class LazyModule:
+    """Stand-in for a module that is imported on first attribute access"""
+    def __init__(self, name):
+        self.__name = name
+        self.__module = None
+        self.__lock = threading.Lock()
+
+    def __load(self):
+        with self.__lock:
+            if self.__module is None:
+                self.__module = importlib.import_module(self.__name)
+        return self.__module
+
+    def __getattr__(self, attr):
+        return getattr(self.__module or self.__load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self.__module is not None else "not loaded"
+        return f"<lazy module {self.__name!r} ({state})>"
+
+def lazy_import(name):
+    """Return a LazyModule for `name`, e.g. pd = lazy_import("pandas")"""
+    return LazyModule(name)
@@ -0,0 +1,280 @@
+# metrics.py
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from util import BASE_DIR, ANTI_CRAWL_URL, get_env_float, get_path_for_log_file
+
+# 指标导出配置（可在 .env 中覆盖）
+METRICS_TEXTFILE = os.getenv("METRICS_TEXTFILE", "")              # Prometheus 文本文件，留空表示不写
+METRICS_INTERVAL = get_env_float("METRICS_INTERVAL", 15.0)        # 运行期间刷新文本文件的间隔（秒）
+
+# 直方图分桶
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PARSE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+CODE_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+RETRY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21)
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _label_text(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+# 指标的公共部分：名称、说明、标签名，以及按标签值保存的数值
+class _Metric:
+    type = None
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+    def _items(self):
+        with self._lock:
+            return sorted((key, self._copy(value)) for key, value in self._values.items())
+
+    @staticmethod
+    def _copy(value):
+        return value
+
+# 计数器：只增不减
+class Counter(_Metric):
+    """Monotonic count, optionally split by labels: requests.inc(kind="search")"""
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def total(self):
+        with self._lock:
+            return sum(self._values.values())
+
+    def lines(self):
+        return [f"{self.name}{_label_text(self.labels, key)} {_number(v)}" for key, v in self._items()]
+
+    def summary(self):
+        return [{"labels": dict(zip(self.labels, key)), "value": v} for key, v in self._items()]
+
+# 仪表：可以设为任意值
+class Gauge(Counter):
+    """Value that is set rather than counted"""
+    type = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+# 直方图：按分桶计数，同时记录总和、次数和最大值
+class Histogram(_Metric):
+    """Bucketed distribution of observed values (seconds, retries, ...)"""
+    type = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0, value]
+            state[0][i] += 1
+            state[1] += value
+            state[2] += 1
+            state[3] = max(state[3], value)
+
+    @staticmethod
+    def _copy(value):
+        return [list(value[0]), value[1], value[2], value[3]]
+
+    def _quantile(self, q, counts, count, maximum):
+        # 与 Prometheus 的 histogram_quantile 相同：在分桶内线性插值
+        rank = q * count
+        seen = 0
+        for i, n in enumerate(counts):
+            if n and seen + n >= rank:
+                if i == len(self.buckets):
+                    return maximum
+                lower = self.buckets[i - 1] if i else 0.0
+                return min(maximum, lower + (self.buckets[i] - lower) * (rank - seen) / n)
+            seen += n
+        return maximum
+
+    def lines(self):
+        out = []
+        for key, (counts, total, count, _) in self._items():
+            cumulative = 0
+            for bound, n in zip(self.buckets + ("+Inf",), counts):
+                cumulative += n
+                le = bound if isinstance(bound, str) else _number(float(bound))
+                out.append(f"{self.name}_bucket{_label_text(self.labels, key, [('le', le)])} {cumulative}")
+            out.append(f"{self.name}_sum{_label_text(self.labels, key)} {_number(float(total))}")
+            out.append(f"{self.name}_count{_label_text(self.labels, key)} {count}")
+        return out
+
+    def summary(self):
+        out = []
+        for key, (counts, total, count, maximum) in self._items():
+            out.append({
+                "labels": dict(zip(self.labels, key)), "count": count, "sum": round(total, 6),
+                "mean": round(total / count, 6), "max": round(maximum, 6),
+                **{f"p{int(q * 100)}": round(self._quantile(q, counts, count, maximum), 6) for q in (0.5, 0.9, 0.99)},
+            })
+        return out
+
+# 一次运行的全部指标
+class MetricsRegistry:
+    """Named counters, gauges and histograms exported as JSON or Prometheus text"""
+    def __init__(self):
+        self._metrics = {}
+
+    def _add(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, labels=()):
+        return self._add(Counter(name, help, labels))
+
+    def gauge(self, name, help, labels=()):
+        return self._add(Gauge(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        return self._add(Histogram(name, help, labels, buckets))
+
+    def reset(self):
+        for metric in self._metrics.values():
+            metric.reset()
+
+    def to_prometheus(self):
+        """Prometheus text exposition format"""
+        out = []
+        for metric in self._metrics.values():
+            out.append(f"# HELP {metric.name} {metric.help}")
+            out.append(f"# TYPE {metric.name} {metric.type}")
+            out.extend(metric.lines())
+        return "\n".join(out) + "\n"
+
+    def summary(self):
+        return {name: metric.summary() for name, metric in self._metrics.items()}
+
+    def write_textfile(self, path):
+        """Write to_prometheus() to `path` atomically (for node_exporter's textfile collector)"""
+        path = Path(path)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(self.to_prometheus(), encoding="utf-8")
+        os.replace(tmp, path)
+
+METRICS = MetricsRegistry()
+
+# 爬虫指标
+REQUESTS = METRICS.counter("csres_requests_total", "Requests sent to csres.com", ["kind", "status"])
+REQUEST_ERRORS = METRICS.counter("csres_request_errors_total", "Requests that failed without a response", ["kind"])
+REQUEST_SECONDS = METRICS.histogram("csres_request_seconds", "Request latency, excluding rate-limit waits", ["kind"])
+RESPONSE_BYTES = METRICS.counter("csres_response_bytes_total", "Bytes downloaded from csres.com", ["kind"])
+ANTI_CRAWL = METRICS.counter("csres_anti_crawl_total", "Responses redirected to the anti-crawl page", ["kind"])
+CACHE_HITS = METRICS.counter("csres_cache_hits_total", "Pages served from the local page cache", ["kind"])
+PARSE_SECONDS = METRICS.histogram("csres_parse_seconds", "Time spent parsing a page", ["kind"], PARSE_BUCKETS)
+LIMITER_WAIT_SECONDS = METRICS.histogram("csres_limiter_wait_seconds",
+                                         "Time a request waited for the circuit breaker and rate limiter")
+RETRIES = METRICS.counter("csres_retries_total", "Retries paid from the retry budget")
+RETRIES_DENIED = METRICS.counter("csres_retries_denied_total", "Retries refused because the budget was spent")
+BREAKER_TRIPS = METRICS.counter("csres_breaker_trips_total", "Times the anti-crawl circuit breaker opened")
+DETAILS_REUSED = METRICS.counter("csres_details_reused_total", "Detail pages skipped because the stored record matched")
+CODES = METRICS.counter("csres_codes_total", "Codes finished, by outcome", ["outcome"])
+CODE_SECONDS = METRICS.histogram("csres_code_seconds", "Wall time per code, including retries", buckets=CODE_BUCKETS)
+CODE_RETRIES = METRICS.histogram("csres_code_retries", "Retries per code", buckets=RETRY_BUCKETS)
+RUN_STARTED = METRICS.gauge("csres_run_start_time_seconds", "Unix time the current run started")
+
+# 记录一次网络请求的结果
+def observe_response(kind, resp, seconds):
+    REQUESTS.inc(kind=kind, status=resp.status_code)
+    REQUEST_SECONDS.observe(seconds, kind=kind)
+    RESPONSE_BYTES.inc(len(resp.content), kind=kind)
+    if resp.url == ANTI_CRAWL_URL:
+        ANTI_CRAWL.inc(kind=kind)
+
+# 根据各项指标计算整次运行的吞吐量
+def run_summary(seconds):
+    codes = CODES.total() - CODES.value(outcome="deferred")
+    requests = REQUESTS.total()
+    pages = requests + CACHE_HITS.total()
+    return {
+        "seconds": round(seconds, 3),
+        "codes": codes,
+        "codes_per_s": round(codes / seconds, 3) if seconds > 0 else None,
+        "requests": requests,
+        "requests_per_s": round(requests / seconds, 3) if seconds > 0 else None,
+        "anti_crawl_rate": round(ANTI_CRAWL.total() / requests, 4) if requests else 0.0,
+        "cache_hit_rate": round(CACHE_HITS.total() / pages, 4) if pages else 0.0,
+        "mib_downloaded": round(RESPONSE_BYTES.total() / 2**20, 3),
+    }
+
+def _write_textfile(path):
+    try:
+        METRICS.write_textfile(path)
+    except OSError as e:
+        logging.warning(f"无法写入指标文件 {path}：{e}")
+
+# 记录一次运行的指标：运行期间定期刷新 Prometheus 文本文件，结束时写出 JSON 汇总
+@contextmanager
+def export_metrics(run_name, textfile=METRICS_TEXTFILE, interval=METRICS_INTERVAL):
+    """
+    Reset METRICS for a new run. While the block runs, `textfile` (if set) is
+    rewritten every `interval` seconds; on exit it is written once more and a
+    JSON summary is saved to log/<run_name>_metrics_MM_DD_N.json.
+    """
+    METRICS.reset()
+    RUN_STARTED.set(round(time.time(), 3))
+    path = BASE_DIR / textfile if textfile else None
+    stop = threading.Event()
+    thread = None
+    if path is not None and interval > 0:
+        def refresh():
+            while not stop.wait(interval):
+                _write_textfile(path)
+        thread = threading.Thread(target=refresh, name="metrics-textfile", daemon=True)
+        thread.start()
+    t0 = time.monotonic()
+    try:
+        yield METRICS
+    finally:
+        stop.set()
+        if thread is not None:
+            thread.join()
+        if path is not None:
+            _write_textfile(path)
+        run = run_summary(time.monotonic() - t0)
+        summary_path = get_path_for_log_file("log", f"{run_name}_metrics.json")
+        summary = {"run": run_name, "finished_at": datetime.now().isoformat(timespec="seconds"),
+                   "summary": run, "metrics": METRICS.summary()}
+        summary_path.write_text(json.dumps(summary, ensure_ascii=False, indent=2), encoding="utf-8")
+        logging.info(f"爬取指标：{run}，详见 {summary_path}")
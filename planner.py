@@ -0,0 +1,49 @@
+# planner.py
+import logging
+import os
+import re
+
+# 是否合并同一基础编号的搜索（可在 .env 中关闭）
+CRAWL_COALESCE = os.getenv("CRAWL_COALESCE", "1").lower() not in ("0", "false", "no")
+
+# 基础编号：与 util.CODE_REGEX 相同的前缀（GB/T、DB11/T …）加主编号，
+# 不含分部分（.1）、年份、修改单（/XG）和英文版（E）
+_BASE_CODE = re.compile(r"(?P<prefix>[A-Z]+(?:[0-9]+(?=/))?(?:/[A-Z][A-Z0-9]*?)?)(?P<number>\d+)")
+
+# 主编号太短的关键字（如 GB/T1）会搜到成千上万个标准，不合并
+MIN_BASE_DIGITS = 3
+
+def base_code(code):
+    """
+    GB/T5750.1-2006 -> GB/T5750, GB50016-2014/XG1-2020 -> GB50016,
+    DB11/T1234-2015 -> DB11/T1234; None when the code has no base worth sharing
+    (unparsable, or a main number shorter than MIN_BASE_DIGITS such as GB/T1.1-2020)
+    """
+    m = _BASE_CODE.match(code.replace(" ", ""))
+    if m is None or len(m.group("number")) < MIN_BASE_DIGITS:
+        return None
+    return m.group(0)
+
+# 把待爬取的标准代码按基础编号分组，同组只搜索一次
+def plan_searches(codes, min_group=2):
+    """
+    Group `codes` by base code. Returns [(keyword, [index into codes, ...]), ...]
+    for every base code shared by at least `min_group` codes, in order of first
+    appearance; codes left out are searched one by one as before.
+    """
+    groups = {}
+    for i, code in enumerate(codes):
+        base = base_code(code)
+        if base is not None:
+            groups.setdefault(base, []).append(i)
+    plan = [(keyword, idxs) for keyword, idxs in groups.items() if len(idxs) >= min_group]
+    if plan:
+        covered = sum(len(idxs) for _, idxs in plan)
+        logging.info(f"合并搜索：{covered}个标准代码合并为{len(plan)}次搜索")
+    return plan
+
+# 搜索结果中属于某个标准代码的行：网站按关键字包含关系返回结果
+def match_rows(code, rows):
+    """The rows a search for `code` itself would have returned: codes containing it"""
+    code = code.replace(" ", "")
+    return [row for row in rows if code in row[0].replace(" ", "")]
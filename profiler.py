@@ -0,0 +1,230 @@
+# profiler.py
+import logging
+import os
+import threading
+import time
+import unicodedata
+
+# 关闭时使用的空计时段：不计时也不分配对象
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+# 按显示宽度对齐（中文字符占两格）
+def _width(text):
+    return sum(2 if unicodedata.east_asian_width(c) in "WF" else 1 for c in text)
+
+def _pad(text, width, right=False):
+    fill = " " * max(0, width - _width(text))
+    return fill + text if right else text + fill
+
+# 一个计时段：进入时压栈，退出时按完整路径（外层阶段 > 内层阶段）累计耗时
+class _Span:
+    __slots__ = ("profiler", "name", "doc", "t0")
+
+    def __init__(self, profiler, name, doc):
+        self.profiler = profiler
+        self.name = name
+        self.doc = doc
+
+    def __enter__(self):
+        stack = self.profiler._stack()
+        stack.append((self.name, self.doc or (stack[-1][1] if stack else None)))
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.t0
+        stack = self.profiler._stack()
+        path = tuple(name for name, _ in stack)
+        doc = stack.pop()[1]
+        self.profiler._record(path, 1, elapsed, doc)
+        return False
+
+# --profile：记录嵌套的阶段耗时和每个报告的耗时，可选同时运行 cProfile
+class Profiler:
+    """
+    Nested timing spans for the pipeline stages. Disabled by default: span()
+    then returns a shared no-op context manager and wrap()/wrap_iter() return
+    their argument unchanged, so instrumented code costs next to nothing.
+    """
+    def __init__(self):
+        self.enabled = False
+        self._stats = {}          # 路径 -> [次数, 秒]
+        self._docs = {}           # 报告 -> {阶段: 秒}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._t0 = 0.0
+        self._cprofile = None
+        self._dump = None
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _record(self, path, count, seconds, doc=None):
+        with self._lock:
+            stat = self._stats.setdefault(path, [0, 0.0])
+            stat[0] += count
+            stat[1] += seconds
+            if doc is not None:
+                per_doc = self._docs.setdefault(doc, {})
+                per_doc[path[-1]] = per_doc.get(path[-1], 0.0) + seconds
+
+    def enable(self, dump=None):
+        """Start recording; with `dump`, also run cProfile on this thread and save it to that file"""
+        self.enabled = True
+        self._stats, self._docs = {}, {}
+        self._t0 = time.perf_counter()
+        self._dump = dump
+        if dump:
+            import cProfile
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+    def span(self, name, doc=None):
+        """Context manager timing one stage; `doc` attributes it (and the spans inside) to a report"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, doc)
+
+    def wrap(self, name, fn):
+        """`fn` timed as a span on every call while profiling; `fn` itself otherwise"""
+        if not self.enabled:
+            return fn
+
+        def timed(*args, **kwargs):
+            with _Span(self, name, None):
+                return fn(*args, **kwargs)
+        return timed
+
+    def wrap_iter(self, name, iterable):
+        """`iterable`, with the time spent producing its items recorded as one span while profiling"""
+        if not self.enabled:
+            return iterable
+        return self._timed_iter(name, iterable)
+
+    def _timed_iter(self, name, iterable):
+        it = iter(iterable)
+        count, seconds = 0, 0.0
+        try:
+            while True:
+                t0 = time.perf_counter()
+                try:
+                    item = next(it)
+                except StopIteration:
+                    break
+                finally:
+                    seconds += time.perf_counter() - t0
+                count += 1
+                yield item
+        finally:
+            self.add(name, seconds, count)
+
+    def add(self, name, seconds, count=1):
+        """Record time measured elsewhere as a span `name` inside the current span"""
+        stack = self._stack()
+        path = tuple(n for n, _ in stack) + (name,)
+        self._record(path, count, seconds, stack[-1][1] if stack else None)
+
+    # 子进程中的记录：工作进程开始时清空，结束时交给主进程合并
+    def start_worker(self):
+        """Record spans in a worker process (fresh records, profiling on)"""
+        self.enabled = True
+        self._stats, self._docs = {}, {}
+        self._local = threading.local()     # fork 出的进程会带着主进程当前的计时段
+
+    def finish_worker(self):
+        """The worker's records, for merge() in the parent; stops recording"""
+        self.enabled = False
+        return self._stats, self._docs
+
+    def merge(self, records):
+        """Add a worker's records under the current span"""
+        stats, docs = records
+        stack = self._stack()
+        prefix = tuple(n for n, _ in stack)
+        with self._lock:
+            for path, (count, seconds) in stats.items():
+                stat = self._stats.setdefault(prefix + path, [0, 0.0])
+                stat[0] += count
+                stat[1] += seconds
+            for doc, per_doc in docs.items():
+                mine = self._docs.setdefault(doc, {})
+                for name, seconds in per_doc.items():
+                    mine[name] = mine.get(name, 0.0) + seconds
+
+    def report(self, total):
+        """The per-stage and per-document breakdown as text"""
+        with self._lock:
+            stats = dict(self._stats)
+            docs = {doc: dict(per_doc) for doc, per_doc in self._docs.items()}
+
+        def row(label, count, seconds, own, share):
+            return (_pad(label, 40) + _pad(count, 8, True) + _pad(seconds, 12, True)
+                    + _pad(own, 12, True) + _pad(share, 9, True))
+
+        lines = [f"⏱️  耗时分析（共 {total:.3f} 秒）", row("阶段", "次数", "总计(秒)", "自身(秒)", "占比")]
+        children = {}
+        for path in stats:
+            children.setdefault(path[:-1], []).append(path)
+        order = []
+
+        def walk(path):
+            count, seconds = stats[path]
+            inner = sum(stats[child][1] for child in children.get(path, ()))
+            share = seconds / total if total > 0 else 0.0
+            lines.append(row("  " * (len(path) - 1) + path[-1], str(count), f"{seconds:.3f}",
+                             f"{max(0.0, seconds - inner):.3f}", f"{share:.1%}"))
+            order.append(path[-1])
+            for child in sorted(children.get(path, ()), key=lambda p: -stats[p][1]):
+                walk(child)
+
+        roots = sorted(children.get((), ()), key=lambda p: -stats[p][1])
+        for root in roots:
+            walk(root)
+        other = total - sum(stats[root][1] for root in roots)
+        if other > 0:
+            lines.append(row("（其他）", "", f"{other:.3f}", f"{other:.3f}", f"{other / total:.1%}"))
+
+        if docs:
+            names = sorted({name for per_doc in docs.values() for name in per_doc},
+                           key=lambda name: order.index(name) if name in order else len(order))
+            widths = [max(len(name) + 2, 10) for name in names]
+            doc_width = max(40, max(_width(doc) for doc in docs) + 2)
+            lines.append("")
+            lines.append("每个报告的耗时（秒）")
+            lines.append(_pad("报告", doc_width) + "".join(_pad(n, w, True) for n, w in zip(names, widths)))
+            for doc, per_doc in sorted(docs.items()):
+                lines.append(_pad(doc, doc_width) + "".join(
+                    _pad(f"{per_doc.get(n, 0.0):.3f}", w, True) for n, w in zip(names, widths)))
+        return "\n".join(lines)
+
+    def finish(self):
+        """Stop recording, save the cProfile dump and print the breakdown; None when profiling is off"""
+        if not self.enabled:
+            return None
+        total = time.perf_counter() - self._t0
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            self._cprofile.dump_stats(self._dump)
+            self._cprofile = None
+        self.enabled = False
+        text = self.report(total)
+        print(text)
+        logging.info(f"\n{text}")
+        if self._dump:
+            print(f"cProfile 结果已保存至 {os.path.abspath(self._dump)}")
+            logging.info(f"cProfile 结果已保存至 {os.path.abspath(self._dump)}")
+        return text
+
+PROFILER = Profiler()
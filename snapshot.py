@@ -0,0 +1,96 @@
+# snapshot.py
+import logging
+import os
+import pickle
+from pathlib import Path
+
+from lazy import lazy_import
+
+pd = lazy_import("pandas")
+
+# 是否在标准库 xlsx 旁边保存快照文件（0 表示只在本次运行的内存中共享）
+WORKBOOK_SNAPSHOT = os.getenv("WORKBOOK_SNAPSHOT", "1").lower() not in ("0", "false", "no")
+
+# 快照格式变化时加一
+_FORMAT = 1
+
+# 已读取的工作簿：路径 -> ((修改时间, 大小), {工作表名: DataFrame})
+_loaded = {}
+
+def snapshot_path(path):
+    """Sidecar snapshot file next to the workbook: standards.xlsx -> standards.xlsx.snapshot"""
+    path = Path(path)
+    return path.with_name(path.name + ".snapshot")
+
+def _stat_key(path):
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+def _read_snapshot(path, key):
+    snap = snapshot_path(path)
+    try:
+        with open(snap, "rb") as f:
+            data = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logging.warning(f"快照文件 {snap} 无法读取，重新读取工作簿: {e}")
+        return None
+    if data.get("format") != _FORMAT or tuple(data.get("key", ())) != key:
+        return None
+    return data["sheets"]
+
+def _write_snapshot(path, key, sheets):
+    snap = snapshot_path(path)
+    tmp = snap.with_name(snap.name + ".tmp")
+    try:
+        with open(tmp, "wb") as f:
+            pickle.dump({"format": _FORMAT, "key": key, "sheets": sheets}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, snap)
+    except OSError as e:
+        logging.warning(f"无法写入快照文件 {snap}: {e}")
+
+def _as_text(df):
+    # 与 read_excel(dtype=str, keep_default_na=False) 一致：空单元格为 ""，其余均为字符串
+    return df.astype(object).where(df.notna(), "")
+
+# 读取标准库工作簿：每次运行只解析一次 xlsx，之后的运行直接读取快照
+def load_sheets(path):
+    """
+    Return {sheet name: DataFrame} for every sheet of `path`, all cells as text
+    ("" for empty cells). The result is shared by every caller in this process
+    and must not be modified. A sidecar snapshot, checked against the workbook's
+    mtime and size, lets later runs skip parsing the xlsx.
+    """
+    path = Path(path)
+    key = _stat_key(path)
+    cached = _loaded.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    sheets = _read_snapshot(path, key) if WORKBOOK_SNAPSHOT else None
+    if sheets is not None:
+        logging.info(f"从快照读取 {path.name}")
+    else:
+        sheets = {name: _as_text(df) for name, df in
+                  pd.read_excel(path, sheet_name=None, dtype=str, keep_default_na=False).items()}
+        logging.info(f"已读取 {path.name}（{len(sheets)}张工作表）")
+        if WORKBOOK_SNAPSHOT:
+            _write_snapshot(path, key, sheets)
+    _loaded[path] = (key, sheets)
+    return sheets
+
+# 刚写入的工作簿直接记录快照，下次运行无需重新解析
+def remember_sheets(path, sheets):
+    """Record the frames just written to `path` as its snapshot, when every cell is text"""
+    path = Path(path)
+    sheets = {name: _as_text(df).reset_index(drop=True) for name, df in sheets.items()}
+    for df in sheets.values():
+        # 数字等非文本单元格读回时的写法可能不同，这种情况下让下次运行重新读取 xlsx
+        if not all(isinstance(v, str) for col in df.columns for v in df[col]):
+            _loaded.pop(path, None)
+            return
+    key = _stat_key(path)
+    _loaded[path] = (key, sheets)
+    if WORKBOOK_SNAPSHOT:
+        _write_snapshot(path, key, sheets)
@@ -0,0 +1,87 @@
+# staleness.py
+import logging
+from datetime import date, datetime, timedelta
+
+from lazy import lazy_import
+
+pd = lazy_import("pandas")
+
+from util import get_env_float
+
+# 各状态的重新爬取周期（天），可在 .env 中覆盖
+STATUS_TTL_DAYS = {
+    "现行": get_env_float("REFRESH_TTL_CURRENT_DAYS", 30),
+    "即将实施": get_env_float("REFRESH_TTL_UPCOMING_DAYS", 30),
+}
+# 未列出的状态（被代替、调整中等）使用该周期
+DEFAULT_TTL_DAYS = get_env_float("REFRESH_TTL_OTHER_DAYS", 7)
+# 终态：不会再变化，除非强制更新否则不再爬取
+TERMINAL = {"作废", "废止"}
+
+# 解析“结果添加日期”（MM_DD，没有年份，取不晚于今天的最近一次）
+def parse_added_date(month_day, today):
+    """Resolve an MM_DD stamp to the latest matching date not after `today`"""
+    try:
+        month, day = (int(x) for x in str(month_day).strip().split("_"))
+        added = date(today.year, month, day)
+    except (TypeError, ValueError):
+        return None
+    if added > today:
+        try:
+            added = added.replace(year=today.year - 1)
+        except ValueError:           # 02_29
+            added = date(today.year - 1, 2, 28)
+    return added
+
+# 解析网站上的日期（2020-10-01）
+def parse_site_date(text):
+    """Parse a csres date cell, returning None when empty or malformed"""
+    if text is None or pd.isna(text) or not str(text).strip():
+        return None
+    try:
+        return datetime.strptime(str(text).strip()[:10], "%Y-%m-%d").date()
+    except ValueError:
+        return None
+
+# 判断一条记录是否需要重新爬取
+def needs_refresh(row, today, force=False):
+    """Return True when the stored record may have changed on csres since it was crawled"""
+    status = str(row["状态"]).strip()
+    if status in TERMINAL:
+        return force
+
+    added = parse_added_date(row["结果添加日期"], today)
+    if added is None:
+        return True
+
+    # 即将实施的标准在实施日期之后状态会变为现行
+    if status == "即将实施":
+        start = parse_site_date(row["实施日期"])
+        if start is not None and start <= today and added < start:
+            return True
+
+    # 已到作废日期但仍记录为现行
+    end = parse_site_date(row["作废日期"])
+    if end is not None and end <= today and added < end:
+        return True
+
+    ttl = STATUS_TTL_DAYS.get(status, DEFAULT_TTL_DAYS)
+    return (today - added) >= timedelta(days=ttl)
+
+# 增量更新：挑出需要重新爬取的标准，其余记录原样保留
+def plan_incremental_update(df_existing, today=None, force=False):
+    """
+    Split the “有搜索结果的标准” sheet into codes to re-crawl and rows to carry over.
+
+    Returns (codes_to_crawl, df_carry); codes are whitespace-free like load_existing_data().
+    """
+    today = today or date.today()
+    if df_existing.empty:
+        return [], df_existing
+    stale = df_existing.apply(needs_refresh, axis=1, args=(today, force))
+    codes = [str(c).replace(" ", "") for c in df_existing.loc[stale, "标准编号"]]
+    df_carry = df_existing.loc[~stale].reset_index(drop=True)
+
+    logging.info(f"增量更新：需要重新爬取{len(codes)}个标准，沿用{len(df_carry)}条未过期记录")
+    print(f"增量更新：需要重新爬取{len(codes)}个标准，沿用{len(df_carry)}条未过期记录")
+    return codes, df_carry
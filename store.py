@@ -0,0 +1,153 @@
+# store.py
+import logging
+import os
+import sqlite3
+import sys
+import threading
+
+from lazy import lazy_import
+from snapshot import load_sheets
+from util import (
+    BASE_DIR, get_src_file, get_dest_file,
+    HAS_OUTPUT_COLUMNS, NO_OUTPUT_COLUMNS, DATE_EMPTY_COLUMNS, ERR_COLUMNS,
+    save_excel_with_formatting,
+)
+
+pd = lazy_import("pandas")
+
+# SQLite 标准库文件，留空表示只使用 Excel
+STORE = os.getenv("STORE", "")
+
+# 表名、对应的 Excel 工作表以及列，顺序与 initialize_dataframes() 一致
+TABLES = [
+    ("has_output", "有搜索结果的标准", HAS_OUTPUT_COLUMNS),
+    ("no_output", "无搜索结果或搜索结果过多的标准", NO_OUTPUT_COLUMNS),
+    ("date_empty", "标准无详细日期(debug用)", DATE_EMPTY_COLUMNS),
+    ("err", "报错(debug用)", ERR_COLUMNS),
+]
+_SHEET_TO_TABLE = {sheet: (table, columns) for table, sheet, columns in TABLES}
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+# 去掉空格后的标准编号（搜索关键字不含空格，网站返回的编号含空格）
+_NORM_CODE = "REPLACE(\"标准编号\", ' ', '')"
+
+# SQLite 标准库：每张工作表对应一张表，按标准编号 upsert
+class StandardsStore:
+    """SQLite system of record for the four standards tables, in WAL mode"""
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        for table, _, columns in TABLES:
+            cols = ", ".join(f"{_quote(c)} TEXT" for c in columns)
+            self._conn.execute(f"CREATE TABLE IF NOT EXISTS {table} ({cols})")
+            self._conn.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS idx_{table}_code ON {table}(\"标准编号\")")
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_norm_code ON {table}({_NORM_CODE})")
+        self._conn.commit()
+
+    def is_empty(self):
+        with self._lock:
+            return all(
+                self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] == 0
+                for table, _, _ in TABLES
+            )
+
+    def read_sheet(self, sheet_name):
+        """Read one table by its Excel sheet name, in insertion order"""
+        table, columns = _SHEET_TO_TABLE[sheet_name]
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(map(_quote, columns))} FROM {table} ORDER BY rowid"
+            ).fetchall()
+        return pd.DataFrame(rows, columns=columns, dtype=object).fillna("")
+
+    def load_frames(self):
+        """Return (df_has_output, df_no_output_or_too_much_outputs, df_date_empty, df_err)"""
+        return tuple(self.read_sheet(sheet) for _, sheet, _ in TABLES)
+
+    def _upsert_rows(self, table, columns, df):
+        if df.empty:
+            return
+        df = df.reindex(columns=columns).drop_duplicates(subset="标准编号", keep="first")
+        values = df.astype(object).where(df.notna(), None)
+        rows = [tuple(None if v is None else str(v) for v in row)
+                for row in values.itertuples(index=False, name=None)]
+        cols = ", ".join(map(_quote, columns))
+        updates = ", ".join(f"{_quote(c)} = excluded.{_quote(c)}" for c in columns[1:])
+        self._conn.executemany(
+            f"INSERT INTO {table} ({cols}) VALUES ({', '.join('?' * len(columns))}) "
+            f"ON CONFLICT(\"标准编号\") DO UPDATE SET {updates}",
+            rows,
+        )
+
+    def _delete_codes(self, table, codes):
+        self._conn.executemany(
+            f"DELETE FROM {table} WHERE {_NORM_CODE} = ?",
+            [(str(c).replace(" ", ""),) for c in codes],
+        )
+
+    def upsert(self, df_has_output, df_no_output_or_too_much_outputs, df_date_empty, df_err):
+        """
+        Merge one run's results into the store in a single transaction.
+
+        A code found this run leaves the 无搜索结果 and 报错 tables, a code with no
+        result leaves the 有搜索结果 table, and stale 无详细日期 rows are replaced.
+        """
+        found = df_has_output["标准编号"].tolist()
+        missing = df_no_output_or_too_much_outputs["标准编号"].tolist()
+        with self._lock, self._conn:
+            self._delete_codes("no_output", found)
+            self._delete_codes("err", found + missing)
+            self._delete_codes("date_empty", found)
+            self._delete_codes("has_output", missing)
+            self._upsert_rows("has_output", HAS_OUTPUT_COLUMNS, df_has_output)
+            self._upsert_rows("no_output", NO_OUTPUT_COLUMNS, df_no_output_or_too_much_outputs)
+            self._upsert_rows("date_empty", DATE_EMPTY_COLUMNS, df_date_empty)
+            self._upsert_rows("err", ERR_COLUMNS, df_err)
+        logging.info(f"已写入标准库 {self.path}：{len(found)}条有结果，{len(missing)}条无结果，{len(df_err)}条报错")
+
+    def import_excel(self, path):
+        """Load a four-sheet standards workbook into the store"""
+        dfs = load_sheets(path)
+        frames = [dfs.get(sheet, pd.DataFrame(columns=columns)).reindex(columns=columns, fill_value="")
+                  for _, sheet, columns in TABLES]
+        self.upsert(*frames)
+        logging.info(f"已从 {path} 导入标准库")
+
+    def export_excel(self, path):
+        """Write the store out as the four-sheet standards workbook"""
+        save_excel_with_formatting(path, *self.load_frames())
+        logging.info(f"已从标准库导出 {path}")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+# 按 .env 配置打开 SQLite 标准库；首次使用时从 SRC 导入 Excel
+def open_store():
+    """Open the configured store, or return None when the database lives only in Excel"""
+    if not STORE:
+        return None
+    store = StandardsStore(BASE_DIR / STORE)
+    src_file = get_src_file()
+    if store.is_empty() and src_file.exists():
+        logging.info(f"标准库为空，从 {src_file} 导入")
+        print(f"标准库为空，从 {src_file} 导入")
+        store.import_excel(src_file)
+    return store
+
+if __name__ == "__main__":
+    # python store.py import [xlsx] / python store.py export [xlsx]
+    if len(sys.argv) < 2 or sys.argv[1] not in ("import", "export") or not STORE:
+        print("用法：在 .env 中设置 STORE 后运行 python store.py import|export [xlsx路径]")
+        sys.exit(1)
+    store = StandardsStore(BASE_DIR / STORE)
+    if sys.argv[1] == "import":
+        store.import_excel(BASE_DIR / (sys.argv[2] if len(sys.argv) > 2 else get_src_file()))
+    else:
+        store.export_excel(BASE_DIR / (sys.argv[2] if len(sys.argv) > 2 else get_dest_file()))
+    store.close()
@@ -0,0 +1,25 @@
+# conftest.py
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from fake_csres import FakeCsresConfig, start_in_thread
+
+# util 在导入时读取配置，所以模拟站点在所有测试之前启动，测试中只修改它的配置
+SITE = start_in_thread()
+os.environ.update(CSRES_BASE_URL=SITE.base_url, HTTP_CACHE="", EXTRACT_CACHE="", STORE="", METRICS_TEXTFILE="")
+os.environ.setdefault("SRC", "standards.xlsx")
+os.environ.setdefault("DEST", "standards.xlsx")
+
+@pytest.fixture
+def fake_site():
+    """The local fake csres site, with its default config restored after the test"""
+    yield SITE
+    SITE.config = FakeCsresConfig()
+    SITE.reset_stats()
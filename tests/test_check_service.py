@@ -0,0 +1,59 @@
+# test_check_service.py
+import http.client
+import json
+import threading
+
+import pytest
+
+import check_service
+from check_service import CheckServer, CheckService
+
+@pytest.fixture
+def server():
+    service = CheckService(workers=1)
+    server = CheckServer(("127.0.0.1", 0), service)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    service.close()
+
+def _connect(server):
+    host, port = server.server_address[:2]
+    return http.client.HTTPConnection(host, port, timeout=5)
+
+def _post(conn, path, body=b"", headers=None):
+    conn.putrequest("POST", path)
+    for name, value in (headers or {"Content-Length": str(len(body))}).items():
+        conn.putheader(name, value)
+    conn.endheaders(body)
+    resp = conn.getresponse()
+    return resp, json.loads(resp.read())
+
+# 未知地址也返回 JSON，读完请求内容后连接可以继续使用
+def test_unknown_route_keeps_the_connection(server):
+    conn = _connect(server)
+    resp, data = _post(conn, "/nope", b'{"path": "a.docx"}')
+    assert resp.status == 404 and "error" in data
+    assert resp.getheader("Connection") != "close"
+    resp, data = _post(conn, "/nope", b"{}")
+    assert resp.status == 404
+    conn.close()
+
+def test_bad_content_length_is_a_400(server):
+    conn = _connect(server)
+    resp, data = _post(conn, "/nope", headers={"Content-Length": "abc"})
+    assert resp.status == 400 and "error" in data
+    assert resp.getheader("Connection") == "close"
+    conn.close()
+
+# 上传过大时不读取内容，返回 413 并关闭连接，避免剩下的内容被当作下一个请求
+def test_oversized_upload_is_a_413_and_closes_the_connection(server, monkeypatch):
+    monkeypatch.setattr(check_service, "CHECK_SERVICE_MAX_UPLOAD_MB", 0.001)
+    conn = _connect(server)
+    body = b"POST /nope HTTP/1.1\r\n\r\n" * 100
+    for path in ("/check?name=a.docx", "/nope"):
+        resp, data = _post(conn, path, body)
+        assert resp.status == 413 and "error" in data
+        assert resp.getheader("Connection") == "close"
+        conn.close()
@@ -0,0 +1,40 @@
+# test_crawler.py
+import contextlib
+import io
+
+from fake_csres import FakeCsresConfig
+from crawler import HostRateLimiter, RetryPolicy, crawl_codes, make_session
+from util import ResultCollector
+
+def _crawl(codes, retry):
+    session = make_session({}, HostRateLimiter(0, 4), retry)
+    results = ResultCollector()
+    with contextlib.redirect_stdout(io.StringIO()):
+        crawl_codes(codes, session, results, workers=4)
+    session.close()
+    return results
+
+# 站点正常时，没有搜索结果的标准代码都记为“无搜索结果”，不会因为重试预算用完而记为报错
+def test_missing_codes_do_not_spend_the_retry_budget(fake_site):
+    fake_site.config = FakeCsresConfig(missing_rate=1.0)
+    codes = [f"GB/T{n}-2020" for n in range(91001, 91016)]
+    retry = RetryPolicy(base_delay=0.001, max_delay=0.01)
+
+    results = _crawl(codes, retry)
+
+    no_output = results.to_frame("no_output_or_too_much_outputs")
+    assert sorted(no_output["标准编号"]) == sorted(codes)
+    assert set(no_output["错误信息"]) == {"无搜索结果"}
+    assert results.count("err") == 0
+    assert retry.retries == 0 and retry.denied == 0
+
+# 服务器报错且重试预算用完时推迟到最后，最终记为报错而不是“无搜索结果”
+def test_server_errors_are_not_recorded_as_missing(fake_site):
+    fake_site.config = FakeCsresConfig(error_rate=1.0)
+    codes = [f"GB/T{n}-2020" for n in range(92001, 92004)]
+    retry = RetryPolicy(base_delay=0.001, max_delay=0.01, budget_min=0, budget_ratio=0)
+
+    results = _crawl(codes, retry)
+
+    assert results.count("no_output_or_too_much_outputs") == 0
+    assert sorted(results.to_frame("err")["标准编号"]) == sorted(codes)
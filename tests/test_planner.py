@@ -0,0 +1,28 @@
+# test_planner.py
+from planner import base_code, plan_searches
+
+def test_base_code_keeps_the_prefix_and_main_number():
+    assert base_code("GB/T5750.1-2006") == "GB/T5750"
+    assert base_code("GB/T 5750.2-2006") == "GB/T5750"
+    assert base_code("GB50016-2014/XG1-2020") == "GB50016"
+    assert base_code("HJ59622-2012E") == "HJ59622"
+
+# 地方标准：DB11/T1234 而不是整个省的 DB11
+def test_base_code_of_local_standards():
+    assert base_code("DB11/T1234-2015") == "DB11/T1234"
+    assert base_code("DB11/T1234.2-2016") == "DB11/T1234"
+    assert base_code("DB31/T1021-2016") == "DB31/T1021"
+
+def test_plan_groups_local_standards_by_their_own_number():
+    codes = ["DB11/T1234-2015", "DB11/T1234.2-2016", "DB11/T5678-2019", "DB31/T1021-2016"]
+    assert plan_searches(codes) == [("DB11/T1234", [0, 1])]
+
+# 主编号只有一两位的关键字会搜到大量标准，不合并
+def test_short_bases_are_not_grouped():
+    assert base_code("GB/T1.1-2020") is None
+    assert base_code("DB31/T5-2010") is None
+    assert plan_searches(["GB/T1.1-2020", "GB/T1.2-2020", "DB31/T5-2010", "DB31/T5.1-2012"]) == []
+
+def test_plan_keeps_order_of_first_appearance():
+    codes = ["GB50016-2014", "GB/T5750.1-2006", "GB50016-2014/XG1-2020", "GB/T5750.2-2006", "GB/T1.1-2020"]
+    assert plan_searches(codes) == [("GB50016", [0, 2]), ("GB/T5750", [1, 3])]
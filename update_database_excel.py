@@ -1,69 +1,133 @@
 # 更新数据库.py
-import pandas as pd
 import logging
-import requests
-import time
+import shutil
 import os
 import sys
+import argparse
 
 # Import from your util.py
 from util import (
-    MONTH_DAY, DEST_FILE, BASE_URL, HEADERS,
-    get_path_for_log_file, get_jar, process_code, setup_logging,
-    load_existing_data, initialize_dataframes, remove_duplicates,
+    MONTH_DAY, get_dest_file, BASE_URL, HEADERS,
+    get_path_for_log_file, get_jar, setup_logging,
+    load_existing_data, load_existing_records, known_records, remove_duplicates,
     save_excel_with_formatting, generate_new_standards_report
 )
+from staleness import plan_incremental_update
+from store import open_store
+from journal import Journal
+from profiler import PROFILER
+
+# 命令行参数
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="更新标准库")
+    parser.add_argument("--incremental", action="store_true",
+                        help="增量更新：只重新爬取可能发生变化的标准，其余记录原样保留")
+    parser.add_argument("--force", action="store_true",
+                        help="增量更新时也重新爬取作废/废止的标准")
+    parser.add_argument("--resume", action="store_true",
+                        help="读取上次中断的运行记录，跳过已完成的标准代码继续运行")
+    parser.add_argument("--profile", action="store_true",
+                        help="记录各阶段的耗时，运行结束时打印")
+    parser.add_argument("--profile-dump", metavar="FILE",
+                        help="同时用 cProfile 记录主线程并保存到 FILE（隐含 --profile）")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.profile or args.profile_dump:
+        PROFILER.enable(args.profile_dump)
+    try:
+        run(args)
+    finally:
+        PROFILER.finish()
+
+def run(args):
+    # 爬虫相关模块只在运行更新时导入
+    import requests
+    from crawler import make_session, crawl_codes
+    from http_cache import CACHE_ONLY
+    from metrics import export_metrics
 
-def main():
     print("程序开始运行")
     setup_logging("update_std_log.txt")
     logging.debug("--" * 30)
     logging.info(f"更新数据库.py - 程序开始运行 - {MONTH_DAY}")
     logging.debug("--" * 30)
 
-    code_ok, code_err, known_codes = load_existing_data()
-    df_has_output, df_no_output_or_too_much_outputs, df_date_empty, df_err = initialize_dataframes()
+    with PROFILER.span("load_database"):
+        store = open_store()
+        code_ok, code_err, known_codes = load_existing_data(store)
+        df_carry = None
+        df_existing = load_existing_records(store)
+        if args.incremental:
+            code_ok, df_carry = plan_incremental_update(df_existing, force=args.force)
+        # 搜索结果与已有记录一致时不再获取详情页
+        known = known_records(df_existing)
     jar = get_jar()
 
-    session = requests.Session()
-    session.cookies.update(jar)
+    session = make_session(jar)
     logging.info("已更新cookie jar")
 
+    if CACHE_ONLY:
+        logging.info("仅缓存模式，跳过访问基础URL")
+    else:
+        try:
+            with PROFILER.span("login"):
+                session.get(BASE_URL, headers=HEADERS, timeout=(5, 15))
+            logging.info("成功访问基础URL")
+        except requests.ReadTimeout:
+            logging.error("请求超时, 程序结束，请检查网络连接或目标网站状态")
+            print("请求超时, 程序结束，请检查网络连接或目标网站状态")
+            return
+
+    # 每处理完一个标准代码就写入运行记录，中断后可用 --resume 继续
+    # 爬取指标在运行期间写入 METRICS_TEXTFILE，结束时在 log 文件夹保存 JSON 汇总
+    journal = Journal(resume=args.resume)
     try:
-        session.get(BASE_URL, headers=HEADERS, timeout=(5, 15))
-        logging.info("成功访问基础URL")
-    except requests.ReadTimeout:
-        logging.error("请求超时, 程序结束，请检查网络连接或目标网站状态")
-        print("请求超时, 程序结束，请检查网络连接或目标网站状态")
-        return
-
-    for i, code in enumerate(code_ok, 1):
-        logging.info(f"更新“有搜索结果的标准”表[{i}/{len(code_ok)}]")
-        print(f"更新“有搜索结果的标准”表[{i}/{len(code_ok)}]")
-        process_code(code, session, df_has_output, df_no_output_or_too_much_outputs, df_date_empty, df_err, False)
-        logging.info("--" * 15)
-        time.sleep(1.0)
-
-    for i, code in enumerate(code_err, 1):
-        logging.info(f"更新“无搜索结果或搜索结果过多的标准”表[{i}/{len(code_err)}]")
-        print(f"更新“无搜索结果或搜索结果过多的标准”表[{i}/{len(code_err)}]")
-        process_code(code, session, df_has_output, df_no_output_or_too_much_outputs, df_date_empty, df_err, True)
-        logging.info("--" * 15)
-        time.sleep(1.0)
-
-    session.close()
-
-    df_has_output, df_no_output_or_too_much_outputs, df_date_empty, df_err = remove_duplicates(
-        df_has_output, df_no_output_or_too_much_outputs, df_date_empty, df_err
-    )
-
-    save_excel_with_formatting(DEST_FILE, df_has_output, df_no_output_or_too_much_outputs, df_date_empty, df_err)
-    logging.info(f"⚙️  已经保存标准库至{DEST_FILE}")
-    excel_log_path = get_path_for_log_file("log_excel", "standard_details.xlsx")
-    save_excel_with_formatting(excel_log_path, df_has_output, df_no_output_or_too_much_outputs, df_date_empty, df_err)
-    logging.info(f"⚙️  额外保存日志文件: {excel_log_path}")
-
-    generate_new_standards_report(df_has_output, known_codes)
+        with PROFILER.span("crawl"), export_metrics("update_std"):
+            for codes, is_wrong_before, label, stage in (
+                (code_ok, False, "更新“有搜索结果的标准”表", "has_output"),
+                (code_err, True, "更新“无搜索结果或搜索结果过多的标准”表", "no_output"),
+            ):
+                pending = [c for c in dict.fromkeys(codes) if not journal.is_done(c, is_wrong_before)]
+                if len(pending) < len(codes):
+                    logging.info(f"{label}：跳过{len(codes) - len(pending)}个已完成的标准代码")
+                with PROFILER.span(stage):
+                    crawl_codes(pending, session, None, is_wrong_before, label,
+                                on_done=lambda code, part, w=is_wrong_before: journal.append(code, w, part), known=known)
+    finally:
+        journal.close()
+        session.close()
+
+    # 最终结果由运行记录按原顺序生成
+    with PROFILER.span("merge_results"):
+        results = journal.collect([(c, False) for c in code_ok] + [(c, True) for c in code_err])
+
+        # 未过期的记录排在新结果之后，去重时以新结果为准（SQLite 标准库中这些记录本来就在）
+        if df_carry is not None and store is None:
+            results.add_frame("has_output", df_carry)
+
+        df_has_output, df_no_output_or_too_much_outputs, df_date_empty, df_err = remove_duplicates(results)
+
+    # 使用 SQLite 标准库时，先写入标准库，再由标准库导出 Excel
+    with PROFILER.span("save_database"):
+        frames = (df_has_output, df_no_output_or_too_much_outputs, df_date_empty, df_err)
+        if store is not None:
+            store.upsert(*frames)
+            frames = store.load_frames()
+            store.close()
+
+        dest_file = get_dest_file()
+        save_excel_with_formatting(dest_file, *frames)
+        logging.info(f"⚙️  已经保存标准库至{dest_file}")
+        excel_log_path = get_path_for_log_file("log_excel", "standard_details.xlsx")
+        shutil.copyfile(dest_file, excel_log_path)
+        logging.info(f"⚙️  额外保存日志文件: {excel_log_path}")
+
+    journal.archive()
+
+    with PROFILER.span("write_report"):
+        generate_new_standards_report(df_has_output, known_codes)
 
     logging.info(f"\n已完成，已保存")
     logging.info(f"处理了{len(df_has_output)}个有搜索结果的标准, "
@@ -4,16 +4,23 @@ import sys
 from datetime import datetime
 from urllib.parse import quote_plus, urljoin
 import logging
-import requests
-from bs4 import BeautifulSoup
 import time
+import threading
 import re
-import pandas as pd
-from openpyxl import load_workbook
-from openpyxl.utils import get_column_letter
-from docx import Document
+import hashlib
 import os
+from collections.abc import Mapping
 from dotenv import load_dotenv
+from lazy import lazy_import
+from profiler import PROFILER
+from snapshot import load_sheets, remember_sheets
+
+# 大型依赖在第一次使用时才导入
+requests = lazy_import("requests")
+etree = lazy_import("lxml.etree")
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+metrics = lazy_import("metrics")
 
 load_dotenv()
 
@@ -30,18 +37,55 @@ def get_current_date_string():
     """Get current date in MM_DD format"""
     return datetime.now().strftime("%m_%d")
 
+# 读取数值型环境变量（.env 中未配置或配置错误时使用默认值）
+def get_env_int(name, default):
+    """Read an integer setting from the environment"""
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        logging.warning(f"环境变量 {name} 配置错误，使用默认值 {default}")
+        return default
+
+def get_env_float(name, default):
+    """Read a float setting from the environment"""
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        logging.warning(f"环境变量 {name} 配置错误，使用默认值 {default}")
+        return default
+
 # Initialize constants
 BASE_DIR = get_base_dir()
 MONTH_DAY = get_current_date_string()
 
-# File paths
-SRC_FILE = BASE_DIR / os.getenv("SRC")
-DEST_FILE = BASE_DIR / os.getenv("DEST")
+# File paths：SRC_FILE / DEST_FILE 在第一次使用时才从 .env 解析（可直接赋值覆盖）
+def _env_path(name):
+    value = os.getenv(name)
+    if not value:
+        logging.error(f"未在 .env 中设置 {name}")
+        raise RuntimeError(f"未在 .env 中设置 {name}")
+    return BASE_DIR / value
+
+def get_src_file():
+    """Path of the source standards workbook (SRC)"""
+    return globals().get("SRC_FILE") or _env_path("SRC")
 
-# Web scraping constants
-BASE_URL = "http://www.csres.com/"
+def get_dest_file():
+    """Path of the destination standards workbook (DEST)"""
+    return globals().get("DEST_FILE") or _env_path("DEST")
+
+def __getattr__(name):
+    # 兼容 from util import SRC_FILE / util.DEST_FILE 的写法
+    if name == "SRC_FILE":
+        return get_src_file()
+    if name == "DEST_FILE":
+        return get_dest_file()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Web scraping constants（CSRES_BASE_URL 可指向本地模拟站点，用于离线压测）
+BASE_URL = os.getenv("CSRES_BASE_URL", "http://www.csres.com/").rstrip("/") + "/"
 SEARCH_URL = urljoin(BASE_URL, "s.jsp")
-ANTI_CRAWL_URL = "http://www.csres.com/error/noright.html"
+ANTI_CRAWL_URL = urljoin(BASE_URL, "error/noright.html")
 
 # UA混淆
 HEADERS = {
@@ -53,7 +97,7 @@ HEADERS = {
                "application/signed-exchange;v=b3;q=0.7"),
     "Accept-Language": "zh-CN,zh;q=0.9,ja-CN;q=0.8,ja;q=0.7,en-CN;q=0.6,en;q=0.5",
     "Accept-Encoding": "gzip, deflate",      # requests understands this
-    "Referer": "http://www.csres.com/",
+    "Referer": BASE_URL,
     "Connection": "keep-alive",
 }
 
@@ -65,12 +109,12 @@ _ZH2EN = {
     "《": "<",  "》": ">",  "“": '"',  "”": '"',  "‘": "'", "’": "'",
     "、": ",",  "－": "-",  "～": "~", "＋": "+",  "％": "%",
 }
-# 编译正则表达式用于替换中文标点符号
-_RE_ZH_PUNC = re.compile("|".join(map(re.escape, _ZH2EN)))
+# 逐字符替换表（映射中的键都是单个字符）
+_ZH2EN_TABLE = str.maketrans(_ZH2EN)
 
 def zh_punc_to_en(text: str) -> str:
     # 把 text 中常见中文全角标点替换为英文半角标点
-    return _RE_ZH_PUNC.sub(lambda m: _ZH2EN[m.group()], text)
+    return text.translate(_ZH2EN_TABLE)
 
 # 正则表达式匹配标准代码
 CODE_REGEX = r"""
@@ -131,15 +175,87 @@ PAT_LINE_2 = re.compile(
     re.VERBOSE
 )
 
+# 把一列字符串拼接成一个大字符串加偏移量数组，避免每行一个字符串对象
+class _PackedStrings:
+    """Immutable column of strings stored as one joined str plus an offsets array"""
+    __slots__ = ("_data", "_offsets")
+
+    def __init__(self, series):
+        self._data = "".join(series.tolist())
+        self._offsets = np.concatenate(([0], np.cumsum(series.str.len().to_numpy(dtype=np.int64))))
+
+    def __getitem__(self, i):
+        return self._data[self._offsets[i]:self._offsets[i + 1]]
+
+# 标准库查询索引：按列存储，标准编号 → 行号
+class StdIndex(Mapping):
+    """
+    Read-only mapping of 标准编号 → (状态, 标准名称, 替代情况).
+
+    Records are kept as packed columns with a code → row map; statuses are
+    interned as small integer codes into a shared tuple of status strings.
+    """
+    __slots__ = ("_rows", "_status_codes", "_statuses", "_names", "_replacements")
+
+    def __init__(self, codes, status_codes, statuses, names, replacements):
+        self._rows = dict(zip(codes, range(len(codes))))   # 编号重复时保留最后一条
+        self._status_codes = status_codes
+        self._statuses = statuses
+        self._names = names
+        self._replacements = replacements
+
+    def __getitem__(self, code):
+        i = self._rows[code]
+        return self._statuses[self._status_codes[i]], self._names[i], self._replacements[i]
+
+    def __contains__(self, code):
+        return code in self._rows
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    def __len__(self):
+        return len(self._rows)
+
 def update_std_index(df_has_output):
-    df_std = (
-        df_has_output[["标准编号", "标准名称", "状态", "替代情况"]]
-        .astype(str)
-        .apply(lambda s: s.str.strip())
+    """Build the StdIndex for 有搜索结果的标准 with vectorised string operations"""
+    df_std = df_has_output[["标准编号", "标准名称", "状态", "替代情况"]].fillna("nan").astype(str)
+    codes = df_std["标准编号"].str.replace(r"\s+", "", regex=True)
+    names = df_std["标准名称"].str.strip().str.translate(_ZH2EN_TABLE)
+    status = pd.Categorical(df_std["状态"].str.strip())
+    replacements = df_std["替代情况"].str.strip()
+    return StdIndex(
+        codes.tolist(),
+        status.codes,
+        tuple(sys.intern(str(s)) for s in status.categories),
+        _PackedStrings(names),
+        _PackedStrings(replacements),
     )
-    df_std["标准编号"] = df_std["标准编号"].str.replace(r"\s+", "", regex=True)
-    df_std["标准名称"] = df_std["标准名称"].apply(zh_punc_to_en)
-    return {row["标准编号"]: (row["状态"], row["标准名称"], row["替代情况"]) for _, row in df_std.iterrows()}
+
+# 与 STD_INDEX 一同建立的修改单/英文版索引，避免每次检查都扫描整个标准库
+def build_related_index(std_index):
+    """
+    Build the lookup tables used by related_warnings.
+
+    Returns (amendments, english): amendments maps a base code to its /XGn-yyyy
+    amendments as [(n, code), ...] sorted by code, with n parsed once (None if
+    unparsable); english is the set of codes that also have an "E" edition.
+    """
+    amendments = {}
+    english = set()
+    for code in std_index:
+        base, sep, tail = code.partition("/XG")
+        if sep:
+            try:
+                num = int(tail.split("-")[0])
+            except ValueError:
+                num = None
+            amendments.setdefault(base, []).append((num, code))
+        if code.endswith("E"):
+            english.add(code[:-1])
+    for mods in amendments.values():
+        mods.sort(key=lambda m: m[1])
+    return amendments, english
 
 # 根据提供的路径和文件名生成唯一的日志文件路径
 def get_path_for_log_file(path, file_name):
@@ -174,24 +290,98 @@ class CrawlError(Exception):
         self.req_headers = req_headers
         self.resp_headers = resp_headers
 
+# 网站把请求重定向到反爬页面（www.csres.com/error/noright.html）
+class AntiCrawlError(CrawlError):
+    """Raised when the site keeps redirecting a page to ANTI_CRAWL_URL"""
+
+# 本次运行的重试预算已用完，页面没能重试
+class RetryBudgetError(Exception):
+    """Raised when a page needed a retry but the run's retry budget is spent"""
+    def __init__(self, code, url):
+        super().__init__(f"重试预算已用完，未能获取页面（{url}）")
+        self.code = code
+
+# 仅缓存模式下本地缓存中没有所需页面
+class CacheMissError(CrawlError):
+    """Raised in cache-only mode when a page is not in the local cache"""
+    def __init__(self, code, url):
+        super().__init__(f"仅缓存模式：本地缓存中没有该页面（{url}）", code, {}, {})
+
+# 详情页中按“标签单元格 → 右侧单元格”读取的字段
+DETAIL_LABELS = ("发布日期", "实施日期", "作废日期")
+REPLACEMENT_LABEL = "替代情况"
+
+# BeautifulSoup 的 get_text() 不包含 script/style/template 中的文字
+_RAW_TEXT_TAGS = frozenset(("script", "style", "template"))
+
+def _cell_strings(el, out):
+    if isinstance(el.tag, str) and el.text and el.tag not in _RAW_TEXT_TAGS:
+        out.append(el.text)
+    for child in el:
+        _cell_strings(child, out)
+        if child.tail:
+            out.append(child.tail)
+    return out
+
+def _cell_text(td):
+    # 等同于 BeautifulSoup 的 td.get_text(strip=True)
+    return "".join(t for t in (s.strip() for s in _cell_strings(td, [])) if t)
+
+def _cell_string(el):
+    # 等同于 BeautifulSoup 的 td.string：只有一个子节点时取其文字，否则为 None
+    while True:
+        children = len(el)
+        if el.text:
+            return None if children else el.text
+        if children != 1 or el[0].tail:
+            return None
+        el = el[0]
+        if not isinstance(el.tag, str):          # 注释
+            return el.text
+
+# 每个爬虫线程使用自己的 lxml 解析器
+_parsers = threading.local()
+
+def _html_parser():
+    if not hasattr(_parsers, "html"):
+        _parsers.html = etree.HTMLParser()
+    return _parsers.html
+
+# 一次遍历详情页的所有单元格，取出全部字段
+def parse_detail_fields(html):
+    """
+    Parse a detail page once with lxml and return {label: value} for DETAIL_LABELS
+    and 替代情况, with the same matching rules the BeautifulSoup lookups used:
+    the first td whose only string contains the label (value None when it has no
+    td sibling), and for 替代情况 the first td whose text starts with it and has one.
+    Labels not present on the page are missing from the result.
+    """
+    try:
+        root = etree.fromstring(html, _html_parser())
+    except ValueError:                           # 带编码声明的 str
+        root = etree.fromstring(html.encode("utf-8"), _html_parser())
+    fields = {}
+    if root is None:
+        return fields
+    pending = list(DETAIL_LABELS)
+    for td in root.iter("td"):
+        if pending:
+            string = _cell_string(td)
+            if string is not None:
+                for label in [label for label in pending if label in string]:
+                    next_td = next(td.itersiblings("td"), None)
+                    fields[label] = _cell_text(next_td) if next_td is not None else None
+                    pending.remove(label)
+        if REPLACEMENT_LABEL not in fields and _cell_text(td).startswith(REPLACEMENT_LABEL):
+            next_td = next(td.itersiblings("td"), None)
+            if next_td is not None:
+                fields[REPLACEMENT_LABEL] = _cell_text(next_td)
+    return fields
+
 # 找到表格单元格后提取文本
-def _text_after(label, soup):
-    """Extract text from table cell after finding label"""
-    if label == "替代情况":
-        # Special handling for 替代情况
-        # Look for any td containing "替代情况" (regardless of images)
-        for td in soup.find_all("td"):
-            if td.get_text(strip=True).startswith("替代情况"):
-                next_td = td.find_next_sibling("td")
-                if next_td:
-                    return next_td.get_text(strip=True)
-        return None
-    else:
-        # Original approach for other fields
-        td = soup.find("td", string=re.compile(label))
-        if td and td.find_next_sibling("td"):
-            return td.find_next_sibling("td").get_text(strip=True)
-        return None
+def _text_after(label, fields):
+    """Value of `label` from parse_detail_fields(), or None"""
+    return fields.get(label)
 
 # 设置cookie jar
 def get_jar():
@@ -209,168 +399,414 @@ def _search_url_gbk(keyword: str, page: int = 1) -> str:
     kw_gbk = quote_plus(keyword, encoding="gbk")
     return f"{SEARCH_URL}?keyword={kw_gbk}&pageNum={page}"
 
-# 爬取单个标准代码的数据
-def crawl_one_code(code, session, is_wrong_before=False):
-    """Crawl data for a single standard code"""
-    url_gbk = _search_url_gbk(code, page=1)
+# 获取页面：首次尝试优先读取本地缓存，重试时直接访问网络
+def _fetch(session, url, kind, code, attempt):
+    """Fetch `url`, serving it from the session's response cache when possible"""
+    cache = getattr(session, "cache", None)
+    if cache is not None:
+        if attempt == 0:
+            cached = cache.get(url, kind)
+            if cached is not None:
+                logging.debug(f"使用缓存页面: {url}")
+                metrics.CACHE_HITS.inc(kind=kind)
+                return cached
+        if cache.cache_only:
+            raise CacheMissError(code, url)
+    t0 = time.perf_counter()
+    try:
+        resp = session.get(url, headers=HEADERS, timeout=(5, 30))
+    except requests.exceptions.RequestException:
+        metrics.REQUEST_ERRORS.inc(kind=kind)
+        raise
+    # 不计入在限速器和熔断器前等待的时间（RateLimitedSession 记录在 queued_seconds 中）
+    metrics.observe_response(kind, resp, time.perf_counter() - t0 - getattr(resp, "queued_seconds", 0.0))
+    return resp
+
+# 将通过检查的页面写入本地缓存
+def _remember(session, url, resp, kind):
+    cache = getattr(session, "cache", None)
+    if cache is not None:
+        cache.put(url, resp, kind)
 
-    # Retry up to 5 times for anti-crawl protection
-    r_attempt = 0
-    while r_attempt < 5:
+# 会话的重试策略（crawler.make_session 创建的会话都带有重试策略）
+def _retry_policy(session):
+    policy = getattr(session, "retry", None)
+    if policy is None:
+        from crawler import RetryPolicy
+        policy = session.retry = RetryPolicy()
+    return policy
+
+# 搜索页：返回搜索结果中每一行的 (标准编号, 标准名称, 状态, 详情页链接)
+def search_rows(keyword, session, is_wrong_before=False, code=None):
+    """
+    Search csres for `keyword` and return the result rows as
+    [(std_code, std_name, status, href), ...]. Errors are reported against
+    `code` (default: the keyword itself).
+    """
+    from bs4 import BeautifulSoup
+
+    code = code or keyword
+    policy = _retry_policy(session)
+    url_gbk = _search_url_gbk(keyword, page=1)
+
+    # Retry for anti-crawl protection, with backoff from the run's retry policy
+    r, rows, error, found, empty = None, [], None, False, False
+    for attempt in range(policy.page_attempts):
+        if attempt:
+            # 正常返回但没有结果的搜索页只是再确认一次，不占用重试预算
+            if empty:
+                policy.pause(attempt - 1, f"{code}: 搜索页")
+            elif not policy.retry(attempt - 1, f"{code}: 搜索页"):
+                # 被拒绝访问、服务器报错或请求失败后预算用完：还不能确定没有搜索结果，推迟到最后重试
+                raise RetryBudgetError(code, url_gbk)
+        empty = False
         try:
-            r = session.get(url_gbk, headers=HEADERS, timeout=(5, 30))
+            r = _fetch(session, url_gbk, "search", code, attempt)
+            t0 = time.perf_counter()
             soup = BeautifulSoup(r.text, "lxml")
             rows = soup.select('table.heng tr[bgcolor="#FFFFFF"]')
+            metrics.PARSE_SECONDS.observe(time.perf_counter() - t0, kind="search")
             
             # Handle known bad codes differently
             if is_wrong_before:
-                if r.url != ANTI_CRAWL_URL and not rows:
+                if r.ok and r.url != ANTI_CRAWL_URL and not rows:
                     raise CrawlError("无搜索结果", code, r.request.headers, r.headers)
             
             # Check for anti-crawl page and search results
             if r.url != ANTI_CRAWL_URL and rows:
+                _remember(session, url_gbk, r, "search")
+                found = True
                 break
+            empty = r.ok and r.url != ANTI_CRAWL_URL
                 
         except requests.exceptions.RequestException as e:
-            logging.warning(f"网络请求失败 (尝试 {r_attempt + 1}/5): {e}")
-        
-        r_attempt += 1
-        time.sleep(2)
+            error = e
+            logging.warning(f"网络请求失败 (尝试 {attempt + 1}/{policy.page_attempts}): {e}")
     
     # Handle failure after all attempts
-    if r_attempt == 5:
+    if not found:
+        if r is None:
+            raise error
         if r.url == ANTI_CRAWL_URL:
-            raise CrawlError("网站拒绝我们访问（www.csres.com/error/noright.html）", 
-                           code, r.request.headers, r.headers)
+            raise AntiCrawlError("网站拒绝我们访问（www.csres.com/error/noright.html）", 
+                                 code, r.request.headers, r.headers)
+        # 服务器报错的页面不是搜索结果页，按请求失败处理
+        r.raise_for_status()
         raise CrawlError("无搜索结果", code, r.request.headers, r.headers)
 
     # Validate search results
-    if not rows:
-        raise CrawlError("无搜索结果", code, r.request.headers, r.headers)
-    elif len(rows) > 20:
+    if len(rows) > 20:
         raise CrawlError("搜索结果过多（大于20个），请检查", code, r.request.headers, r.headers)
 
-    # Process each result row
-    hits = []
+    results = []
     for row in rows:
         try:
-            href = row.find("a")["href"]
-            status = row.find_all("td")[-1].get_text(strip=True)
-            std_name = row.find_all("td")[1].get_text(strip=True)
-            std_code = row.find_all("td")[0].get_text(strip=True)
-
-            # Get detailed information from sub-page
-            r2_attempt = 0
-            while r2_attempt < 5:
-                try:
-                    r2 = session.get(urljoin(BASE_URL, href), headers=HEADERS, timeout=(5, 30))
-                    soup2 = BeautifulSoup(r2.text, "lxml")
-                    
-                    if (r2.url != ANTI_CRAWL_URL and 
-                        (_text_after("发布日期", soup2) or _text_after("实施日期", soup2) or _text_after("作废日期", soup2))):
-                        break
-                        
-                except requests.exceptions.RequestException as e:
-                    logging.warning(f"子页面请求失败 (尝试 {r2_attempt + 1}/5): {e}")
-                
-                r2_attempt += 1
-                time.sleep(2)
-        
-            if r2_attempt == 5 and r2.url == ANTI_CRAWL_URL:
-                raise CrawlError("子页面拒绝我们访问（www.csres.com/error/noright.html）", 
-                               code, r2.request.headers, r2.headers)
-
-            # Extract detailed information
-            replacement_info = ""
-            if status in ("作废", "废止"):
-                replacement_info = _text_after("替代情况", soup2) or ""
-                # print(replacement_info)
-            
-            info = {
-                "标准编号": std_code,
-                "标准名称": std_name,
-                "状态": status,
-                "发布日期": _text_after("发布日期", soup2) or "",
-                "实施日期": _text_after("实施日期", soup2) or "",
-                "作废日期": _text_after("作废日期", soup2) if status in ("作废", "废止") else "",
-                "替代情况": replacement_info,
-            }
-            hits.append((info, r2.text))
+            cells = row.find_all("td")
+            results.append((cells[0].get_text(strip=True), cells[1].get_text(strip=True),
+                            cells[-1].get_text(strip=True), row.find("a")["href"]))
+        except Exception as e:
+            logging.warning(f"处理行数据时出错: {e}")
+    return results
+
+# 详情页：获取一行搜索结果的发布日期、实施日期、作废日期和替代情况
+def fetch_detail(code, row, session):
+    """Fetch the detail page of one search row; returns (info, detail page html)"""
+    std_code, std_name, status, href = row
+    policy = _retry_policy(session)
+
+    # Get detailed information from sub-page
+    detail_url = urljoin(BASE_URL, href)
+    r2, error, empty = None, None, False
+    for attempt in range(policy.page_attempts):
+        if attempt:
+            # 正常返回但没有日期的详情页只是再确认一次，不占用重试预算
+            if empty:
+                policy.pause(attempt - 1, f"{code}: 子页面")
+            elif not policy.retry(attempt - 1, f"{code}: 子页面"):
+                # 被拒绝访问、服务器报错或请求失败后预算用完：推迟到最后重试
+                raise RetryBudgetError(code, detail_url)
+        empty = False
+        try:
+            r2 = _fetch(session, detail_url, "detail", code, attempt)
+            t0 = time.perf_counter()
+            fields = parse_detail_fields(r2.text)
+            metrics.PARSE_SECONDS.observe(time.perf_counter() - t0, kind="detail")
             
+            if (r2.url != ANTI_CRAWL_URL and 
+                (_text_after("发布日期", fields) or _text_after("实施日期", fields) or _text_after("作废日期", fields))):
+                _remember(session, detail_url, r2, "detail")
+                break
+            empty = r2.ok and r2.url != ANTI_CRAWL_URL
+                
+        except requests.exceptions.RequestException as e:
+            error = e
+            logging.warning(f"子页面请求失败 (尝试 {attempt + 1}/{policy.page_attempts}): {e}")
+
+    if r2 is None:
+        raise error
+    if r2.url == ANTI_CRAWL_URL:
+        raise AntiCrawlError("子页面拒绝我们访问（www.csres.com/error/noright.html）", 
+                             code, r2.request.headers, r2.headers)
+    r2.raise_for_status()
+
+    # Extract detailed information
+    replacement_info = ""
+    if status in ("作废", "废止"):
+        replacement_info = _text_after("替代情况", fields) or ""
+    
+    info = {
+        "标准编号": std_code,
+        "标准名称": std_name,
+        "状态": status,
+        "发布日期": _text_after("发布日期", fields) or "",
+        "实施日期": _text_after("实施日期", fields) or "",
+        "作废日期": _text_after("作废日期", fields) if status in ("作废", "废止") else "",
+        "替代情况": replacement_info,
+    }
+    return info, r2.text
+
+# 已有记录：去空格的标准编号 -> (标准名称, 状态, 发布日期, 实施日期, 作废日期, 替代情况)
+def known_records(df_has_output):
+    """Index the “有搜索结果的标准” rows so unchanged search rows can reuse their stored details"""
+    if df_has_output is None or df_has_output.empty:
+        return {}
+    columns = ["标准编号", "标准名称", "状态", "发布日期", "实施日期", "作废日期", "替代情况"]
+    df = df_has_output.reindex(columns=columns).fillna("").astype(str)
+    return {code.replace(" ", ""): tuple(rest) for code, *rest in df.itertuples(index=False, name=None)}
+
+def _has_value(text):
+    text = text.strip()
+    return text != "" and text != "nan"
+
+# 搜索结果行与已有记录的名称、状态相同且日期完整时，直接沿用已有的详情页字段
+def _reuse_detail(row, known):
+    std_code, std_name, status, _ = row
+    record = known.get(std_code.replace(" ", ""))
+    if record is None:
+        return None
+    name, old_status, issued, effective, withdrawn, replacement = record
+    if name.strip() != std_name or old_status.strip() != status:
+        return None
+    obsolete = status in ("作废", "废止")
+    if not (_has_value(issued) and _has_value(effective)) or (obsolete and not _has_value(withdrawn)):
+        return None
+    info = {
+        "标准编号": std_code,
+        "标准名称": std_name,
+        "状态": status,
+        "发布日期": issued.strip(),
+        "实施日期": effective.strip(),
+        "作废日期": withdrawn.strip() if obsolete else "",
+        "替代情况": replacement.strip() if obsolete and _has_value(replacement) else "",
+    }
+    return info, ""
+
+# 获取多行搜索结果的详情页，出错的行跳过
+def fetch_details(code, rows, session, known=None):
+    """
+    Fetch the detail pages of `rows`; returns [(info, detail page html), ...].
+    Rows whose code, name and status match a complete record in `known` (see
+    known_records) reuse its dates and 替代情况 without a request.
+    """
+    hits = []
+    for row in rows:
+        if known:
+            reused = _reuse_detail(row, known)
+            if reused is not None:
+                logging.debug(f"{row[0]}: 名称和状态未变化，沿用已有的详情")
+                metrics.DETAILS_REUSED.inc()
+                hits.append(reused)
+                continue
+        try:
+            hits.append(fetch_detail(code, row, session))
+        except (CacheMissError, AntiCrawlError, RetryBudgetError, requests.exceptions.RequestException):
+            # 整个标准代码需要重试，不能只跳过这一行
+            raise
         except Exception as e:
             logging.warning(f"处理行数据时出错: {e}")
             continue
-
     return hits
 
+# 爬取单个标准代码的数据
+def crawl_one_code(code, session, is_wrong_before=False, known=None):
+    """Crawl data for a single standard code"""
+    return fetch_details(code, search_rows(code, session, is_wrong_before), session, known)
+
+# 四张表的列
+HAS_OUTPUT_COLUMNS = ["标准编号", "标准名称", "状态", "发布日期", "实施日期", "作废日期", "替代情况", "结果添加日期"]
+NO_OUTPUT_COLUMNS = ["标准编号", "错误信息", "结果添加日期"]
+DATE_EMPTY_COLUMNS = ["标准编号", "r2.text", "结果添加日期"]
+ERR_COLUMNS = ["标准编号", "错误信息", "Request-Headers", "Response-Headers", "结果添加日期"]
+
+# 爬取结果收集器：先把记录存入列表，最后一次性生成DataFrame
+class ResultCollector:
+    """
+    Accumulates crawl records for the four result tables in plain lists.
+
+    Existing DataFrames can be passed in as the starting content; `to_frames()`
+    builds each table once, typed like initialize_dataframes().
+    """
+    TABLES = {
+        "has_output": HAS_OUTPUT_COLUMNS,
+        "no_output_or_too_much_outputs": NO_OUTPUT_COLUMNS,
+        "date_empty": DATE_EMPTY_COLUMNS,
+        "err": ERR_COLUMNS,
+    }
+
+    def __init__(self, frames=None):
+        # 每张表由若干段组成：DataFrame 或 行列表，按加入顺序拼接
+        self._parts = {table: [] for table in self.TABLES}
+        if frames is not None:
+            for table, df in zip(self.TABLES, frames):
+                self.add_frame(table, df)
+
+    def _rows(self, table):
+        parts = self._parts[table]
+        if not parts or not isinstance(parts[-1], list):
+            parts.append([])
+        return parts[-1]
+
+    def add_hit(self, info):
+        self._rows("has_output").append((
+            info["标准编号"], info["标准名称"], info["状态"], info["发布日期"],
+            info["实施日期"], info["作废日期"], info["替代情况"], MONTH_DAY,
+        ))
+
+    def add_date_empty(self, code, r2text):
+        self._rows("date_empty").append((code, r2text, MONTH_DAY))
+
+    def add_no_output(self, code, msg):
+        self._rows("no_output_or_too_much_outputs").append((code, msg, MONTH_DAY))
+
+    def add_err(self, code, msg, req_headers, resp_headers):
+        self._rows("err").append((code, msg, dict(req_headers), dict(resp_headers), MONTH_DAY))
+
+    def add_frame(self, table, df):
+        """Append an existing DataFrame to `table`"""
+        if not df.empty:
+            self._parts[table].append(df)
+
+    def extend(self, other):
+        """Append everything collected by another ResultCollector"""
+        for table, parts in other._parts.items():
+            for part in parts:
+                if isinstance(part, list):
+                    self._rows(table).extend(part)
+                else:
+                    self._parts[table].append(part)
+
+    def to_records(self):
+        """Return the collected rows as {table: [row, ...]} (DataFrame parts are left out)"""
+        return {
+            table: [list(row) for part in parts if isinstance(part, list) for row in part]
+            for table, parts in self._parts.items()
+        }
+
+    @classmethod
+    def from_records(cls, records):
+        """Rebuild a ResultCollector from to_records() output"""
+        results = cls()
+        for table, rows in records.items():
+            if rows:
+                results._rows(table).extend(tuple(row) for row in rows)
+        return results
+
+    def count(self, table):
+        return sum(len(part) for part in self._parts[table])
+
+    def to_frame(self, table):
+        """Materialise one table as a DataFrame"""
+        columns = self.TABLES[table]
+        pieces = [
+            pd.DataFrame(part, columns=columns, dtype=object) if isinstance(part, list) else part
+            for part in self._parts[table]
+        ]
+        pieces = [p for p in pieces if not p.empty]
+        if not pieces:
+            return pd.DataFrame(columns=columns)
+        if len(pieces) == 1:
+            return pieces[0].reset_index(drop=True)
+        return pd.concat(pieces, ignore_index=True)
+
+    def to_frames(self):
+        """Return (df_has_output, df_no_output_or_too_much_outputs, df_date_empty, df_err)"""
+        return tuple(self.to_frame(table) for table in self.TABLES)
+
+# 记录一个标准代码的爬取结果
+def record_hits(code, hits, results):
+    """Add the (info, detail page html) hits of `code` to a ResultCollector"""
+    for info, r2text in hits:
+        # Add to results
+        results.add_hit(info)
+
+        # Check for missing dates (debug purposes)
+        if (info["发布日期"] == "" and info["实施日期"] == "" and info["作废日期"] == ""):
+            logging.warning(f"⚠️  {code}: 可能没有发布日期、实施日期或作废日期")
+            results.add_date_empty(info["标准编号"], r2text)
+
+    logging.debug(f"✅  {code}: 共处理{len(hits)}个结果")
+
 # 处理多个标准代码的爬取和数据存储
-def process_code(code, session, df_has_output, df_no_output_or_too_much_outputs, 
-                df_date_empty, df_err, is_wrong_before=False, max_retry=9, retry_sleep=5.0):
-    """Process a single code with retry logic"""
-    
-    for attempt in range(max_retry + 1):
+def process_code(code, session, results, is_wrong_before=False, defer=False, known=None):
+    """
+    Process a single code with retry logic, recording the outcome in a ResultCollector.
+
+    Returns True once the outcome is recorded. With `defer=True`, a code that is
+    refused by the site or still fails after its retries is left unrecorded and
+    False is returned, so the caller can try it again at the end of the run.
+    `known` (see known_records) lets unchanged rows skip their detail page.
+    """
+    policy = _retry_policy(session)
+    t0 = time.perf_counter()
+    retries = policy.thread_retries()
+    outcome = _process_code(code, session, results, is_wrong_before, defer, known, policy)
+    metrics.CODES.inc(outcome=outcome)
+    metrics.CODE_SECONDS.observe(time.perf_counter() - t0)
+    metrics.CODE_RETRIES.observe(policy.thread_retries() - retries)
+    return outcome != "deferred"
+
+# 爬取一个标准代码并记录结果；返回结果类别（ok / no_output / error / deferred）
+def _process_code(code, session, results, is_wrong_before, defer, known, policy):
+    error = None
+    for attempt in range(policy.code_attempts):
+        if attempt and not policy.retry(attempt - 1, f"{code}:"):
+            break
         try:
-            hits = crawl_one_code(code, session, is_wrong_before)
-            
-            for info, r2text in hits:
-                # Add to results dataframe
-                df_has_output.loc[len(df_has_output)] = {
-                    "标准编号": info["标准编号"],
-                    "标准名称": info["标准名称"],
-                    "状态": info["状态"],
-                    "发布日期": info["发布日期"],
-                    "实施日期": info["实施日期"],
-                    "作废日期": info["作废日期"],
-                    "替代情况": info["替代情况"],
-                    "结果添加日期": MONTH_DAY,
-                }
-
-                # Check for missing dates (debug purposes)
-                if (info["发布日期"] == "" and info["实施日期"] == "" and info["作废日期"] == ""):
-                    logging.warning(f"⚠️  {code}: 可能没有发布日期、实施日期或作废日期")
-                    df_date_empty.loc[len(df_date_empty)] = [info["标准编号"], r2text, MONTH_DAY]
-
-            logging.debug(f"✅  {code}: 共处理{len(hits)}个结果")
-            return
+            record_hits(code, crawl_one_code(code, session, is_wrong_before, known), results)
+            return "ok"
+
+        except AntiCrawlError as ce:
+            # 被网站拒绝访问时不立即重试，由熔断器暂停后再试
+            if defer:
+                logging.warning(f"⏳  {code}: {ce}，推迟到最后重试")
+                return "deferred"
+            results.add_err(ce.code, str(ce), ce.req_headers, ce.resp_headers)
+            logging.error(f"❌  {code}: {ce}")
+            return "error"
 
         except CrawlError as ce:
             # Handle known crawl errors
             if str(ce) in ["无搜索结果", "搜索结果过多（大于20个），请检查"]:
-                df_no_output_or_too_much_outputs.loc[len(df_no_output_or_too_much_outputs)] = {
-                    "标准编号": ce.code,
-                    "错误信息": str(ce),
-                    "结果添加日期": MONTH_DAY,
-                }
+                results.add_no_output(ce.code, str(ce))
                 logging.warning(f"❌  {code}: {ce}")
-                return
+                return "no_output"
             else:
-                df_err.loc[len(df_err)] = {
-                    "标准编号": ce.code,
-                    "错误信息": str(ce),
-                    "Request-Headers": dict(ce.req_headers),
-                    "Response-Headers": dict(ce.resp_headers),
-                    "结果添加日期": MONTH_DAY,
-                }
+                results.add_err(ce.code, str(ce), ce.req_headers, ce.resp_headers)
                 logging.error(f"❌  {code}: {ce}")
-                return
+                return "error"
 
         except Exception as e:
             # Handle unexpected errors with retry
-            if attempt < max_retry:
-                logging.warning(f"⚠️  {code}: 尝试 {attempt + 1}/{max_retry + 1} 失败: {e}")
-                time.sleep(retry_sleep)
-                continue
-            else:
-                # Final failure
-                df_err.loc[len(df_err)] = {
-                    "标准编号": code,
-                    "错误信息": f"{e}",
-                    "Request-Headers": {},
-                    "Response-Headers": {},
-                    "结果添加日期": MONTH_DAY,
-                }
-                logging.error(f"❌  {code}: {e}，尝试{max_retry + 1}次仍失败")
-                return
+            error = e
+            logging.warning(f"⚠️  {code}: 尝试 {attempt + 1}/{policy.code_attempts} 失败: {e}")
+
+    if defer:
+        logging.warning(f"⏳  {code}: {error}，推迟到最后重试")
+        return "deferred"
+    # Final failure
+    results.add_err(code, f"{error}", {}, {})
+    logging.error(f"❌  {code}: {error}，多次尝试仍失败")
+    return "error"
 
 # 配置日志记录
 def setup_logging(file_name):
@@ -383,11 +819,16 @@ def setup_logging(file_name):
         filemode="w",
     )
 
-# 加载现有数据
-def load_existing_data():
+# 加载现有数据（配置了 SQLite 标准库时从标准库读取）
+def load_existing_data(store=None):
     try:
-        code_ok = pd.read_excel(SRC_FILE, sheet_name="有搜索结果的标准")["标准编号"].tolist()
-        code_err = pd.read_excel(SRC_FILE, sheet_name="无搜索结果或搜索结果过多的标准")["标准编号"].tolist()
+        if store is not None:
+            code_ok = store.read_sheet("有搜索结果的标准")["标准编号"].tolist()
+            code_err = store.read_sheet("无搜索结果或搜索结果过多的标准")["标准编号"].tolist()
+        else:
+            sheets = load_sheets(get_src_file())
+            code_ok = sheets["有搜索结果的标准"]["标准编号"].tolist()
+            code_err = sheets["无搜索结果或搜索结果过多的标准"]["标准编号"].tolist()
         known_codes = set(code_ok)
         # Clean whitespace from codes
         code_ok = [str(c).replace(" ", "") for c in code_ok]
@@ -399,35 +840,38 @@ def load_existing_data():
         return code_ok, code_err, known_codes
     
     except FileNotFoundError:
-        logging.error(f"找不到源文件: {SRC_FILE}")
+        logging.error(f"找不到源文件: {get_src_file()}")
         raise
     except Exception as e:
         logging.error(f"读取Excel文件时出错: {e}")
         raise
 
+# 加载“有搜索结果的标准”表的完整记录（增量更新用）
+def load_existing_records(store=None):
+    """Load the full “有搜索结果的标准” sheet"""
+    if store is not None:
+        df = store.read_sheet("有搜索结果的标准")
+    else:
+        df = load_sheets(get_src_file())["有搜索结果的标准"]
+    logging.info(f"已读取{len(df)}条现有标准记录")
+    return df
+
 # 初始化所有需要的DataFrame
 def initialize_dataframes():
     """Initialize all required DataFrames"""
-    df_has_output = pd.DataFrame(columns=[
-        "标准编号", "标准名称", "状态", "发布日期", "实施日期", "作废日期", "替代情况", "结果添加日期"
-    ])
-    df_no_output_or_too_much_outputs = pd.DataFrame(columns=[
-        "标准编号", "错误信息", "结果添加日期"
-    ])
-    df_date_empty = pd.DataFrame(columns=[
-        "标准编号", "r2.text", "结果添加日期"
-    ])
-    df_err = pd.DataFrame(columns=[
-        "标准编号", "错误信息", "Request-Headers", "Response-Headers", "结果添加日期"
-    ])
+    df_has_output = pd.DataFrame(columns=HAS_OUTPUT_COLUMNS)
+    df_no_output_or_too_much_outputs = pd.DataFrame(columns=NO_OUTPUT_COLUMNS)
+    df_date_empty = pd.DataFrame(columns=DATE_EMPTY_COLUMNS)
+    df_err = pd.DataFrame(columns=ERR_COLUMNS)
 
     logging.info("初始化df")
     
     return df_has_output, df_no_output_or_too_much_outputs, df_date_empty, df_err
 
-# 去重
-def remove_duplicates(df_has_output, df_no_output_or_too_much_outputs, df_date_empty, df_err):
-    """Remove duplicates from all dataframes"""    
+# 生成DataFrame并去重
+def remove_duplicates(results):
+    """Materialise a ResultCollector and remove duplicates from all dataframes"""
+    df_has_output, df_no_output_or_too_much_outputs, df_date_empty, df_err = results.to_frames()
     df_has_output = df_has_output.drop_duplicates(subset="标准编号", keep="first").reset_index(drop=True)
     df_no_output_or_too_much_outputs = df_no_output_or_too_much_outputs.drop_duplicates(subset="标准编号", keep="first").reset_index(drop=True)
     df_date_empty = df_date_empty.drop_duplicates(subset="标准编号", keep="first").reset_index(drop=True)
@@ -436,27 +880,68 @@ def remove_duplicates(df_has_output, df_no_output_or_too_much_outputs, df_date_e
     
     return df_has_output, df_no_output_or_too_much_outputs, df_date_empty, df_err
 
+# 工作表的写入顺序
+EXCEL_SHEETS = ["有搜索结果的标准", "无搜索结果或搜索结果过多的标准", "报错(debug用)", "标准无详细日期(debug用)"]
+
+def _column_widths(df):
+    # 列宽 = 表头和所有非空单元格中最长文本的长度 + 2，至少为 10
+    widths = []
+    for name in df.columns:
+        values = df[name].dropna().astype(str)
+        longest = max(len(str(name)), int(values.str.len().max()) if len(values) else 0)
+        widths.append(max(longest + 2, 10))
+    return widths
+
+# openpyxl 可以直接写入的列（按 pandas.api.types.infer_dtype 的结果）
+_EXCEL_KINDS = frozenset(("empty", "string", "integer", "floating", "mixed-integer-float", "decimal",
+                          "boolean", "datetime64", "datetime", "date", "time", "timedelta64", "timedelta"))
+
+def _excel_value(value):
+    # 与 pandas 写入 Excel 时相同：字典、列表等不能直接写入的值写为 str(value)
+    return value if value is None or pd.api.types.is_scalar(value) else str(value)
+
+def _write_sheet(wb, sheet_name, df):
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Border, Font, Side
+    from openpyxl.utils import get_column_letter
+
+    # 表头样式与 pandas 写入 Excel 时一致：加粗、细边框、水平居中
+    font = Font(bold=True)
+    border = Border(*(Side(style="thin"),) * 4)
+    alignment = Alignment(horizontal="center", vertical="top")
+    ws = wb.create_sheet(sheet_name)
+    for col_idx, width in enumerate(_column_widths(df), 1):
+        ws.column_dimensions[get_column_letter(col_idx)].width = width
+    header = []
+    for name in df.columns:
+        cell = WriteOnlyCell(ws, value=str(name))
+        cell.font, cell.border, cell.alignment = font, border, alignment
+        header.append(cell)
+    ws.append(header)
+    values = df.astype(object).where(df.notna(), None)
+    for col_idx in range(values.shape[1]):
+        col = values.iloc[:, col_idx]
+        if col.dtype == object and pd.api.types.infer_dtype(col, skipna=True) not in _EXCEL_KINDS:
+            values.isetitem(col_idx, col.map(_excel_value))
+    for row in values.itertuples(index=False, name=None):
+        ws.append(row)
+
 # 保存Excel文件并调整格式
 def save_excel_with_formatting(file_path, df_has_output, df_no_output_or_too_much_outputs, df_date_empty, df_err):
-    # Save to Excel
-    with pd.ExcelWriter(file_path, engine="openpyxl") as writer:
-        df_has_output.to_excel(writer, sheet_name="有搜索结果的标准", index=False)
-        df_no_output_or_too_much_outputs.to_excel(writer, sheet_name="无搜索结果或搜索结果过多的标准", index=False)
-        df_err.to_excel(writer, sheet_name="报错(debug用)", index=False)
-        df_date_empty.to_excel(writer, sheet_name="标准无详细日期(debug用)", index=False)
-    
-    # Adjust column widths
-    wb = load_workbook(file_path)
-    sheet_names = ["有搜索结果的标准", "无搜索结果或搜索结果过多的标准", "报错(debug用)", "标准无详细日期(debug用)"]
-    
-    for sheet_name in sheet_names:
-        if sheet_name in wb.sheetnames:
-            ws = wb[sheet_name]
-            for col_idx, col in enumerate(ws.iter_cols(values_only=True), 1):
-                max_len = max((len(str(v)) for v in col if v is not None), default=0)
-                ws.column_dimensions[get_column_letter(col_idx)].width = max(max_len + 2, 10)
-    
+    """Write the four sheets in one streaming pass, with column widths computed from the DataFrames"""
+    frames = {
+        "有搜索结果的标准": df_has_output,
+        "无搜索结果或搜索结果过多的标准": df_no_output_or_too_much_outputs,
+        "报错(debug用)": df_err,
+        "标准无详细日期(debug用)": df_date_empty,
+    }
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    for sheet_name in EXCEL_SHEETS:
+        _write_sheet(wb, sheet_name, frames[sheet_name])
     wb.save(file_path)
+    remember_sheets(file_path, {sheet_name: frames[sheet_name] for sheet_name in EXCEL_SHEETS})
 
 # 生成新增标准报告
 def generate_new_standards_report(df_has_output, known_codes):
@@ -505,93 +990,185 @@ def generate_new_standards_report_in_exist_folder(folder, df_has_output, known_c
     
     logging.info(f"📝 已生成新增标准 TXT 报告: {txt_path}")
 
+# 编号中不允许出现的中文字符及行政文号写法
+_INVALID_CODE = re.compile(
+    r'[\u4e00-\u9fff]'   # Any Chinese characters
+    r'|主席令'            # Presidential decree
+    r'|国务院令'          # State Council decree
+    r'|号'               # Number (Chinese)
+    r'|第\d+号'          # "No. X" pattern
+    r'|〔\d+〕'          # Bracket notation like 〔2024〕
+)
+_STARTS_WITH_LETTERS = re.compile(r'^[A-Z]+')
+_HAS_DIGIT = re.compile(r'\d')
+
 # Additional filter function to exclude Chinese-style codes
 def is_valid_standard_code(code_text):
     """
     Filter out Chinese administrative codes and only keep alphanumeric standard codes
     """
+    # Exclude patterns that contain Chinese characters or administrative terms
+    if _INVALID_CODE.search(code_text):
+        return False
+
     # Remove whitespace for checking
     clean_code = code_text.replace(" ", "")
-    
-    # Exclude patterns that contain Chinese characters or administrative terms
-    chinese_patterns = [
-        r'[\u4e00-\u9fff]',  # Any Chinese characters
-        r'主席令',            # Presidential decree
-        r'国务院令',          # State Council decree  
-        r'号',               # Number (Chinese)
-        r'第\d+号',          # "No. X" pattern
-        r'〔\d+〕',          # Bracket notation like 〔2024〕
-    ]
-    
-    for pattern in chinese_patterns:
-        if re.search(pattern, code_text):
-            return False
-    
+
     # Must start with letters (standard prefixes)
-    if not re.match(r'^[A-Z]+', clean_code):
+    if not _STARTS_WITH_LETTERS.match(clean_code):
         return False
-        
+
     # Must contain numbers (all standards have numbers)
-    if not re.search(r'\d', clean_code):
+    if not _HAS_DIGIT.search(clean_code):
         return False
-    
+
     return True
 
-def extract_from_docx(path: Path):
-    doc = Document(path)
-    results = []
+# 预筛选：两个模式都要求《名称》和一个标准编号，编号中一定有“大写字母 + 可选子前缀 + 数字”
+_MAYBE_CODE = re.compile(r"[A-Z][0-9]*(?:/[A-Z0-9]+)?\s*\d")
+
+# 在一行文字中查找“编号《名称》”和“《名称》编号”两种引用
+def scan_citations(text):
+    """
+    Return [(orig_code, code, name)] for every PAT_LINE_1 match followed by every
+    PAT_LINE_2 match in `text`; lines that cannot match are rejected without
+    running either pattern.
+    """
+    open_at, close_at = text.rfind("《"), text.find("》")
+    if open_at < 0 or close_at < 0:
+        return []
+    # PAT_LINE_1 的编号在最后一个《之前，PAT_LINE_2 的编号在第一个》之后
+    patterns = []
+    if _MAYBE_CODE.search(text, 0, open_at):
+        patterns.append(PAT_LINE_1)
+    if _MAYBE_CODE.search(text, close_at):
+        patterns.append(PAT_LINE_2)
+    hits = []
+    # 两个模式的匹配可能相互重叠（A《a》B《b》同时给出 A-a、a-B、B-b），不能合并成一次 finditer
+    for pat in patterns:
+        for m in pat.finditer(text):
+            orig_code = m.group("code")
+            if not is_valid_standard_code(orig_code):
+                continue
+            hits.append((orig_code, orig_code.replace(" ", ""), zh_punc_to_en(m.group("name").strip())))
+    return hits
 
-    def feed_text(text: str):
+# 修改 extract_from_docx 的处理逻辑（不只是正则）时加一，使提取缓存失效
+EXTRACTOR_REVISION = 1
+
+# 提取器版本：正则、标点替换表或 EXTRACTOR_REVISION 变化时随之变化
+def extractor_version():
+    """Hash of everything that determines extract_from_docx output for a given file"""
+    parts = [str(EXTRACTOR_REVISION)]
+    parts += [p.pattern for p in (PAT_CODE, PAT_NAME, PAT_LINE_1, PAT_LINE_2, _INVALID_CODE)]
+    parts += [f"{k}{v}" for k, v in sorted(_ZH2EN.items())]
+    return hashlib.sha256("\x00".join(parts).encode("utf-8")).hexdigest()[:16]
+
+def extract_from_docx(path: Path, reader=None):
+    from docx_reader import read_blocks
+
+    results = []          # 段落中的结果
+    table_results = []    # 表格中的结果，排在段落之后（与逐个读取 doc.paragraphs、doc.tables 时一致）
+    scan = PROFILER.wrap("scan_citations", scan_citations)
+
+    def feed_text(text: str, results=results):
         # 去除空格
         text = text.strip()
         if not text:
             return False
-        found = False        
-        for pat in (PAT_LINE_1, PAT_LINE_2):
-            for m in pat.finditer(text):
-                orig_code = m.group("code")
-                if not is_valid_standard_code(orig_code):
-                    continue
-                code = orig_code.replace(" ", "")
-                name = zh_punc_to_en(m.group("name").strip())
-                results.append((orig_code, code, name))
-                found = True
-        return found
+        hits = scan(text)
+        results.extend(hits)
+        return bool(hits)
 
-    # 段落
     prev = ""
     check = False
-    for i in doc.paragraphs:
-        p = i.text.replace('\r','\n').split('\n')
-        for line in p:
-            cur = line
-            if check:
-                feed_text(prev + cur)
-                check = False
-                continue
-            found = feed_text(line)
-            if not found:
-                prev = cur               # shift look-back
-                check = True
-    # 表格
-    for tbl in doc.tables:
-        for row in tbl.rows:
-            cells = [c.text.strip() for c in row.cells if c.text.strip()]
-            if not cells:
-                continue
+    for kind, block in PROFILER.wrap_iter("read_docx", read_blocks(path, reader)):
+        # 段落
+        if kind == "p":
+            p = block.replace('\r','\n').split('\n')
+            for line in p:
+                cur = line
+                if check:
+                    feed_text(prev + cur)
+                    check = False
+                    continue
+                found = feed_text(line)
+                if not found:
+                    prev = cur               # shift look-back
+                    check = True
+            continue
 
-            # 行级“一对”匹配
-            codes = [c for c in cells if PAT_CODE.fullmatch(c.replace(" ", ""))]
-            names = [m.group("name") for m in map(PAT_NAME.fullmatch, cells) if m]
-            if len(codes) == 1 and len(names) == 1:
-                results.append((codes[0], codes[0].replace(" ", ""), zh_punc_to_en(names[0])))
-                continue
+        # 表格
+        cells = [c.strip() for c in block if c.strip()]
+        if not cells:
+            continue
 
-            # 否则逐行逐格匹配
-            for cell in cells:
-                for line in cell.splitlines():
-                    feed_text(line)
-    return results
+        # 行级“一对”匹配
+        codes = [c for c in cells if PAT_CODE.fullmatch(c.replace(" ", ""))]
+        names = [m.group("name") for m in map(PAT_NAME.fullmatch, cells) if m]
+        if len(codes) == 1 and len(names) == 1:
+            table_results.append((codes[0], codes[0].replace(" ", ""), zh_punc_to_en(names[0])))
+            continue
+
+        # 否则逐行逐格匹配
+        for cell in cells:
+            for line in cell.splitlines():
+                feed_text(line, table_results)
+    return results + table_results
+
+# 解析报告的进程数（可在 .env 中覆盖）
+EXTRACT_WORKERS = get_env_int("EXTRACT_WORKERS", os.cpu_count() or 1)
+
+# 在工作进程中解析一个报告，同时带回 --profile 记录的耗时
+def _extract_profiled(path):
+    PROFILER.start_worker()
+    with PROFILER.span("extract", doc=Path(path).name):
+        hits = extract_from_docx(path)
+    return hits, PROFILER.finish_worker()
+
+# 用进程池并行解析多个报告，每个报告只解析一次；内容未变的报告直接使用提取缓存
+def extract_reports(paths, workers=EXTRACT_WORKERS, cache=None, pool=None):
+    """
+    Run extract_from_docx over `paths` in a process pool; returns {path: hits} in
+    the order of `paths`. A long-lived `pool` can be passed in instead of starting
+    one per call.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    paths = list(paths)
+    results = {}
+    if cache is not None:
+        with PROFILER.span("extract_cache"):
+            for path in paths:
+                hits = cache.get(path)
+                if hits is not None:
+                    results[path] = hits
+        logging.info(f"提取缓存命中{len(results)}/{len(paths)}个报告")
+    todo = [path for path in paths if path not in results]
+    workers = min(max(1, workers), len(todo))
+    # 开启 --profile 时，工作进程把各自记录的耗时随结果一起返回
+    extract = _extract_profiled if PROFILER.enabled else extract_from_docx
+    if pool is not None and todo:
+        parsed = list(pool.map(extract, todo))
+    elif workers <= 1:
+        parsed = []
+        for path in todo:
+            with PROFILER.span("extract", doc=Path(path).name):
+                parsed.append(extract_from_docx(path))
+        extract = extract_from_docx
+    else:
+        logging.info(f"使用{workers}个进程解析{len(todo)}个报告")
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parsed = list(pool.map(extract, todo))
+    if extract is _extract_profiled:
+        for _, records in parsed:
+            PROFILER.merge(records)
+        parsed = [hits for hits, _ in parsed]
+    for path, hits in zip(todo, parsed):
+        results[path] = hits
+        if cache is not None:
+            cache.put(path, hits)
+    return {path: results[path] for path in paths}
 
 def normalize_name(s: str) -> str:
     """比较前，对名称再做一次统一：去空格 + 半角化"""
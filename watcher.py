@@ -0,0 +1,156 @@
+# watcher.py
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+
+from util import get_env_float
+
+# 监视 reports 文件夹的配置（可在 .env 中覆盖）
+WATCH_DEBOUNCE_SECONDS = get_env_float("WATCH_DEBOUNCE_SECONDS", 2.0)  # 文件多久没有变化才重新检查
+WATCH_POLL_SECONDS = get_env_float("WATCH_POLL_SECONDS", 1.0)          # 轮询模式下扫描文件夹的间隔
+WATCH_BACKEND = os.getenv("WATCH_BACKEND", "auto")                     # auto / inotify / poll
+
+# 需要检查的报告：.docx，不含 Word 打开文档时生成的 ~$ 锁文件
+def is_report(name):
+    return name.lower().endswith(".docx") and not name.startswith("~$")
+
+def _signature(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+# 文件夹中每个报告的 (修改时间, 大小)
+def scan_reports(folder):
+    """{file name: (mtime_ns, size)} of the reports in `folder`"""
+    found = {}
+    with os.scandir(folder) as it:
+        for entry in it:
+            if entry.is_file() and is_report(entry.name):
+                st = entry.stat()
+                found[entry.name] = (st.st_mtime_ns, st.st_size)
+    return found
+
+# 轮询：定期扫描文件夹，比较修改时间和大小
+class _PollSource:
+    name = "poll"
+
+    def __init__(self, folder, interval):
+        self.folder = folder
+        self.interval = interval
+        self._state = scan_reports(folder)
+
+    def wait(self, timeout):
+        """Names that changed since the last scan, after waiting at most `timeout` seconds"""
+        time.sleep(self.interval if timeout is None else min(timeout, self.interval))
+        state = scan_reports(self.folder)
+        names = {n for n in state.keys() | self._state.keys() if state.get(n) != self._state.get(n)}
+        self._state = state
+        return names
+
+# inotify（Linux）：由内核通知文件夹中的变化，无需反复扫描
+class _InotifySource:
+    name = "inotify"
+    _EVENT = struct.Struct("iIII")
+    IN_MODIFY, IN_CLOSE_WRITE, IN_MOVED_FROM, IN_MOVED_TO = 0x2, 0x8, 0x40, 0x80
+    IN_CREATE, IN_DELETE, IN_Q_OVERFLOW = 0x100, 0x200, 0x4000
+    IN_NONBLOCK, IN_CLOEXEC = 0o4000, 0o2000000
+
+    def __init__(self, folder):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 失败")
+        mask = (self.IN_MODIFY | self.IN_CLOSE_WRITE | self.IN_MOVED_FROM | self.IN_MOVED_TO
+                | self.IN_CREATE | self.IN_DELETE)
+        if libc.inotify_add_watch(self._fd, os.fsencode(folder), mask) < 0:
+            err = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(err, f"无法监视 {folder}")
+
+    def wait(self, timeout):
+        """Names with events within `timeout` seconds; None when the kernel queue overflowed"""
+        if not select.select([self._fd], [], [], timeout)[0]:
+            return set()
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+        names = set()
+        pos = 0
+        while pos < len(data):
+            _, mask, _, length = self._EVENT.unpack_from(data, pos)
+            pos += self._EVENT.size
+            if mask & self.IN_Q_OVERFLOW:
+                return None
+            names.add(os.fsdecode(data[pos:pos + length].rstrip(b"\0")))
+            pos += length
+        return names
+
+    def close(self):
+        os.close(self._fd)
+
+def _open_source(folder, backend, poll_interval):
+    if backend in ("auto", "inotify") and sys.platform.startswith("linux"):
+        try:
+            return _InotifySource(folder)
+        except (OSError, AttributeError) as e:
+            logging.warning(f"无法使用 inotify（{e}），改为轮询")
+    return _PollSource(folder, poll_interval)
+
+# 监视报告文件夹：文件在 debounce 秒内没有新的变化才算保存完成，避免 Word 保存过程中反复触发
+class ReportWatcher:
+    """
+    Iterating yields (changed, removed) lists of report paths, debounced: a report
+    is reported once it has had no events for `debounce` seconds and its
+    (mtime, size) differs from the last time it was reported. Reports present
+    when the watcher starts count as already seen.
+    """
+    def __init__(self, folder, debounce=WATCH_DEBOUNCE_SECONDS, backend=WATCH_BACKEND,
+                 poll_interval=WATCH_POLL_SECONDS):
+        self.folder = Path(folder)
+        self.debounce = debounce
+        self._known = scan_reports(self.folder)
+        self._source = _open_source(self.folder, backend, poll_interval)
+        self.backend = self._source.name
+
+    def __iter__(self):
+        pending = {}
+        while True:
+            now = time.monotonic()
+            timeout = min((t + self.debounce - now for t in pending.values()), default=None)
+            names = self._source.wait(None if timeout is None else max(0.0, timeout))
+            now = time.monotonic()
+            if names is None:
+                # inotify 队列溢出：重新比较整个文件夹
+                names = scan_reports(self.folder).keys() | self._known.keys()
+            for name in names:
+                if is_report(name):
+                    pending[name] = now
+
+            quiet = [name for name, t in pending.items() if now - t >= self.debounce]
+            changed, removed = [], []
+            for name in quiet:
+                del pending[name]
+                sig = _signature(self.folder / name)
+                if sig == self._known.get(name):
+                    continue
+                if sig is None:
+                    del self._known[name]
+                    removed.append(self.folder / name)
+                else:
+                    self._known[name] = sig
+                    changed.append(self.folder / name)
+            if changed or removed:
+                yield sorted(changed), sorted(removed)
+
+    def close(self):
+        if hasattr(self._source, "close"):
+            self._source.close()